@@ -1,39 +1,104 @@
+import time
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from ..core.database import get_db
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.database import AsyncDB, get_async_db
 from ..core.security import verify_token
 from ..models.user import User
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Decoded tokens by raw token, and user records by id. Entries expire after
+# the configured TTL, so changes made by other workers are picked up too.
+token_cache = TTLCache(settings.auth_cache_max_entries, settings.auth_cache_ttl_seconds)
+user_cache = TTLCache(settings.auth_cache_max_entries, settings.auth_cache_ttl_seconds)
 
-def get_current_user(
+# Columns copied into cached user records (the password hash stays out)
+CACHED_USER_COLUMNS = [c.key for c in User.__table__.columns if c.key != "hashed_password"]
+
+
+def _cacheable_user(user: User) -> User:
+    """Copy a user into a transient instance that is safe to share between requests"""
+    return User(**{key: getattr(user, key) for key in CACHED_USER_COLUMNS})
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user's cached record, e.g. after it was changed or deactivated"""
+    user_cache.pop(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+def _decode_token(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = verify_token(token)
+        if payload is not None:
+            # Never keep a token around past its expiry
+            token_cache.set(token, payload, ttl=payload.get("exp", 0) - time.time())
+    return payload
+
+
+def _load_user(db: Session, user_id: Optional[int], email: str) -> Optional[User]:
+    """Load a user for caching (tokens issued before the id was added only have the email)"""
+    if user_id is not None:
+        user = db.get(User, user_id)
+    else:
+        user = db.query(User).filter(User.email == email).first()
+    user = _cacheable_user(user) if user is not None and user.email == email else None
+    # End the read so the connection goes back to the pool while the request
+    # waits for its handler; the copy is not attached to the session
+    db.rollback()
+    return user
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_async_db)
 ) -> User:
-    """Get current authenticated user from JWT token"""
+    """Get current authenticated user from JWT token.
+
+    Tokens carry the user id, so a cached token and user record authenticate
+    the request without touching the database.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
     # Verify token
-    payload = verify_token(credentials.credentials)
+    payload = _decode_token(credentials.credentials)
     if payload is None:
         raise credentials_exception
-    
+
     email: str = payload.get("sub")
     if email is None:
         raise credentials_exception
-    
+
+    if payload.get("active") is False:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    user_id = payload.get("uid")
+    user = user_cache.get(user_id) if user_id is not None else None
+    if user is not None:
+        return user
+
     # Get user from database
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.run(_load_user, user_id, email)
     if user is None:
         raise credentials_exception
-    
+
+    user_cache.set(user.id, user)
     return user
 
 
@@ -41,4 +106,4 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
@@ -1,8 +1,11 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from ..core.database import get_db
-from ..core.security import verify_password, get_password_hash, create_access_token
+from typing import Optional
+from ..core.database import AsyncDB, get_async_db
+from ..core.security import (
+    HashingBusyError, hash_password_async, verify_password_async, create_access_token
+)
 from ..core.config import settings
 from ..models.user import User
 from ..schemas.user import UserCreate, UserLogin, UserResponse, Token
@@ -11,40 +14,71 @@ from .dependencies import get_current_active_user
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests, please try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _add_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def _set_password_hash(db: Session, user: User, hashed_password: str) -> None:
+    user.hashed_password = hashed_password
+    db.commit()
+
+
 @router.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncDB = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.run(_get_user_by_email, user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+    # Create new user (hashing runs on the hashing pool, off the event loop)
+    try:
+        hashed_password = await hash_password_async(user.password)
+    except HashingBusyError:
+        raise _hashing_busy()
+    
     db_user = User(
         email=user.email,
         full_name=user.full_name,
         hashed_password=hashed_password
     )
     
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    return db_user
+    return await db.run(_add_user, db_user)
 
 
 @router.post("/login", response_model=Token)
-def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login_user(user_credentials: UserLogin, db: AsyncDB = Depends(get_async_db)):
     """Authenticate user and return access token"""
     # Get user from database
-    user = db.query(User).filter(User.email == user_credentials.email).first()
+    user = await db.run(_get_user_by_email, user_credentials.email)
     
     # Verify user exists and password is correct
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await verify_password_async(user_credentials.password, user.hashed_password)
+        except HashingBusyError:
+            raise _hashing_busy()
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -58,10 +92,15 @@ def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Inactive user"
         )
     
+    # Rehash transparently when the configured bcrypt cost has changed
+    if new_hash:
+        await db.run(_set_password_hash, user, new_hash)
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id, "active": user.is_active},
+        expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -70,4 +109,4 @@ def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(current_user: User = Depends(get_current_active_user)):
     """Get current user information"""
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1 @@
+# Command line tools package
\ No newline at end of file
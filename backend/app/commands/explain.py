@@ -0,0 +1,159 @@
+"""Check the query plans of the hot route queries.
+
+Runs the queries behind the transactions, budgets and AI routes against the
+configured database, captures their EXPLAIN output and compares the indexes
+the planner chose with the indexes each query is expected to use. The
+queries come from the service functions the routes call (with the routes'
+default page size), so the statements explained are the ones the API runs.
+The rollup tables are read through their primary keys, listed as
+"<table> primary key".
+
+Usage:
+    python -m app.commands.explain [--user-id ID]
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from ..core.database import engine, Base
+from ..core.profiler import EXPLAIN_PREFIXES
+from ..models.user import User
+from ..models.transaction import TransactionType
+from ..services.budget_spending import get_budgets_with_spending
+from ..services.financial_context import build_snapshot
+from ..services.transaction_list import list_transactions
+from ..services.transaction_stats import compute_transaction_stats
+
+
+def _list_transactions(db: Session, user_id: int):
+    return list_transactions(db, user_id, 0, 100, False, None, None, None, None)
+
+
+def _list_transactions_after_cursor(db: Session, user_id: int):
+    after = (datetime.utcnow() - timedelta(days=365), 2 ** 31 - 1)
+    return list_transactions(db, user_id, 0, 100, True, after, None, None, None)
+
+
+def _list_transactions_by_type(db: Session, user_id: int):
+    return list_transactions(db, user_id, 0, 100, False, None, TransactionType.EXPENSE, None, None)
+
+
+def _list_transactions_in_range(db: Session, user_id: int):
+    end_date = datetime.utcnow()
+    return list_transactions(db, user_id, 0, 100, False, None, None, end_date - timedelta(days=30), end_date)
+
+
+def _transaction_stats(db: Session, user_id: int):
+    end_date = datetime.utcnow()
+    return compute_transaction_stats(db, user_id, end_date - timedelta(days=30), end_date)
+
+
+def _transaction_stats_for_last_month(db: Session, user_id: int):
+    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last_month_start = (month_start - timedelta(days=1)).replace(day=1)
+    return compute_transaction_stats(db, user_id, last_month_start, month_start - timedelta(seconds=1))
+
+
+def _budget_spending(db: Session, user_id: int):
+    return get_budgets_with_spending(db, user_id)
+
+
+def _financial_snapshot(db: Session, user_id: int):
+    return build_snapshot(db, user_id)
+
+
+# (name, query, indexes the planner may pick for the query)
+CHECKS = [
+    ("GET /transactions", _list_transactions, {"ix_transactions_user_date"}),
+    ("GET /transactions?cursor=", _list_transactions_after_cursor, {"ix_transactions_user_date"}),
+    ("GET /transactions?type=", _list_transactions_by_type, {"ix_transactions_user_type_date"}),
+    ("GET /transactions?start_date=&end_date=", _list_transactions_in_range, {"ix_transactions_user_date"}),
+    ("GET /transactions/stats", _transaction_stats, {
+        "ix_transactions_user_date", "ix_transactions_user_type_category_date",
+        "user_monthly_rollups primary key", "user_daily_sums primary key"
+    }),
+    ("GET /transactions/stats (whole months)", _transaction_stats_for_last_month, {
+        "ix_transactions_user_date", "ix_transactions_user_type_category_date",
+        "user_monthly_rollups primary key"
+    }),
+    ("GET /budgets", _budget_spending, {
+        "user_monthly_rollups primary key", "user_daily_sums primary key"
+    }),
+    ("POST /ai/assistant", _financial_snapshot, {
+        "user_monthly_rollups primary key", "ix_transactions_user_type_category_date"
+    }),
+]
+
+
+def _index_names() -> set:
+    return {index.name for table in Base.metadata.tables.values() for index in table.indexes}
+
+
+def _primary_keys_used(rows: list) -> set:
+    """Tables a plan reads through their composite primary key"""
+    used = set()
+    for table in Base.metadata.tables:
+        for row in rows:
+            if engine.dialect.name == "mysql":
+                # Columns: id, select_type, table, partitions, type, possible_keys, key, ...
+                found = row[2] == table and row[6] == "PRIMARY"
+            else:
+                text = str(tuple(row))
+                found = f"sqlite_autoindex_{table}_" in text or f"{table}_pkey" in text
+            if found:
+                used.add(f"{table} primary key")
+    return used
+
+
+def explain(check, user_id: int) -> list:
+    """Run a route query and return the EXPLAIN output of each statement it executes"""
+    prefix = EXPLAIN_PREFIXES.get(engine.dialect.name, "EXPLAIN ")
+    plans = []
+
+    with engine.connect() as connection:
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            cursor.execute(prefix + statement, parameters)
+            plans.append((statement, cursor.fetchall()))
+
+        event.listen(connection, "before_cursor_execute", capture)
+        with Session(bind=connection) as db:
+            check(db, user_id)
+
+    return plans
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, help="user whose data the queries run against")
+    args = parser.parse_args(argv)
+
+    user_id = args.user_id
+    if user_id is None:
+        with Session(engine) as db:
+            user_id = db.query(func.min(User.id)).scalar() or 1
+
+    known_indexes = _index_names()
+    failures = 0
+
+    for name, check, expected in CHECKS:
+        plans = explain(check, user_id)
+        plan_text = "\n".join(str(row) for _, rows in plans for row in rows)
+        used = {index for index in known_indexes if index in plan_text}
+        used |= _primary_keys_used([row for _, rows in plans for row in rows])
+        ok = bool(used & expected)
+        failures += not ok
+
+        print(f"{'OK  ' if ok else 'FAIL'} {name}")
+        print(f"     expected: {', '.join(sorted(expected))}")
+        print(f"     used:     {', '.join(sorted(used)) or 'no index'}")
+        for statement, rows in plans:
+            print("     " + " ".join(statement.split())[:120])
+            for row in rows:
+                print(f"       {tuple(row)}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Manage the database schema.
+
+Usage:
+    python -m app.commands.migrate upgrade [--revision REV]
+    python -m app.commands.migrate check
+
+``upgrade`` applies pending migrations (up to the latest by default). The API
+does not touch the schema when it starts unless MIGRATE_ON_STARTUP is set, so
+run it as a deploy step before starting new workers. ``check`` lists pending
+migrations and exits non-zero when there are any.
+"""
+import argparse
+import sys
+from ..core.migrations import pending_migrations, upgrade_database
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("action", choices=["upgrade", "check"])
+    parser.add_argument("--revision", default="head", help="revision to upgrade to")
+    args = parser.parse_args(argv)
+
+    if args.action == "upgrade":
+        upgrade_database(args.revision)
+        print("Database schema is up to date" if args.revision == "head" else f"Upgraded to {args.revision}")
+        return 0
+
+    pending = pending_migrations()
+    for revision in pending:
+        print(f"pending: {revision}")
+    print(f"{len(pending)} pending migrations")
+    return 1 if pending else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Maintain the monthly rollup and running daily sum tables.
+
+Usage:
+    python -m app.commands.rollups rebuild [--user-id ID]
+    python -m app.commands.rollups check [--user-id ID]
+
+``rebuild`` recomputes both tables from the transactions table (use it to
+backfill or repair). ``check`` diffs them against the raw transactions and
+exits non-zero when they disagree.
+"""
+import argparse
+import sys
+from ..core.database import SessionLocal
+from ..services.rollups import rebuild_rollups, check_rollups
+from ..services.daily_sums import rebuild_daily_sums, check_daily_sums
+
+# Import all models to ensure they're registered
+from ..models.user import User
+from ..models.transaction import Transaction
+from ..models.budget import Budget
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("action", choices=["rebuild", "check"])
+    parser.add_argument("--user-id", type=int, help="limit to one user")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.action == "rebuild":
+            rebuild_rollups(db, args.user_id)
+            rebuild_daily_sums(db, args.user_id)
+            db.commit()
+            print("Rollups rebuilt")
+            return 0
+
+        mismatches = check_rollups(db, args.user_id)
+        for mismatch in mismatches:
+            print(
+                "user {user_id} {month} {type}/{category}: "
+                "expected {expected_total:.2f} ({expected_count}), "
+                "found {actual_total:.2f} ({actual_count})".format(**mismatch)
+            )
+        print(f"{len(mismatches)} mismatched rollup buckets")
+
+        daily_mismatches = check_daily_sums(db, args.user_id)
+        for mismatch in daily_mismatches:
+            print(
+                "user {user_id} {day} {type}/{category}: "
+                "expected {expected_total:.2f} ({expected_count}), "
+                "found {actual_total} ({actual_count})".format(**mismatch)
+            )
+        print(f"{len(daily_mismatches)} mismatched daily sums")
+
+        return 1 if mismatches or daily_mismatches else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,120 @@
-from pydantic_settings import BaseSettings
-from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Dict, Literal
 
 
 class Settings(BaseSettings):
     # Database
     database_url: str
+    # Serve requests through SQLAlchemy's asyncio engine (aiomysql, or aiosqlite for
+    # SQLite) instead of a sync Session in the threadpool
+    database_async: bool = False
+    # Defaults to database_url with its driver swapped for the asyncio one
+    async_database_url: str = ""
+    # Connection pool per engine and worker process. Each request holds one
+    # connection, so size + overflow bounds the requests doing DB work at once;
+    # the rest wait up to the pool timeout. Recycle is in seconds (-1 = never).
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 300
+    # Check connections on checkout: "always", "idle" (only those unused for the
+    # given number of seconds, saving a round trip on busy workers; keep it
+    # below any server or proxy idle timeout) or "never"
+    db_pool_pre_ping: Literal["always", "idle", "never"] = "always"
+    db_pool_pre_ping_idle_seconds: float = 30
+    # Apply pending migrations when the API starts. Off by default: run
+    # `python -m app.commands.migrate upgrade` as a deploy step instead.
+    migrate_on_startup: bool = False
     
     # JWT
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
-    # Google Gemini API
-    gemini_api_key: str
+    # Password hashing
+    bcrypt_rounds: int = 12
+    # "process" for CPU parallelism, "thread" where processes are unavailable
+    password_hash_executor: str = "process"
+    password_hash_workers: int = 0  # 0 = one per CPU
+    password_hash_max_pending: int = 64
+    
+    # Authenticated-user cache
+    auth_cache_ttl_seconds: int = 60
+    auth_cache_max_entries: int = 10000
+    
+    # Google Gemini API. Only needed by workers serving the AI routes; without
+    # a key they answer 503.
+    gemini_api_key: str = ""
+    gemini_model: str = "gemini-2.0-flash-exp"
+    # Total time an AI request may take, retries included
+    ai_timeout_seconds: float = 30
+    # Retries of quota, server and network errors, with jittered exponential backoff.
+    # The budget caps retries at this fraction of calls.
+    ai_max_retries: int = 2
+    ai_retry_backoff_seconds: float = 0.5
+    ai_retry_budget_ratio: float = 0.2
+    # Fail fast after this many upstream failures in a row, then try again after the reset time
+    ai_breaker_failure_threshold: int = 5
+    ai_breaker_reset_seconds: float = 30
+    # Gemini calls allowed in flight per worker, and how long a request waits for a free slot
+    ai_max_concurrent_calls: int = 8
+    ai_queue_timeout_seconds: float = 5
+    # Cached advice, reused while the question and the user's totals stay the same
+    ai_cache_ttl_seconds: int = 600
+    ai_cache_max_entries: int = 1000
+    # Per-user financial snapshots sent as AI context (dropped early when the user's data changes)
+    ai_snapshot_ttl_seconds: int = 300
+    # Cache the static advisor instruction on Gemini's side instead of re-sending it.
+    # Gemini only caches prompts above a model-specific minimum size, so it is off by default.
+    ai_prompt_cache_enabled: bool = False
+    ai_prompt_cache_ttl_seconds: int = 3600
+    # Background AI jobs: workers per process, waiting jobs allowed per user,
+    # and the deadline and answer length of each job
+    ai_job_workers: int = 2
+    ai_job_max_pending_per_user: int = 10
+    ai_job_timeout_seconds: float = 120
+    ai_job_max_output_tokens: int = 2000
+    # Jobs abandoned mid-run this many times (e.g. by a crashing worker) are failed
+    ai_job_max_attempts: int = 3
+    
+    # Aggregates
+    # Answer whole-month stats and budget spending from the monthly rollups
+    monthly_rollups_enabled: bool = True
+    # Answer other date ranges from the running daily sums
+    daily_sums_enabled: bool = True
+    
+    # Bulk imports: rows per executemany batch and per transaction, and how many
+    # row errors are listed in the response (all of them are counted)
+    import_batch_size: int = 1000
+    import_max_reported_errors: int = 100
+    
+    # Metrics: per-route latency, status and SQL counters plus Gemini latency and
+    # tokens, served in the Prometheus text format at /metrics. The endpoint needs
+    # INTERNAL_TOKEN unless it is made public.
+    metrics_enabled: bool = True
+    metrics_public: bool = False
+    
+    # Query profiler, for development: fingerprints each request's statements, warns
+    # about shapes repeated this many times (likely N+1) and prints slow queries with
+    # their EXPLAIN output. Responses get an X-Query-Profile header.
+    query_profiler_enabled: bool = False
+    query_profiler_slow_ms: float = 100
+    query_profiler_repeat_threshold: int = 5
+    # Statements allowed per request while profiling (0 = no budget), overridden per
+    # route as JSON, e.g. {"GET /budgets": 6}. Strict mode makes the statement over
+    # budget raise, so tests fail.
+    query_budget: int = 0
+    query_budgets: Dict[str, int] = {}
+    query_budget_strict: bool = False
+    
+    # Internal endpoints (/internal/pool, /cache, /ai, /queries): hidden unless a token
+    # is set, then requests must send it in the X-Internal-Token header
+    internal_token: str = ""
     
     # CORS
     frontend_url: str = "http://localhost:5173"
     
-    class Config:
-        env_file = ".env"
+    model_config = SettingsConfigDict(env_file=".env")
 
 
 settings = Settings()
\ No newline at end of file
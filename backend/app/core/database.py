@@ -1,23 +1,75 @@
+from typing import Callable, TypeVar, Union
+import anyio
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from .config import settings
+from .metrics import instrument_engine
+from .pool import engine_options, install_idle_pre_ping
+from .profiler import install_query_profiler
 import pymysql
 
+T = TypeVar("T")
+
+# asyncio drivers used for the async engine, by sync URL prefix
+ASYNC_DRIVERS = (
+    ("mysql+pymysql://", "mysql+aiomysql://"),
+    ("mysql://", "mysql+aiomysql://"),
+    ("sqlite://", "sqlite+aiosqlite://"),
+    ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+    ("postgresql://", "postgresql+asyncpg://"),
+)
+
 # Install PyMySQL as MySQLdb
 pymysql.install_as_MySQLdb()
 
-# Create database engine
+# Create database engine (pool sizing and pre-ping come from the DB_POOL_* settings)
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=False
+    echo=False,
+    **engine_options(settings.database_url)
 )
+if settings.db_pool_pre_ping == "idle":
+    install_idle_pre_ping(engine, settings.db_pool_pre_ping_idle_seconds)
+if settings.metrics_enabled:
+    instrument_engine(engine)
+if settings.query_profiler_enabled:
+    install_query_profiler(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(url: str) -> str:
+    """Swap the driver in a database URL for its asyncio counterpart"""
+    for sync_prefix, async_prefix in ASYNC_DRIVERS:
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+# Async engine and session factory, used by the routers when DATABASE_ASYNC is on.
+# Objects are not expired on commit, since reloading them would need IO
+# outside of the session's greenlet.
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_async:
+    _async_url = settings.async_database_url or async_database_url(settings.database_url)
+    async_engine = create_async_engine(
+        _async_url,
+        echo=False,
+        **engine_options(_async_url, is_async=True)
+    )
+    if settings.db_pool_pre_ping == "idle":
+        install_idle_pre_ping(async_engine.sync_engine, settings.db_pool_pre_ping_idle_seconds)
+    if settings.metrics_enabled:
+        instrument_engine(async_engine.sync_engine)
+    if settings.query_profiler_enabled:
+        install_query_profiler(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -28,4 +80,42 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+class AsyncDB:
+    """Database handle for async route handlers.
+
+    ORM code stays synchronous and is passed to run(). With DATABASE_ASYNC on
+    it runs on the asyncio driver through AsyncSession.run_sync, without
+    using a thread; otherwise it runs on a regular Session in the threadpool.
+    """
+
+    def __init__(self, session: Union[Session, AsyncSession]):
+        self.session = session
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Call func(session, *args, **kwargs) with a synchronous Session"""
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(func, *args, **kwargs)
+        return await run_in_threadpool(func, self.session, *args, **kwargs)
+
+
+async def _close_session(db: Session) -> None:
+    # Closing bypasses the threadpool's limit, like the exit of FastAPI's own
+    # sync dependencies: with every pool thread waiting for a connection, the
+    # sessions holding the connections could otherwise never be closed
+    await anyio.to_thread.run_sync(db.close, limiter=anyio.CapacityLimiter(1))
+
+
+async def get_async_db():
+    """Dependency to get a database handle for async handlers"""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield AsyncDB(session)
+    else:
+        db = SessionLocal()
+        try:
+            yield AsyncDB(db)
+        finally:
+            await _close_session(db)
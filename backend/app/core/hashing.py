@@ -0,0 +1,34 @@
+"""Password hashing primitives run inside the hashing worker pool.
+
+Kept free of application imports so that worker processes start quickly.
+"""
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+
+# One context per bcrypt cost, built lazily in each worker
+_contexts = {}
+
+
+def get_context(rounds: int) -> CryptContext:
+    """Get a bcrypt context that hashes at, and only accepts, the given cost"""
+    context = _contexts.get(rounds)
+    if context is None:
+        context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds
+        )
+        _contexts[rounds] = context
+    return context
+
+
+def hash_password(password: str, rounds: int) -> str:
+    """Hash a password at the given cost"""
+    return get_context(rounds).hash(password)
+
+
+def verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """Verify a password, returning a new hash if the stored one uses another cost"""
+    return get_context(rounds).verify_and_update(password, hashed_password)
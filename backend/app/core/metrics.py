@@ -0,0 +1,231 @@
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Upper bounds of the queries-per-request histogram buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+# Upper bounds (seconds) of the Gemini call latency histogram buckets
+AI_LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+_metrics: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    """A metric family with one value per combination of label values"""
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, object] = {}
+        self._lock = Lock()
+        _metrics.append(self)
+
+    @abstractmethod
+    def _samples(self) -> Iterator[str]:
+        """Sample lines for each label combination, called with the lock held"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        if not labelnames:
+            # Report the single series from the start
+            self._values[()] = 0
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Bucket counts, sum and count per label combination, rendered cumulatively"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # One count per bucket plus one for values above the last bound, then the sum
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def _samples(self) -> Iterator[str]:
+        for labels, series in self._values.items():
+            count = 0
+            for bound, bucket in zip(self.buckets + ("+Inf",), series):
+                count += bucket
+                le = f'le="{bound if bound == "+Inf" else _number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {count}"
+
+
+def render_metrics() -> str:
+    """All metrics of this worker in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in _metrics) + "\n"
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response body", ("method", "route")
+)
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being handled")
+HTTP_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements run per request", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+HTTP_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ("method", "route")
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements run, inside requests or not", ("context",))
+DB_SECONDS = Counter("db_query_seconds_total", "Time spent in SQL statements", ("context",))
+AI_CALLS = Histogram(
+    "gemini_call_duration_seconds", "Gemini calls by kind and outcome, retries included",
+    ("call", "outcome"), AI_LATENCY_BUCKETS
+)
+AI_TOKENS = Counter("gemini_tokens_total", "Gemini tokens used, by kind", ("kind",))
+
+
+class RequestStats:
+    """SQL counters of the request being handled; shared with the threadpool and greenlets it runs code in"""
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Count the statements an engine runs and time them, per request and in total"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+        context_label = "request" if stats is not None else "background"
+        DB_QUERIES.inc(context_label)
+        DB_SECONDS.inc(context_label, amount=elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        # after_cursor_execute does not fire for a failed statement
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+
+def record_ai_call(call: str, outcome: str, seconds: float, usage=None) -> None:
+    """Record a Gemini call's latency and, when the response reported it, its token usage"""
+    AI_CALLS.observe(seconds, call, outcome)
+    if usage is None:
+        return
+    for kind, attribute in (
+        ("prompt", "prompt_token_count"),
+        ("cached", "cached_content_token_count"),
+        ("output", "candidates_token_count"),
+    ):
+        count = getattr(usage, attribute, None)
+        if count:
+            AI_TOKENS.inc(kind, amount=count)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status codes, in-flight requests and SQL use per route.
+
+    Requests are labelled with the matched route's path template, so ids in
+    the URL do not create new series; unmatched paths share one label.
+    """
+
+    def __init__(self, app, exclude_paths: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        HTTP_IN_PROGRESS.inc()
+        began = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - began
+            HTTP_IN_PROGRESS.dec()
+            _request_stats.reset(token)
+
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, path, status)
+            HTTP_LATENCY.observe(elapsed, method, path)
+            HTTP_DB_QUERIES.observe(stats.queries, method, path)
+            HTTP_DB_SECONDS.observe(stats.db_seconds, method, path)
@@ -0,0 +1,33 @@
+from pathlib import Path
+from typing import List
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from .database import engine
+
+# Directory containing alembic.ini and the migrations package
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def get_alembic_config() -> Config:
+    """Build the Alembic config used by the app and the CLI commands"""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    # Leave the application's logging configuration alone
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def upgrade_database(revision: str = "head") -> None:
+    """Apply all pending schema migrations"""
+    command.upgrade(get_alembic_config(), revision)
+
+
+def pending_migrations() -> List[str]:
+    """Revisions not yet applied to the database, oldest first"""
+    script = ScriptDirectory.from_config(get_alembic_config())
+    with engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_heads()
+    revisions = script.iterate_revisions("heads", current or "base")
+    return [revision.revision for revision in reversed(list(revisions))]
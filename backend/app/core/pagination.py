@@ -0,0 +1,20 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(date: datetime, id: int) -> str:
+    """Encode a (date, id) keyset position as an opaque cursor"""
+    raw = json.dumps([date.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if invalid"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(date), int(id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,180 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from .config import settings
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class PoolMetrics:
+    """Checkout counters and a wait time histogram for one connection pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.pings = 0
+        self.ping_failures = 0
+        # One count per bucket, plus one for waits above the last bound
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self._lock = Lock()
+
+    def checkout_started(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def checkout_finished(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self.wait_buckets[bisect_left(WAIT_BUCKETS, waited)] += 1
+
+    def ping(self, ok: bool) -> None:
+        with self._lock:
+            self.pings += 1
+            if not ok:
+                self.ping_failures += 1
+
+    def stats(self) -> dict:
+        """Counters for monitoring; the histogram is cumulative, Prometheus style"""
+        with self._lock:
+            histogram, count = {}, 0
+            for bound, bucket in zip(WAIT_BUCKETS + ("+Inf",), self.wait_buckets):
+                count += bucket
+                histogram[str(bound)] = count
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "waiting": self.waiting,
+                "wait_seconds_total": round(self.wait_seconds_total, 4),
+                "wait_seconds_max": round(self.wait_seconds_max, 4),
+                "wait_seconds_histogram": histogram,
+                "pre_pings": self.pings,
+                "pre_ping_failures": self.ping_failures
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout, including the time spent queueing for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        self.metrics.checkout_started()
+        began = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.checkout_finished(time.perf_counter() - began, timed_out=True)
+            raise
+        except BaseException:
+            self.metrics.checkout_finished(time.perf_counter() - began)
+            raise
+        self.metrics.checkout_finished(time.perf_counter() - began)
+        return connection
+
+    def recreate(self):
+        # Keep the counters when the engine replaces its pool, e.g. on dispose()
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> dict:
+        """Live pool state plus the checkout counters"""
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            **self.metrics.stats()
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool arguments for create_engine / create_async_engine from the settings.
+
+    Sizing only applies to databases served by a queue pool (MySQL,
+    PostgreSQL, file-based SQLite); other pools keep SQLAlchemy's defaults.
+    """
+    options = {
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping == "always",
+    }
+    url = make_url(url)
+    if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return options
+
+
+def install_idle_pre_ping(engine, idle_seconds: float) -> None:
+    """Ping connections on checkout only when they sat idle for longer than idle_seconds.
+
+    A connection that was just returned to the pool is almost certainly
+    still alive, so this saves the round trip of pool_pre_ping on busy
+    workers while still catching connections the server dropped.
+    """
+    @event.listens_for(engine, "checkin")
+    def _checked_in(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.pop("checked_in_at", None)
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+
+        metrics = getattr(engine.pool, "metrics", None)
+        cursor = None
+        try:
+            # Some drivers already fail to open a cursor on a dead connection
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SELECT 1")
+        except Exception:
+            if metrics is not None:
+                metrics.ping(ok=False)
+            # The pool discards the connection and checks out a fresh one
+            raise exc.DisconnectionError()
+        finally:
+            try:
+                if cursor is not None:
+                    cursor.close()
+            except Exception:
+                pass
+        if metrics is not None:
+            metrics.ping(ok=True)
+
+
+def pool_stats(engine) -> dict:
+    """State of an engine's pool, with the checkout counters when it is instrumented"""
+    pool = engine.pool
+    if hasattr(pool, "metrics"):
+        return {"pool": type(pool).__name__, **pool.stats()}
+    return {"pool": type(pool).__name__, "status": pool.status()}
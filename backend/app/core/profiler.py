@@ -0,0 +1,209 @@
+import re
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from .config import settings
+
+EXPLAIN_PREFIXES = {
+    "mysql": "EXPLAIN ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+
+# Profiles of the most recent requests, newest last, for GET /internal/queries
+PROFILE_HISTORY = 100
+
+# Characters of a statement kept in warnings and profiles
+STATEMENT_PREVIEW = 300
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+# A list of two or more placeholders, e.g. an expanded IN (...)
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+recent_profiles: deque = deque(maxlen=PROFILE_HISTORY)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised by the statement that takes a request over its query budget (QUERY_BUDGET_STRICT)"""
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Shape of a statement: literals become ? and placeholder lists collapse to (?)"""
+    shape = _LITERAL.sub("?", " ".join(statement.split()))
+    return _PLACEHOLDER_LIST.sub("(?)", shape)
+
+
+class QueryProfile:
+    """Statements one request executed, grouped by fingerprint"""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.seconds = 0.0
+        # fingerprint -> [count, seconds]
+        self.shapes: Dict[str, list] = {}
+        self.slow: List[dict] = []
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {getattr(route, 'path', self.scope['path'])}"
+
+    def budget(self) -> int:
+        return settings.query_budgets.get(self.route, settings.query_budget)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.seconds += seconds
+        shape = self.shapes.setdefault(fingerprint(statement), [0, 0.0])
+        shape[0] += 1
+        shape[1] += seconds
+
+    def repeated(self) -> List[dict]:
+        """Statement shapes run at least QUERY_PROFILER_REPEAT_THRESHOLD times, most frequent first"""
+        return [
+            {"statement": shape[:STATEMENT_PREVIEW], "count": count, "ms": round(seconds * 1000, 2)}
+            for shape, (count, seconds) in sorted(self.shapes.items(), key=lambda item: -item[1][0])
+            if count >= settings.query_profiler_repeat_threshold
+        ]
+
+    def summary(self, status: int) -> dict:
+        return {
+            "route": self.route,
+            "status": status,
+            "queries": self.queries,
+            "db_ms": round(self.seconds * 1000, 2),
+            "distinct_statements": len(self.shapes),
+            "budget": self.budget() or None,
+            "repeated": self.repeated(),
+            "slow": self.slow
+        }
+
+    def header(self) -> str:
+        """Compact summary for the X-Query-Profile response header"""
+        parts = [
+            f"queries={self.queries}",
+            f"db_ms={self.seconds * 1000:.1f}",
+            f"distinct={len(self.shapes)}",
+            f"repeated={len(self.repeated())}",
+            f"slow={len(self.slow)}"
+        ]
+        if self.budget():
+            parts.append(f"budget={self.budget()}")
+        return "; ".join(parts)
+
+
+_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+def _explain(conn, statement: str, parameters) -> List[tuple]:
+    """EXPLAIN a statement on a separate DBAPI cursor, so no events fire and pending rows are untouched"""
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name, "EXPLAIN ")
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return [tuple(row) for row in cursor.fetchall()]
+    except Exception as e:
+        return [(f"EXPLAIN failed: {e}",)]
+    finally:
+        cursor.close()
+
+
+def install_query_profiler(engine) -> None:
+    """Fingerprint and time every statement an engine runs for the current request.
+
+    Statements slower than QUERY_PROFILER_SLOW_MS are printed with their
+    EXPLAIN output. With QUERY_BUDGET_STRICT on, the statement that goes over
+    the request's budget raises QueryBudgetExceeded.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        profile = _profile.get()
+        if profile is not None and settings.query_budget_strict:
+            budget = profile.budget()
+            if budget and profile.queries >= budget:
+                raise QueryBudgetExceeded(
+                    f"{profile.route} ran more than its budget of {budget} queries: "
+                    f"{' '.join(statement.split())[:STATEMENT_PREVIEW]}"
+                )
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["profile_started"].pop()
+        profile = _profile.get()
+        if profile is not None:
+            profile.record(statement, elapsed)
+        if elapsed * 1000 < settings.query_profiler_slow_ms:
+            return
+
+        streaming = context is not None and context.execution_options.get("stream_results")
+        explainable = statement.lstrip().upper().startswith("SELECT") and not executemany and not streaming
+        plan = _explain(conn, statement, parameters) if explainable else []
+        preview = " ".join(statement.split())[:STATEMENT_PREVIEW]
+        print(f"⚠️  WARNING: Slow query ({elapsed * 1000:.1f} ms"
+              f"{', ' + profile.route if profile is not None else ''}): {preview}")
+        for row in plan:
+            print(f"     {row}")
+        if profile is not None:
+            profile.slow.append({"statement": preview, "ms": round(elapsed * 1000, 2), "plan": [str(row) for row in plan]})
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        # after_cursor_execute does not fire for a failed statement
+        connection = exception_context.connection
+        started = connection.info.get("profile_started") if connection is not None else None
+        if started:
+            started.pop()
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware profiling the statements of each request.
+
+    Adds an X-Query-Profile header with the request's statement count, DB
+    time, repeated statement shapes (likely N+1 loops), slow queries and
+    budget. Prints a warning for repeated shapes and exceeded budgets, and
+    keeps the last PROFILE_HISTORY summaries for GET /internal/queries.
+    Statements run after the response headers were sent (e.g. by streaming
+    responses) are counted in the summary but not in the header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(scope)
+        status = 500
+
+        async def send_with_profile(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-profile", profile.header().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _profile.reset(token)
+            summary = profile.summary(status)
+            recent_profiles.append(summary)
+            for repeated in summary["repeated"]:
+                print(f"⚠️  WARNING: Possible N+1 in {summary['route']}: ran {repeated['count']} times: "
+                      f"{repeated['statement']}")
+            if summary["budget"] and summary["queries"] > summary["budget"]:
+                print(f"⚠️  WARNING: {summary['route']} ran {summary['queries']} queries, "
+                      f"over its budget of {summary['budget']}")
@@ -0,0 +1,106 @@
+import random
+import time
+
+
+class CircuitBreaker:
+    """Fail fast while an upstream service keeps failing.
+
+    Closed: calls go through, and `failure_threshold` failures in a row open
+    the circuit. Open: calls are rejected until `reset_timeout` has passed,
+    then a single trial call is let through (half-open). Its outcome closes
+    the circuit again or reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self.opened_at = 0.0
+        self._trial_started = None
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream now"""
+        if self.state == self.CLOSED:
+            return True
+
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._trial_started = None
+
+        # A trial whose outcome never got recorded (e.g. it was cancelled)
+        # is given up on after another reset_timeout
+        if self.state == self.HALF_OPEN and (
+            self._trial_started is None or now - self._trial_started >= self.reset_timeout
+        ):
+            self._trial_started = now
+            return True
+
+        self.rejected += 1
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial call is allowed"""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial_started = None
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 1) if self.state != self.CLOSED else 0
+        }
+
+
+class RetryBudget:
+    """Allow retries for at most `ratio` of calls.
+
+    Each call earns `ratio` tokens and each retry spends one, so during an
+    outage retries cannot multiply the load on the upstream service.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float = 10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.retries = 0
+        self.denied = 0
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Spend a token for a retry, if one is left"""
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.retries += 1
+            return True
+        self.denied += 1
+        return False
+
+    def stats(self) -> dict:
+        return {"tokens": round(self.tokens, 2), "retries": self.retries, "denied": self.denied}
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 10.0) -> float:
+    """Exponential backoff with full jitter for the given (0-based) retry"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -1,11 +1,22 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from .config import settings
+from . import hashing
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = hashing.get_context(settings.bcrypt_rounds)
+
+# Hashing worker pool, created on first use
+_hash_executor: Optional[Executor] = None
+_pending_hashes = 0
+
+
+class HashingBusyError(Exception):
+    """Raised when too many password hashes are already queued"""
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -18,6 +29,60 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _get_hash_executor() -> Executor:
+    """Get the bounded pool that password hashing runs on"""
+    global _hash_executor
+    if _hash_executor is None:
+        workers = settings.password_hash_workers or os.cpu_count() or 1
+        if settings.password_hash_executor == "process":
+            try:
+                _hash_executor = ProcessPoolExecutor(max_workers=workers)
+            except (OSError, NotImplementedError):
+                # Some serverless runtimes cannot create process pools
+                _hash_executor = None
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    """Stop the hashing workers"""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+async def _run_hashing(func, *args):
+    """Run a hashing function on the worker pool without blocking the event loop"""
+    global _pending_hashes
+    if _pending_hashes >= settings.password_hash_max_pending:
+        raise HashingBusyError("Too many password hashes queued")
+
+    _pending_hashes += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _pending_hashes -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """Generate password hash on the hashing pool"""
+    return await _run_hashing(hashing.hash_password, password, settings.bcrypt_rounds)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password on the hashing pool.
+
+    Returns (valid, new_hash), where new_hash is set when the stored hash
+    was made with a different bcrypt cost and should be replaced.
+    """
+    return await _run_hashing(
+        hashing.verify_and_update, plain_password, hashed_password, settings.bcrypt_rounds
+    )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -25,7 +90,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
-    
+
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
@@ -37,4 +102,4 @@ def verify_token(token: str) -> Optional[dict]:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
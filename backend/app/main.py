@@ -1,25 +1,59 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
-from .core.database import engine, Base
+from .core.metrics import MetricsMiddleware, render_metrics
+from .core.profiler import QueryProfilerMiddleware
+from .core.security import shutdown_hash_executor
+from .services.ai_jobs import job_pool
+from .services.gemini import gemini_configured
 from .auth.routes import router as auth_router
 from .routes.transactions import router as transactions_router
 from .routes.budgets import router as budgets_router
 from .routes.ai import router as ai_router
+from .routes.internal import check_internal_token, router as internal_router
 
 # Import all models to ensure they're registered
 from .models.user import User
 from .models.transaction import Transaction
 from .models.budget import Budget
+from .models.rollup import UserMonthlyRollup, UserDailySum
+from .models.ai_job import AIJob
+from .models.data_version import UserDataVersion
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background worker pools, and stop them on shutdown.
+
+    Importing the app touches neither the database nor the Gemini SDK: the
+    schema is managed with `python -m app.commands.migrate` (or here, with
+    MIGRATE_ON_STARTUP), and the Gemini client is created by the first AI
+    request or job.
+    """
+    if settings.migrate_on_startup:
+        # Alembic is only imported when migrations are run
+        from .core.migrations import upgrade_database
+        await run_in_threadpool(upgrade_database)
+    if gemini_configured():
+        await job_pool.start()
+    try:
+        yield
+    finally:
+        await job_pool.stop()
+        shutdown_hash_executor()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Finance Tracker API",
     description="A personal finance management API with AI assistant",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -31,11 +65,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record per-route latency, status codes and SQL counts
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# Profile each request's statements (development only)
+if settings.query_profiler_enabled:
+    print("⚠️  WARNING: Query profiler enabled; do not use in production")
+    app.add_middleware(QueryProfilerMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(transactions_router)
 app.include_router(budgets_router)
 app.include_router(ai_router)
+app.include_router(internal_router)
 
 
 @app.get("/")
@@ -47,4 +91,21 @@ def read_root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(
+    x_internal_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None)
+):
+    """Metrics of this worker process in the Prometheus text format.
+
+    Guarded by INTERNAL_TOKEN like the /internal endpoints, unless
+    METRICS_PUBLIC is set.
+    """
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not settings.metrics_public:
+        check_internal_token(x_internal_token, authorization)
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
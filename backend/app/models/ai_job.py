@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Index
+from sqlalchemy.sql import func
+import enum
+from ..core.database import Base
+
+
+class AIJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class AIJob(Base):
+    """A queued AI request, run in the background by the job worker pool"""
+    __tablename__ = "ai_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    query = Column(Text, nullable=False)
+    priority = Column(Integer, nullable=False, default=0)
+    status = Column(Enum(AIJobStatus), nullable=False, default=AIJobStatus.QUEUED)
+    result = Column(Text)
+    error = Column(String(500))
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    
+    # Indexes for recovering unfinished jobs and listing a user's jobs
+    __table_args__ = (
+        Index("ix_ai_jobs_status_created", "status", "created_at"),
+        Index("ix_ai_jobs_user_created", "user_id", "created_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -24,4 +24,9 @@ class Budget(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationship
-    user = relationship("User", backref="budgets")
\ No newline at end of file
+    user = relationship("User", backref="budgets")
+    
+    # Composite index for the per-user budget queries
+    __table_args__ = (
+        Index("ix_budgets_user_category_start", "user_id", "category", "start_date"),
+    )
\ No newline at end of file
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from ..core.database import Base
+
+
+class UserDataVersion(Base):
+    """Counter bumped by every change to a user's transactions or budgets"""
+    __tablename__ = "user_data_versions"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
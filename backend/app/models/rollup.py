@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Double, Date, Enum, ForeignKey
+from ..core.database import Base
+from .transaction import TransactionType, TransactionCategory
+
+
+class UserMonthlyRollup(Base):
+    """Per-user monthly totals, maintained alongside the transactions table"""
+    __tablename__ = "user_monthly_rollups"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(Integer, primary_key=True)  # YYYYMM
+    type = Column(Enum(TransactionType), primary_key=True)
+    category = Column(Enum(TransactionCategory), primary_key=True)
+    total = Column(Double, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class UserDailySum(Base):
+    """Per-user running totals up to and including each day with activity"""
+    __tablename__ = "user_daily_sums"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    type = Column(Enum(TransactionType), primary_key=True)
+    category = Column(Enum(TransactionCategory), primary_key=True)
+    day = Column(Date, primary_key=True)
+    cum_total = Column(Double, nullable=False, default=0)
+    cum_count = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -43,4 +43,11 @@ class Transaction(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationship
-    user = relationship("User", backref="transactions")
\ No newline at end of file
+    user = relationship("User", backref="transactions")
+    
+    # Composite indexes for the per-user listing, stats and budget queries
+    __table_args__ = (
+        Index("ix_transactions_user_date", "user_id", "date"),
+        Index("ix_transactions_user_type_date", "user_id", "type", "date"),
+        Index("ix_transactions_user_type_category_date", "user_id", "type", "category", "date", "amount"),
+    )
\ No newline at end of file
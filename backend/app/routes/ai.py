@@ -1,222 +1,256 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import time
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from ..core.database import get_db
+from typing import Optional
+from ..core.cache import SingleFlight, TTLCache
+from ..core.database import AsyncDB, get_async_db
 from ..core.config import settings
 from ..auth.dependencies import get_current_active_user
 from ..models.user import User
-from ..models.transaction import Transaction, TransactionType
-from ..schemas.ai import AIQuery, AIResponse
-import os
+from ..models.ai_job import AIJob
+from ..schemas.ai import AIQuery, AIResponse, AIJobCreate, AIJobResponse
+from ..services.ai_jobs import JobQueueFullError, create_job, job_pool
+from ..services.financial_context import FinancialSnapshot, get_financial_snapshot
+from ..services.gemini import AIServiceError, GeminiService, classify_error, get_gemini_service
+from ..services.prompts import ADVISOR_INSTRUCTION, advice_contents
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
-# Try to import and configure Gemini API
-try:
-    from google import genai
-    from google.genai import types
+# Generated advice by (user, normalized question, financial snapshot), stored
+# together with how long Gemini took to produce it. Snapshots are rebuilt when
+# the user's data changes, so advice based on outdated figures stops matching.
+advice_cache = TTLCache(settings.ai_cache_max_entries, settings.ai_cache_ttl_seconds)
+advice_calls = SingleFlight()
+saved_latency_seconds = 0.0
+
+
+def _normalize_query(query: str) -> str:
+    """Fold case, whitespace and trailing punctuation so near-identical questions match"""
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+
+def advice_cache_stats() -> dict:
+    """Counters for monitoring the advice cache"""
+    return {
+        **advice_cache.stats(),
+        "in_flight": len(advice_calls),
+        "coalesced": advice_calls.coalesced,
+        "saved_latency_seconds": round(saved_latency_seconds, 3)
+    }
+
+
+def _advice_key(user_id: int, query: str, snapshot: FinancialSnapshot) -> tuple:
+    return (user_id, _normalize_query(query), snapshot)
+
+
+def _cached_advice(key: tuple) -> Optional[str]:
+    """Get cached advice, counting the Gemini time it saved"""
+    global saved_latency_seconds
+    cached = advice_cache.get(key)
+    if cached is None:
+        return None
+    response_text, latency = cached
+    saved_latency_seconds += latency
+    return response_text
+
+
+async def _generate_advice(gemini: GeminiService, key: tuple, snapshot: FinancialSnapshot, query: str) -> str:
+    """Ask Gemini and cache the answer"""
+    started = time.perf_counter()
+    response_text = await gemini.generate(ADVISOR_INSTRUCTION, advice_contents(snapshot, query))
     
-    # Set API key as environment variable
-    os.environ['GOOGLE_API_KEY'] = settings.gemini_api_key
+    if not response_text:
+        raise Exception("Empty response from AI service")
     
-    # Create client
-    client = genai.Client(api_key=settings.gemini_api_key)
-    GEMINI_AVAILABLE = True
-    print("✅ Gemini AI configured successfully!")
-except ImportError:
-    GEMINI_AVAILABLE = False
-    client = None
-    print("⚠️  WARNING: google-genai package not installed!")
-    print("   Run: pip install google-genai")
-except Exception as e:
-    GEMINI_AVAILABLE = False
-    client = None
-    print(f"⚠️  WARNING: Error configuring Gemini API: {e}")
+    advice_cache.set(key, (response_text, time.perf_counter() - started))
+    return response_text
+
+
+def _ai_http_error(error: Exception) -> HTTPException:
+    """Translate an AI service failure into an HTTP error"""
+    error = classify_error(error)
+    # Timeouts, busy slots and the open breaker are expected; log upstream failures
+    if type(error) is AIServiceError and error.status_code >= 500:
+        # Log the full error for debugging
+        print(f"❌ Gemini API Error: {error}")
+    return HTTPException(status_code=error.status_code, detail=str(error), headers=error.headers)
+
+
+# Keep proxies from buffering or caching event streams
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+AI_NOT_CONFIGURED = "AI service is not configured: set GEMINI_API_KEY to enable it"
+
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events message"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+def _require_gemini(gemini: Optional[GeminiService]) -> GeminiService:
+    """Fail with a 503 when Gemini is not configured"""
+    if gemini is None:
+        raise HTTPException(
+            status_code=503,
+            detail=AI_NOT_CONFIGURED
+        )
+    return gemini
 
 
 @router.post("/assistant", response_model=AIResponse)
 async def get_ai_advice(
     query: AIQuery,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    gemini: Optional[GeminiService] = Depends(get_gemini_service)
 ):
-    """Get AI-powered financial advice using Gemini"""
-    
-    # Check if Gemini is available
-    if not GEMINI_AVAILABLE:
-        raise HTTPException(
-            status_code=503,
-            detail="AI service is not available. Please install google-generativeai package: pip install google-generativeai"
-        )
+    """Get AI-powered financial advice using Gemini.
+
+    The Gemini call goes through the SDK's async client and the database
+    work runs in the threadpool, so a slow completion never blocks the
+    event loop. Answers are cached per question and financial summary, and
+    identical questions asked at the same time share one Gemini call.
+    """
+    gemini = _require_gemini(gemini)
     
     try:
         # Get user's financial context
-        total_income = db.query(func.coalesce(func.sum(Transaction.amount), 0)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == TransactionType.INCOME
-        ).scalar()
+        snapshot = await db.run(get_financial_snapshot, current_user.id)
+        key = _advice_key(current_user.id, query.query, snapshot)
         
-        total_expense = db.query(func.coalesce(func.sum(Transaction.amount), 0)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == TransactionType.EXPENSE
-        ).scalar()
+        response_text = _cached_advice(key)
+        if response_text is None:
+            response_text = await advice_calls.do(
+                key, lambda: _generate_advice(gemini, key, snapshot, query.query)
+            )
         
-        balance = float(total_income or 0) - float(total_expense or 0)
+        return {
+            "query": query.query,
+            "response": response_text
+        }
         
-        # Create context for AI
-        context = f"""You are a professional financial advisor assistant. The user is a software engineer using a finance tracking app.
+    except Exception as e:
+        raise _ai_http_error(e)
 
-User's Financial Summary:
-- Total Income: ${float(total_income or 0):.2f}
-- Total Expenses: ${float(total_expense or 0):.2f}
-- Current Balance: ${balance:.2f}
 
-User's Question: {query.query}
+@router.post("/assistant/stream")
+async def stream_ai_advice(
+    query: AIQuery,
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    gemini: Optional[GeminiService] = Depends(get_gemini_service)
+):
+    """Stream AI-powered financial advice as Server-Sent Events.
 
-Please provide helpful, actionable financial advice. Be concise, professional, and encouraging.
-Focus on practical tips for software engineers regarding budgeting, saving, and investing.
-Keep your response under 200 words."""
-        
-        # Call Gemini API using the new google-genai package
-        from google.genai import types
-        
-        # Create system instruction for the financial advisor
-        system_instruction = f"""You are an expert AI financial advisor exclusively for FinanceTracker, a personal finance management application.
-
-STRICT GUIDELINES - YOU MUST FOLLOW THESE:
-
-1. **ONLY Answer Finance-Related Questions**:
-   - Personal finance, budgeting, saving, investing, debt management
-   - Income management, expense tracking, financial planning
-   - Retirement planning, emergency funds, financial goals
-   - Tax strategies, insurance, wealth building
-   
-2. **REJECT Non-Finance Questions**:
-   - If asked about anything NOT related to personal finance, politely decline
-   - Response format: "I'm a financial advisor for FinanceTracker. I can only help with personal finance questions like budgeting, saving, investing, and money management. Please ask me about your finances!"
-   - Do NOT answer questions about: coding, general knowledge, entertainment, sports, politics, health (unless financial health), etc.
-
-3. **Your Capabilities**:
-   - Analyze user's financial data and provide personalized advice
-   - Suggest budgeting strategies (50/30/20 rule, zero-based budgeting)
-   - Recommend savings and investment approaches
-   - Help with debt reduction strategies
-   - Provide tips for expense reduction and income optimization
-   - Guide on emergency fund creation
-   - Advise on financial goal setting
-
-4. **User's Current Financial Status** (in Indian Rupees):
-   - Total Income: ₹{float(total_income or 0):.2f}
-   - Total Expenses: ₹{float(total_expense or 0):.2f}
-   - Current Balance: ₹{balance:.2f}
-
-5. **Response Style - IMPORTANT**:
-   - Write like a friendly human advisor, NOT like an AI
-   - Use conversational, natural language
-   - Avoid robotic phrases like "I'd be happy to help", "Here's what I suggest", "Let me break this down"
-   - Write in flowing paragraphs like you're chatting with a friend
-   - Use casual transitions: "So", "Well", "Actually", "You know what"
-   - Be warm and relatable, not formal
-   - Keep responses under 250 words
-   - Use emojis sparingly (1-2 max) and naturally
-   - Reference their actual numbers when relevant
-   - Avoid corporate jargon
-   - Don't start with greetings or end with "Hope this helps!"
-   - Just dive straight into the advice
-   
-   **Formatting Rules**:
-   - Use **bold** only for emphasis on key numbers or important terms (sparingly)
-   - Avoid using bullet points (•) or numbered lists (1. 2. 3.)
-   - Write in natural paragraphs instead
-   - Don't use headers (# ## ###)
-   - Keep it conversational and flowing
-
-6. **Examples of VALID Questions**:
-   - "How can I save 20% of my salary?"
-   - "What's a good monthly budget for groceries in India?"
-   - "Should I invest in stocks or mutual funds?"
-   - "How do I reduce my expenses?"
-   - "What's the best way to build an emergency fund?"
-   - "How much should I save for retirement?"
-
-**Important**: All amounts are in Indian Rupees (₹). Provide advice relevant to Indian financial context.
-
-7. **Examples of INVALID Questions** (Politely Decline):
-   - "What's the weather today?"
-   - "Write me a Python script"
-   - "Who won the game yesterday?"
-   - "Tell me a joke"
-   - "What's the capital of France?"
-
-8. **Tone Examples**:
-
-❌ BAD (Too AI-like):
-"I'd be happy to help you with your savings goal! Here are some strategies:
-1. First, create a budget
-2. Then, automate your savings
-3. Finally, track your progress
-I hope this helps! Let me know if you have any questions."
-
-✅ GOOD (Natural & Human):
-"So you want to save more? Looking at your current balance of ₹X, here's what I'd do. Start by setting aside 20% of your income right when you get paid - treat it like a bill you can't skip. The rest is yours to spend guilt-free. Most people try to save what's left at the end of the month, but that never works. Pay yourself first, always."
-
-Remember: You are ONLY a financial advisor. Stay focused on personal finance topics. Write like a real person having a conversation, not like a chatbot."""
-
-        # Generate response using the new API
-        response = client.models.generate_content(
-            model="gemini-2.0-flash-exp",
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                temperature=0.7,
-                max_output_tokens=500,
-            ),
-            contents=query.query
-        )
-        
-        # Extract response text
-        response_text = response.text if hasattr(response, 'text') else str(response)
+    Each text chunk is sent as a `data: {"text": ...}` message as soon as
+    Gemini produces it, followed by a `done` event. Failures before the
+    first chunk are returned as regular HTTP errors; later ones are sent as
+    an `error` event. When the client disconnects the upstream stream is
+    closed, so no more tokens are generated for it. Cached advice is sent
+    as a single chunk, and completed streams are added to the cache.
+    """
+    gemini = _require_gemini(gemini)
+    
+    try:
+        # Get user's financial context
+        snapshot = await db.run(get_financial_snapshot, current_user.id)
+        key = _advice_key(current_user.id, query.query, snapshot)
         
-        if not response_text:
-            raise Exception("Empty response from AI service")
+        cached = _cached_advice(key)
+        if cached is not None:
+            return StreamingResponse(
+                iter([_sse({"text": cached}), _sse({}, event="done")]),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS
+            )
         
-        return {
-            "query": query.query,
-            "response": response_text
-        }
+        started = time.perf_counter()
+        chunks = gemini.stream(ADVISOR_INSTRUCTION, advice_contents(snapshot, query.query))
         
-    except ImportError:
+        # Wait for the first chunk so that busy, timeout and API errors
+        # still get a proper status code
+        try:
+            first_chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            first_chunk = None
+    except Exception as e:
+        raise _ai_http_error(e)
+    
+    async def events():
+        try:
+            response_text = ""
+            if first_chunk is not None:
+                response_text = first_chunk
+                yield _sse({"text": first_chunk})
+                async for text in chunks:
+                    response_text += text
+                    yield _sse({"text": text})
+            if response_text:
+                advice_cache.set(key, (response_text, time.perf_counter() - started))
+            yield _sse({}, event="done")
+        except Exception as e:
+            error = _ai_http_error(e)
+            yield _sse({"status": error.status_code, "detail": error.detail}, event="error")
+        finally:
+            # Runs on client disconnect too; shielded so the upstream
+            # stream is closed even while the response is being cancelled
+            with anyio.CancelScope(shield=True):
+                await chunks.aclose()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@router.post("/jobs", response_model=AIJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_ai_job(
+    job_in: AIJobCreate,
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Queue an AI request and return the job right away.
+
+    Poll GET /ai/jobs/{job_id} for the result. Jobs are stored in the
+    database, so queued jobs survive a restart.
+    """
+    if not job_pool.running:
         raise HTTPException(
             status_code=503,
-            detail="Google Generative AI package not installed. Run: pip install --upgrade google-generativeai"
+            detail=AI_NOT_CONFIGURED
         )
-    except Exception as e:
-        error_message = str(e)
-        
-        # Provide specific error messages
-        if "API_KEY_INVALID" in error_message or "API key not valid" in error_message:
-            raise HTTPException(
-                status_code=401,
-                detail="Invalid Gemini API key. Get a new key from: https://makersuite.google.com/app/apikey"
-            )
-        elif "404" in error_message or "not found" in error_message.lower():
-            raise HTTPException(
-                status_code=503,
-                detail="Gemini model not available. Try upgrading: pip install --upgrade google-generativeai"
-            )
-        elif "PERMISSION_DENIED" in error_message:
-            raise HTTPException(
-                status_code=403,
-                detail="API key doesn't have permission. Enable Gemini API in Google Cloud Console"
-            )
-        elif "RESOURCE_EXHAUSTED" in error_message or "quota" in error_message.lower():
-            raise HTTPException(
-                status_code=429,
-                detail="API quota exceeded. Please try again later or upgrade your plan"
-            )
-        else:
-            # Log the full error for debugging
-            print(f"❌ Gemini API Error: {error_message}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"AI service error: {error_message}"
-            )
\ No newline at end of file
+    
+    try:
+        job_pool.check_capacity(current_user.id)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    job = await db.run(create_job, current_user.id, job_in.query, job_in.priority)
+    await job_pool.submit(job)
+    return job
+
+
+def _get_user_job(db: Session, job_id: int, user_id: int) -> Optional[AIJob]:
+    return db.query(AIJob).filter(
+        AIJob.id == job_id,
+        AIJob.user_id == user_id
+    ).first()
+
+
+@router.get("/jobs/{job_id}", response_model=AIJobResponse)
+async def get_ai_job(
+    job_id: int,
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the status and result of an AI job"""
+    job = await db.run(_get_user_job, job_id, current_user.id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="AI job not found")
+    
+    return job
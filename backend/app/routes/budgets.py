@@ -1,149 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from typing import List
-from ..core.database import get_db
+from typing import List, Optional
+from ..core.database import AsyncDB, get_async_db
 from ..auth.dependencies import get_current_active_user
 from ..models.user import User
 from ..models.budget import Budget
-from ..models.transaction import Transaction, TransactionType
-from ..schemas.budget import BudgetCreate, BudgetUpdate, BudgetResponse, BudgetWithSpending
+from ..schemas.budget import BudgetCreate, BudgetUpdate, BudgetResponse, BudgetWithSpending, budgets_with_spending_adapter
+from ..services.budget_spending import get_budgets_with_spending
+from ..services.data_version import bump_data_version, conditional_get
 
 router = APIRouter(prefix="/budgets", tags=["budgets"])
 
 
+def _get_user_budget(db: Session, budget_id: int, user_id: int) -> Optional[Budget]:
+    return db.query(Budget).filter(
+        Budget.id == budget_id,
+        Budget.user_id == user_id
+    ).first()
+
+
+def _add_budget(db: Session, db_budget: Budget) -> Budget:
+    db.add(db_budget)
+    bump_data_version(db, db_budget.user_id)
+    db.commit()
+    db.refresh(db_budget)
+    return db_budget
+
+
+def _update_budget(db: Session, budget_id: int, user_id: int, update_data: dict) -> Optional[Budget]:
+    db_budget = _get_user_budget(db, budget_id, user_id)
+    if not db_budget:
+        return None
+    
+    # Update fields
+    for field, value in update_data.items():
+        setattr(db_budget, field, value)
+    
+    bump_data_version(db, user_id)
+    db.commit()
+    db.refresh(db_budget)
+    return db_budget
+
+
+def _delete_budget(db: Session, budget_id: int, user_id: int) -> bool:
+    db_budget = _get_user_budget(db, budget_id, user_id)
+    if not db_budget:
+        return False
+    
+    db.delete(db_budget)
+    bump_data_version(db, user_id)
+    db.commit()
+    return True
+
+
 @router.post("", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
-def create_budget(
+async def create_budget(
     budget: BudgetCreate,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new budget"""
     db_budget = Budget(
-        **budget.dict(),
+        **budget.model_dump(),
         user_id=current_user.id
     )
-    db.add(db_budget)
-    db.commit()
-    db.refresh(db_budget)
-    return db_budget
+    return await db.run(_add_budget, db_budget)
 
 
 @router.get("", response_model=List[BudgetWithSpending])
-def get_budgets(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+async def get_budgets(
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    cache_headers: dict = Depends(conditional_get)
 ):
     """Get all budgets for current user with spending info"""
-    budgets = db.query(Budget).filter(Budget.user_id == current_user.id).all()
-    
-    result = []
-    for budget in budgets:
-        # Calculate spending for this budget period and category
-        spent = db.query(func.coalesce(func.sum(Transaction.amount), 0)).filter(
-            and_(
-                Transaction.user_id == current_user.id,
-                Transaction.type == TransactionType.EXPENSE,
-                Transaction.category == budget.category,
-                Transaction.date >= budget.start_date,
-                Transaction.date <= budget.end_date
-            )
-        ).scalar()
-        
-        spent = float(spent)
-        remaining = budget.amount - spent
-        percentage = (spent / budget.amount * 100) if budget.amount > 0 else 0
-        
-        budget_dict = {
-            **budget.__dict__,
-            "spent": spent,
-            "remaining": remaining,
-            "percentage_used": round(percentage, 2)
-        }
-        result.append(budget_dict)
-    
-    return result
+    budgets = await db.run(get_budgets_with_spending, current_user.id)
+    # response_model still documents the shape; the rows are serialized directly
+    return Response(
+        budgets_with_spending_adapter.dump_json(budgets), media_type="application/json", headers=cache_headers
+    )
 
 
-@router.get("/{budget_id}", response_model=BudgetWithSpending)
-def get_budget(
+@router.get("/{budget_id}", response_model=BudgetWithSpending, dependencies=[Depends(conditional_get)])
+async def get_budget(
     budget_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get a specific budget with spending info"""
-    budget = db.query(Budget).filter(
-        Budget.id == budget_id,
-        Budget.user_id == current_user.id
-    ).first()
+    budgets = await db.run(get_budgets_with_spending, current_user.id, budget_id=budget_id)
     
-    if not budget:
+    if not budgets:
         raise HTTPException(status_code=404, detail="Budget not found")
     
-    # Calculate spending
-    spent = db.query(func.coalesce(func.sum(Transaction.amount), 0)).filter(
-        and_(
-            Transaction.user_id == current_user.id,
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.category == budget.category,
-            Transaction.date >= budget.start_date,
-            Transaction.date <= budget.end_date
-        )
-    ).scalar()
-    
-    spent = float(spent)
-    remaining = budget.amount - spent
-    percentage = (spent / budget.amount * 100) if budget.amount > 0 else 0
-    
-    return {
-        **budget.__dict__,
-        "spent": spent,
-        "remaining": remaining,
-        "percentage_used": round(percentage, 2)
-    }
+    return budgets[0]
 
 
 @router.put("/{budget_id}", response_model=BudgetResponse)
-def update_budget(
+async def update_budget(
     budget_id: int,
     budget_update: BudgetUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update a budget"""
-    db_budget = db.query(Budget).filter(
-        Budget.id == budget_id,
-        Budget.user_id == current_user.id
-    ).first()
+    db_budget = await db.run(_update_budget, budget_id, current_user.id, budget_update.model_dump(exclude_unset=True))
     
     if not db_budget:
         raise HTTPException(status_code=404, detail="Budget not found")
     
-    # Update fields
-    update_data = budget_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_budget, field, value)
-    
-    db.commit()
-    db.refresh(db_budget)
     return db_budget
 
 
 @router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_budget(
+async def delete_budget(
     budget_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Delete a budget"""
-    db_budget = db.query(Budget).filter(
-        Budget.id == budget_id,
-        Budget.user_id == current_user.id
-    ).first()
-    
-    if not db_budget:
+    if not await db.run(_delete_budget, budget_id, current_user.id):
         raise HTTPException(status_code=404, detail="Budget not found")
     
-    db.delete(db_budget)
-    db.commit()
-    return None
\ No newline at end of file
+    return None
@@ -0,0 +1,78 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from ..auth.dependencies import token_cache, user_cache
+from ..core.config import settings
+from ..core.database import async_engine, engine
+from ..core.pool import pool_stats
+from ..core.profiler import recent_profiles
+from ..services.ai_jobs import job_pool
+from ..services.gemini import current_gemini_service, gemini_configured
+from .ai import advice_cache_stats
+
+
+def check_internal_token(x_internal_token: Optional[str], authorization: Optional[str] = None) -> None:
+    """Answer 404 unless INTERNAL_TOKEN is set, and 403 unless the request carries it.
+
+    The token goes in X-Internal-Token, or as a bearer token for scrapers
+    such as Prometheus that only send an Authorization header.
+    """
+    if not settings.internal_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = x_internal_token
+    if token is None and authorization and authorization[:7].lower() == "bearer ":
+        token = authorization[7:]
+    if token is None or not hmac.compare_digest(token.encode(), settings.internal_token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid internal token")
+
+
+def require_internal_token(
+    x_internal_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None)
+) -> None:
+    """Hide these endpoints unless INTERNAL_TOKEN is set, and require it"""
+    check_internal_token(x_internal_token, authorization)
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    dependencies=[Depends(require_internal_token)]
+)
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """Get hit/miss counters of the in-process caches"""
+    return {
+        "auth_tokens": token_cache.stats(),
+        "auth_users": user_cache.stats(),
+        "ai_advice": advice_cache_stats()
+    }
+
+
+@router.get("/queries")
+def get_query_profiles():
+    """Get the statement profiles of this worker's most recent requests, newest first"""
+    if not settings.query_profiler_enabled:
+        return {"enabled": False}
+    return {"enabled": True, "requests": list(reversed(recent_profiles))}
+
+
+@router.get("/ai")
+def get_ai_stats():
+    """Get the state of the Gemini circuit breaker, retry budget and job workers"""
+    # Reported without creating the client: it only exists after the first AI request
+    gemini = current_gemini_service()
+    if gemini is None:
+        return {"available": gemini_configured(), "jobs": job_pool.stats()}
+    return {**gemini.stats(), "jobs": job_pool.stats()}
+
+
+@router.get("/pool")
+def get_pool_stats():
+    """Get the state of the database connection pools of this worker"""
+    stats = {"sync": pool_stats(engine)}
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine.sync_engine)
+    return stats
@@ -1,103 +1,186 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Response, status, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
-from ..core.database import get_db
+from ..core.database import AsyncDB, get_async_db
+from ..core.pagination import decode_cursor
 from ..auth.dependencies import get_current_active_user
 from ..models.user import User
 from ..models.transaction import Transaction, TransactionType
-from ..schemas.transaction import TransactionCreate, TransactionUpdate, TransactionResponse, TransactionStats
+from ..schemas.transaction import (
+    TransactionCreate, TransactionUpdate, TransactionResponse, TransactionPage, TransactionStats,
+    TransactionImportResult, TransactionBatch, TransactionBatchResult,
+    transaction_rows_adapter, transaction_page_adapter
+)
+from ..services.transaction_list import list_transactions
+from ..services.transaction_stats import compute_transaction_stats
+from ..services.data_version import bump_data_version, conditional_get
+from ..services.rollups import apply_transaction_change, snapshot
+from ..services.transaction_batch import apply_transaction_batch
+from ..services.transaction_export import MEDIA_TYPES, export_transactions
+from ..services.transaction_import import import_format, import_transactions
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
+# Largest page GET /transactions returns; larger limits are lowered to it
+MAX_PAGE_SIZE = 1000
+
+
+def _get_user_transaction(db: Session, transaction_id: int, user_id: int) -> Optional[Transaction]:
+    return db.query(Transaction).filter(
+        Transaction.id == transaction_id,
+        Transaction.user_id == user_id
+    ).first()
+
+
+def _add_transaction(db: Session, db_transaction: Transaction) -> Transaction:
+    db.add(db_transaction)
+    apply_transaction_change(db, None, snapshot(db_transaction))
+    bump_data_version(db, db_transaction.user_id)
+    db.commit()
+    db.refresh(db_transaction)
+    return db_transaction
+
 
 @router.post("", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
-def create_transaction(
+async def create_transaction(
     transaction: TransactionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new transaction"""
     db_transaction = Transaction(
-        **transaction.dict(),
+        **transaction.model_dump(),
         user_id=current_user.id
     )
-    db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
-    return db_transaction
+    return await db.run(_add_transaction, db_transaction)
+
+
+@router.post("/batch", response_model=TransactionBatchResult)
+async def batch_transactions(
+    batch: TransactionBatch,
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create, update and delete many transactions in one request.
 
+    Everything is applied in one DB transaction with bulk statements.
+    Operations on transactions that do not exist or belong to someone else
+    fail individually with status 404; each result carries the status the
+    single-row endpoint would have returned.
+    """
+    results = await db.run(apply_transaction_batch, current_user.id, batch.operations)
+    return {"results": results}
 
-@router.get("", response_model=List[TransactionResponse])
-def get_transactions(
-    skip: int = 0,
+
+@router.post("/import", response_model=TransactionImportResult)
+async def import_transactions_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Import transactions from a CSV, OFX or QIF bank export.
+
+    The format comes from ``format`` or the file extension. The file is
+    parsed as a stream and stored in large batches; rows that fail
+    validation are skipped and listed in ``errors`` by their position among
+    the file's transactions (starting at 1).
+    """
+    file_format = import_format(format, file.filename)
+    if file_format is None:
+        raise HTTPException(status_code=400, detail="Unsupported import format. Use csv, ofx or qif")
+    
+    # Parsing and bulk inserts run on their own session in the threadpool,
+    # so a large import does not block the event loop
+    return await run_in_threadpool(import_transactions, current_user.id, file.file, file_format)
+
+
+@router.get("", response_model=Union[TransactionPage, List[TransactionResponse]])
+async def get_transactions(
+    skip: int = Query(0, ge=0),
     limit: int = 100,
+    cursor: Optional[str] = None,
     type: Optional[TransactionType] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    cache_headers: dict = Depends(conditional_get)
 ):
-    """Get all transactions for current user with optional filters"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    """Get all transactions for current user with optional filters.
+
+    Without a cursor the endpoint pages with skip/limit and returns a plain
+    list. Passing ``cursor`` (empty for the first page) switches to keyset
+    pagination: the response is a page with ``next_cursor``, and each page
+    seeks straight past the last (date, id) seen instead of skipping rows.
+    Limits above MAX_PAGE_SIZE are lowered to it; a cursor page needs a
+    limit of at least 1.
+    """
+    if cursor is not None and limit < 1:
+        raise HTTPException(status_code=422, detail="limit must be at least 1")
+    # Capped rather than rejected, so existing skip/limit clients keep working
+    limit = max(0, min(limit, MAX_PAGE_SIZE))
     
-    if type:
-        query = query.filter(Transaction.type == type)
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    transactions = query.order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
-    return transactions
+    result = await db.run(
+        list_transactions, current_user.id, skip, limit, cursor is not None, after, type, start_date, end_date
+    )
+    # response_model still documents the shape; the rows are serialized directly
+    adapter = transaction_rows_adapter if cursor is None else transaction_page_adapter
+    return Response(adapter.dump_json(result), media_type="application/json", headers=cache_headers)
 
 
-@router.get("/stats", response_model=TransactionStats)
-def get_transaction_stats(
+@router.get("/stats", response_model=TransactionStats, dependencies=[Depends(conditional_get)])
+async def get_transaction_stats(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get transaction statistics"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
-    
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    
-    # Calculate totals
-    income = query.filter(Transaction.type == TransactionType.INCOME).with_entities(
-        func.coalesce(func.sum(Transaction.amount), 0)
-    ).scalar()
-    
-    expense = query.filter(Transaction.type == TransactionType.EXPENSE).with_entities(
-        func.coalesce(func.sum(Transaction.amount), 0)
-    ).scalar()
-    
-    count = query.count()
+    """Get transaction statistics with per-category totals"""
+    return await db.run(compute_transaction_stats, current_user.id, start_date, end_date)
+
+
+@router.get("/export")
+async def export_transactions_file(
+    format: str = "csv",
+    type: Optional[TransactionType] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Download all matching transactions as CSV or NDJSON, oldest first.
+
+    The response is streamed from a server-side cursor, so the full history
+    can be exported in one request without loading it into memory.
+    """
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported export format. Use csv or ndjson")
     
-    return {
-        "total_income": float(income),
-        "total_expense": float(expense),
-        "balance": float(income - expense),
-        "transaction_count": count
-    }
+    # A sync generator: Starlette pulls each chunk in the threadpool
+    return StreamingResponse(
+        export_transactions(current_user.id, format, type, start_date, end_date),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'}
+    )
 
 
-@router.get("/{transaction_id}", response_model=TransactionResponse)
-def get_transaction(
+@router.get("/{transaction_id}", response_model=TransactionResponse, dependencies=[Depends(conditional_get)])
+async def get_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get a specific transaction"""
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
+    transaction = await db.run(_get_user_transaction, transaction_id, current_user.id)
     
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -105,47 +188,61 @@ def get_transaction(
     return transaction
 
 
+def _update_transaction(db: Session, transaction_id: int, user_id: int, update_data: dict) -> Optional[Transaction]:
+    db_transaction = _get_user_transaction(db, transaction_id, user_id)
+    if not db_transaction:
+        return None
+    
+    # Update fields
+    before = snapshot(db_transaction)
+    for field, value in update_data.items():
+        setattr(db_transaction, field, value)
+    
+    apply_transaction_change(db, before, snapshot(db_transaction))
+    bump_data_version(db, user_id)
+    db.commit()
+    db.refresh(db_transaction)
+    return db_transaction
+
+
 @router.put("/{transaction_id}", response_model=TransactionResponse)
-def update_transaction(
+async def update_transaction(
     transaction_id: int,
     transaction_update: TransactionUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update a transaction"""
-    db_transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
+    db_transaction = await db.run(
+        _update_transaction, transaction_id, current_user.id, transaction_update.model_dump(exclude_unset=True)
+    )
     
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
-    # Update fields
-    update_data = transaction_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_transaction, field, value)
+    return db_transaction
+
+
+def _delete_transaction(db: Session, transaction_id: int, user_id: int) -> bool:
+    db_transaction = _get_user_transaction(db, transaction_id, user_id)
+    if not db_transaction:
+        return False
     
+    apply_transaction_change(db, snapshot(db_transaction), None)
+    db.delete(db_transaction)
+    bump_data_version(db, user_id)
     db.commit()
-    db.refresh(db_transaction)
-    return db_transaction
+    return True
 
 
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_transaction(
+async def delete_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Delete a transaction"""
-    db_transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
-    
-    if not db_transaction:
+    if not await db.run(_delete_transaction, transaction_id, current_user.id):
         raise HTTPException(status_code=404, detail="Transaction not found")
     
-    db.delete(db_transaction)
-    db.commit()
     return None
\ No newline at end of file
@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ConfigDict
+from datetime import datetime
+from typing import Optional
+from ..models.ai_job import AIJobStatus
 
 
 class AIQuery(BaseModel):
@@ -7,4 +10,23 @@ class AIQuery(BaseModel):
 
 class AIResponse(BaseModel):
     response: str
-    query: str
\ No newline at end of file
+    query: str
+
+
+class AIJobCreate(BaseModel):
+    query: str
+    priority: int = Field(0, ge=0, le=9, description="Your jobs with a higher priority run first")
+
+
+class AIJobResponse(BaseModel):
+    id: int
+    query: str
+    priority: int
+    status: AIJobStatus
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    model_config = ConfigDict(from_attributes=True)
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
+from typing import List, Optional
+from typing_extensions import TypedDict  # Pydantic needs this TypedDict before Python 3.12
 from datetime import datetime
 from ..models.budget import BudgetPeriod
 
@@ -30,11 +31,29 @@ class BudgetResponse(BudgetBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BudgetWithSpending(BudgetResponse):
     spent: float
     remaining: float
-    percentage_used: float
\ No newline at end of file
+    percentage_used: float
+
+
+class BudgetWithSpendingRow(TypedDict):
+    """BudgetWithSpending as a plain dict, for budgets read as column tuples"""
+    category: str
+    amount: float
+    period: BudgetPeriod
+    start_date: datetime
+    end_date: datetime
+    id: int
+    user_id: int
+    created_at: datetime
+    updated_at: datetime
+    spent: float
+    remaining: float
+    percentage_used: float
+
+
+budgets_with_spending_adapter = TypeAdapter(List[BudgetWithSpendingRow])
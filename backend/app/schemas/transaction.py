@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
+from typing import List, Literal, Optional, Union
+from typing_extensions import Annotated, TypedDict  # typing.Annotated needs Python 3.9, Pydantic needs this TypedDict before 3.12
 from datetime import datetime
 from ..models.transaction import TransactionType, TransactionCategory
 
@@ -30,12 +31,99 @@ class TransactionResponse(TransactionBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TransactionPage(BaseModel):
+    items: List[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+
+class TransactionRow(TypedDict):
+    """TransactionResponse as a plain dict, for rows read as column tuples"""
+    type: TransactionType
+    category: TransactionCategory
+    amount: float
+    description: Optional[str]
+    date: datetime
+    id: int
+    user_id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class TransactionRowPage(TypedDict):
+    items: List[TransactionRow]
+    next_cursor: Optional[str]
+
+
+# Serialize list results straight to JSON bytes, without building and
+# validating a model instance per row
+transaction_rows_adapter = TypeAdapter(List[TransactionRow])
+transaction_page_adapter = TypeAdapter(TransactionRowPage)
+
+
+# Most operations accepted by one POST /transactions/batch request
+MAX_BATCH_OPERATIONS = 1000
+
+
+class BatchCreate(BaseModel):
+    op: Literal["create"]
+    data: TransactionCreate
+
+
+class BatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: TransactionUpdate
+
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+BatchOperation = Annotated[Union[BatchCreate, BatchUpdate, BatchDelete], Field(discriminator="op")]
+
+
+class TransactionBatch(BaseModel):
+    operations: List[BatchOperation] = Field(min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+
+class BatchOperationResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    id: Optional[int] = None
+    transaction: Optional[TransactionResponse] = None
+    error: Optional[str] = None
+
+
+class TransactionBatchResult(BaseModel):
+    results: List[BatchOperationResult]
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class TransactionImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError] = []
+
+
+class CategoryTotal(BaseModel):
+    type: TransactionType
+    category: TransactionCategory
+    total: float
+    count: int
 
 
 class TransactionStats(BaseModel):
     total_income: float
     total_expense: float
     balance: float
-    transaction_count: int
\ No newline at end of file
+    transaction_count: int
+    category_totals: List[CategoryTotal] = []
\ No newline at end of file
@@ -0,0 +1,268 @@
+import asyncio
+import heapq
+import itertools
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.ai_job import AIJob, AIJobStatus
+from .financial_context import get_financial_snapshot
+from .gemini import AIServiceError, classify_error, get_gemini_service
+from .prompts import ADVISOR_INSTRUCTION, advice_contents
+
+
+class JobQueueFullError(Exception):
+    """Raised when a user already has the maximum number of jobs waiting"""
+
+
+class FairJobQueue:
+    """Job ids taken round-robin between users, each user's by priority.
+
+    Every user with waiting jobs gets a turn before anyone gets a second
+    one, so one user submitting many jobs, even at the highest priority,
+    cannot starve the others. Priority only orders a user's own jobs; jobs
+    of the same priority run in submission order.
+    """
+
+    def __init__(self):
+        # user id -> heap of their waiting (-priority, submission order, job id)
+        self._users: "OrderedDict[int, List[Tuple[int, int, int]]]" = OrderedDict()
+        self._job_ids = set()
+        self._submitted = itertools.count()
+        self._available = asyncio.Condition()
+
+    def pending(self, user_id: int) -> int:
+        """Number of jobs a user has waiting"""
+        return len(self._users.get(user_id, ()))
+
+    async def put(self, job_id: int, user_id: int, priority: int) -> None:
+        """Add a job, unless it is already waiting"""
+        async with self._available:
+            if job_id in self._job_ids:
+                return
+            self._job_ids.add(job_id)
+            heapq.heappush(self._users.setdefault(user_id, []), (-priority, next(self._submitted), job_id))
+            self._available.notify()
+
+    async def get(self) -> Tuple[int, int]:
+        """Wait for the next (job id, user id) to run"""
+        async with self._available:
+            await self._available.wait_for(lambda: bool(self._users))
+
+            user_id, jobs = next(iter(self._users.items()))
+            _, _, job_id = heapq.heappop(jobs)
+            if jobs:
+                # The user goes to the back of the line for their next job
+                self._users.move_to_end(user_id)
+            else:
+                del self._users[user_id]
+            self._job_ids.discard(job_id)
+            return job_id, user_id
+
+    def __len__(self) -> int:
+        return len(self._job_ids)
+
+
+def create_job(db: Session, user_id: int, query: str, priority: int) -> AIJob:
+    """Store a new queued job"""
+    job = AIJob(user_id=user_id, query=query, priority=priority, status=AIJobStatus.QUEUED, attempts=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _claim_job(job_id: int) -> Optional[AIJob]:
+    """Mark a queued job as running, unless another worker got to it first"""
+    db = SessionLocal()
+    try:
+        claimed = db.query(AIJob).filter(
+            AIJob.id == job_id,
+            AIJob.status == AIJobStatus.QUEUED
+        ).update({
+            AIJob.status: AIJobStatus.RUNNING,
+            AIJob.started_at: datetime.utcnow(),
+            AIJob.attempts: AIJob.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+        return db.get(AIJob, job_id) if claimed else None
+    finally:
+        db.close()
+
+
+def _finish_job(job_id: int, status: AIJobStatus, result: Optional[str] = None, error: Optional[str] = None) -> None:
+    db = SessionLocal()
+    try:
+        db.query(AIJob).filter(AIJob.id == job_id).update({
+            AIJob.status: status,
+            AIJob.result: result,
+            AIJob.error: error[:500] if error else None,
+            AIJob.finished_at: datetime.utcnow() if status != AIJobStatus.QUEUED else None
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _release_job(job_id: int) -> None:
+    """Queue a job again without counting the attempt, e.g. when shutting down"""
+    db = SessionLocal()
+    try:
+        db.query(AIJob).filter(AIJob.id == job_id).update({
+            AIJob.status: AIJobStatus.QUEUED,
+            AIJob.attempts: AIJob.attempts - 1
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _get_snapshot(user_id: int):
+    db = SessionLocal()
+    try:
+        return get_financial_snapshot(db, user_id)
+    finally:
+        db.close()
+
+
+def _unfinished_jobs() -> List[Tuple[int, int, int]]:
+    """Requeue jobs left running by a crashed worker and list all queued ones.
+
+    A running job only counts as abandoned once it has been running for
+    well over the job deadline, so jobs of other live workers are left alone.
+    Jobs abandoned ai_job_max_attempts times are failed instead, so a job
+    that crashes its worker is not retried forever.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        abandoned = db.query(AIJob).filter(
+            AIJob.status == AIJobStatus.RUNNING,
+            AIJob.started_at < now - timedelta(seconds=settings.ai_job_timeout_seconds * 2)
+        )
+        abandoned.filter(AIJob.attempts >= settings.ai_job_max_attempts).update({
+            AIJob.status: AIJobStatus.FAILED,
+            AIJob.error: f"Abandoned after {settings.ai_job_max_attempts} attempts",
+            AIJob.finished_at: now
+        }, synchronize_session=False)
+        abandoned.update({AIJob.status: AIJobStatus.QUEUED}, synchronize_session=False)
+        db.commit()
+
+        return db.query(AIJob.id, AIJob.user_id, AIJob.priority).filter(
+            AIJob.status == AIJobStatus.QUEUED
+        ).order_by(AIJob.created_at, AIJob.id).all()
+    finally:
+        db.close()
+
+
+class AIJobWorkerPool:
+    """A fixed number of workers running queued AI jobs on the event loop.
+
+    Jobs are claimed with a conditional UPDATE, so several processes can
+    share the job table. Each process also sweeps the table periodically for
+    queued jobs it does not know about, such as jobs another process queued
+    before it crashed or jobs abandoned mid-run.
+    """
+
+    def __init__(self, workers: int, max_pending_per_user: int):
+        self.workers = workers
+        self.max_pending_per_user = max_pending_per_user
+        self.completed = 0
+        self.failed = 0
+        self._queue: Optional[FairJobQueue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Start the workers and pick up jobs left over from a previous run.
+
+        The Gemini service is only created when the first job runs.
+        """
+        self._queue = FairJobQueue()
+        await self._load_unfinished()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they were running are queued again"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def check_capacity(self, user_id: int) -> None:
+        """Raise JobQueueFullError if the user may not queue another job"""
+        if self._queue.pending(user_id) >= self.max_pending_per_user:
+            raise JobQueueFullError(f"You already have {self.max_pending_per_user} AI jobs waiting")
+
+    async def submit(self, job: AIJob) -> None:
+        """Queue a stored job"""
+        await self._queue.put(job.id, job.user_id, job.priority)
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "workers": self.workers if self.running else 0,
+            "queued": len(self._queue) if self._queue is not None else 0,
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+    async def _load_unfinished(self) -> None:
+        for job_id, user_id, priority in await run_in_threadpool(_unfinished_jobs):
+            await self._queue.put(job_id, user_id, priority)
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(settings.ai_job_timeout_seconds)
+            try:
+                await self._load_unfinished()
+            except Exception as e:
+                print(f"⚠️  WARNING: Could not load queued AI jobs: {e}")
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, _ = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                # Keep the worker alive; the sweep retries jobs left queued
+                print(f"⚠️  WARNING: AI job {job_id} could not be run: {e}")
+
+    async def _run(self, job_id: int) -> None:
+        job = await run_in_threadpool(_claim_job, job_id)
+        if job is None:
+            return
+
+        try:
+            gemini = get_gemini_service()
+            if gemini is None:
+                raise AIServiceError("AI service is not available", status_code=503)
+            snapshot = await run_in_threadpool(_get_snapshot, job.user_id)
+            response_text = await gemini.generate(
+                ADVISOR_INSTRUCTION,
+                advice_contents(snapshot, job.query),
+                max_output_tokens=settings.ai_job_max_output_tokens,
+                timeout=settings.ai_job_timeout_seconds
+            )
+            if not response_text:
+                raise Exception("Empty response from AI service")
+        except asyncio.CancelledError:
+            # Shutting down: leave the job for the next start
+            await run_in_threadpool(_release_job, job_id)
+            raise
+        except Exception as e:
+            self.failed += 1
+            await run_in_threadpool(_finish_job, job_id, AIJobStatus.FAILED, error=str(classify_error(e)))
+        else:
+            self.completed += 1
+            await run_in_threadpool(_finish_job, job_id, AIJobStatus.SUCCEEDED, result=response_text)
+
+
+job_pool = AIJobWorkerPool(settings.ai_job_workers, settings.ai_job_max_pending_per_user)
@@ -0,0 +1,126 @@
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import Row, func, extract, and_
+from ..core.config import settings
+from ..models.budget import Budget
+from ..models.transaction import Transaction, TransactionType, TransactionCategory
+from ..models.rollup import UserMonthlyRollup
+from .rollups import whole_months
+from .daily_sums import range_groups
+
+
+# Columns of BudgetResponse, read as plain rows rather than ORM objects
+BUDGET_COLUMNS = (
+    Budget.category,
+    Budget.amount,
+    Budget.period,
+    Budget.start_date,
+    Budget.end_date,
+    Budget.id,
+    Budget.user_id,
+    Budget.created_at,
+    Budget.updated_at
+)
+
+
+def _with_spending(budget: Row, spent: float) -> dict:
+    """Combine a budget row with its spending figures"""
+    spent = float(spent or 0)
+    remaining = budget.amount - spent
+    percentage = (spent / budget.amount * 100) if budget.amount > 0 else 0
+
+    return {
+        **budget._asdict(),
+        "spent": spent,
+        "remaining": remaining,
+        "percentage_used": round(percentage, 2)
+    }
+
+
+def _month_of(column):
+    return extract("year", column) * 100 + extract("month", column)
+
+
+def _spent_from_transactions(db: Session, budget_ids: List[int]) -> dict:
+    """Sum each budget's expenses by range-joining it against the transactions"""
+    # Budget categories are stored as the enum value ("food") while the
+    # transaction enum column stores the member name ("FOOD")
+    rows = db.query(Budget.id, func.sum(Transaction.amount)).join(
+        Transaction,
+        and_(
+            Transaction.user_id == Budget.user_id,
+            Transaction.type == TransactionType.EXPENSE,
+            Transaction.category == func.upper(Budget.category),
+            Transaction.date >= Budget.start_date,
+            Transaction.date <= Budget.end_date
+        )
+    ).filter(Budget.id.in_(budget_ids)).group_by(Budget.id).all()
+    return dict(rows)
+
+
+def _spent_from_rollups(db: Session, budget_ids: List[int]) -> dict:
+    """Sum each whole-month budget's expenses from the monthly rollups"""
+    rows = db.query(Budget.id, func.sum(UserMonthlyRollup.total)).join(
+        UserMonthlyRollup,
+        and_(
+            UserMonthlyRollup.user_id == Budget.user_id,
+            UserMonthlyRollup.type == TransactionType.EXPENSE,
+            UserMonthlyRollup.category == func.upper(Budget.category),
+            UserMonthlyRollup.month >= _month_of(Budget.start_date),
+            UserMonthlyRollup.month <= _month_of(Budget.end_date)
+        )
+    ).filter(Budget.id.in_(budget_ids)).group_by(Budget.id).all()
+    return dict(rows)
+
+
+def _spent_from_daily_sums(db: Session, user_id: int, budgets: List[Row]) -> dict:
+    """Sum each budget's expenses from the running daily sums"""
+    ranges, ids = [], []
+    for budget in budgets:
+        # Matched case-insensitively, like the func.upper() comparisons above
+        try:
+            category = TransactionCategory(budget.category.lower())
+        except ValueError:
+            continue
+        ranges.append((budget.start_date, budget.end_date, [(TransactionType.EXPENSE, category)]))
+        ids.append(budget.id)
+
+    groups = range_groups(db, user_id, ranges) if ranges else []
+    return {
+        budget_id: sum(total for total, _ in budget_groups.values())
+        for budget_id, budget_groups in zip(ids, groups)
+    }
+
+
+def get_budgets_with_spending(
+    db: Session,
+    user_id: int,
+    budget_id: Optional[int] = None
+) -> List[dict]:
+    """Get a user's budgets with spending info in a fixed number of queries.
+
+    Budgets covering whole months are summed from the monthly rollups and
+    the rest from the running daily sums (or, with those disabled, by
+    range-joining them against the user's expense transactions). Each group
+    is aggregated set-based, so the number of queries does not depend on
+    how many budgets the user has.
+    """
+    query = db.query(*BUDGET_COLUMNS).filter(Budget.user_id == user_id)
+    if budget_id is not None:
+        query = query.filter(Budget.id == budget_id)
+    budgets = query.order_by(Budget.id).all()
+
+    from_rollups, other = [], []
+    for budget in budgets:
+        monthly = settings.monthly_rollups_enabled and whole_months(budget.start_date, budget.end_date)
+        (from_rollups if monthly else other).append(budget)
+
+    spent = {}
+    if other and settings.daily_sums_enabled:
+        spent.update(_spent_from_daily_sums(db, user_id, other))
+    elif other:
+        spent.update(_spent_from_transactions(db, [budget.id for budget in other]))
+    if from_rollups:
+        spent.update(_spent_from_rollups(db, [budget.id for budget in from_rollups]))
+
+    return [_with_spending(budget, spent.get(budget.id, 0)) for budget in budgets]
@@ -0,0 +1,400 @@
+from datetime import date, datetime, time, timedelta
+from itertools import product
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, union_all, literal, bindparam, and_, or_, insert, update
+from ..models.transaction import Transaction, TransactionType, TransactionCategory
+from ..models.rollup import UserDailySum
+
+# Every (type, category) pair a transaction can have
+ALL_KEYS = list(product(TransactionType, TransactionCategory))
+
+# Tolerance used when comparing float sums
+EPSILON = 0.005
+
+# Seeks per UNION ALL query (SQLite caps compound selects at 500)
+LOOKUPS_PER_QUERY = 250
+
+# Built lookup queries by size, per thread: SQLAlchemy fills in a statement's
+# compile state lazily, which is not safe to race from several threads
+_lookup_queries = threading.local()
+
+
+def naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Drop the timezone: dates are stored without one, so compare on the wall-clock fields"""
+    return value.replace(tzinfo=None) if value is not None else None
+
+
+def apply_daily_deltas(db: Session, changes: Iterable[Tuple[object, int]]) -> None:
+    """Add (snapshot, +1/-1) transaction changes to the running daily sums.
+
+    For each affected (user, type, category, day) a row is created if the
+    day has none yet, seeded with the running total of the previous day,
+    and then every row from that day onwards is shifted by the delta. This
+    keeps back-dated inserts, edits and deletes exact.
+    """
+    deltas = {}
+    for txn, sign in changes:
+        key = (txn.user_id, txn.type, txn.category, txn.date.date())
+        total, count = deltas.get(key, (0.0, 0))
+        deltas[key] = (total + sign * txn.amount, count + sign)
+
+    for (user_id, type, category, day), (total, count) in sorted(deltas.items(), key=lambda item: item[0][3]):
+        if not count and abs(total) <= EPSILON:
+            continue
+
+        same_series = and_(
+            UserDailySum.user_id == user_id,
+            UserDailySum.type == type,
+            UserDailySum.category == category
+        )
+        previous = db.query(UserDailySum.cum_total, UserDailySum.cum_count).filter(
+            same_series, UserDailySum.day < day
+        ).order_by(UserDailySum.day.desc()).limit(1).with_for_update().first()
+
+        db.execute(_insert_if_missing(db, {
+            "user_id": user_id,
+            "type": type,
+            "category": category,
+            "day": day,
+            "cum_total": previous[0] if previous else 0.0,
+            "cum_count": previous[1] if previous else 0
+        }))
+        db.query(UserDailySum).filter(same_series, UserDailySum.day >= day).update({
+            UserDailySum.cum_total: UserDailySum.cum_total + total,
+            UserDailySum.cum_count: UserDailySum.cum_count + count
+        }, synchronize_session=False)
+
+
+# Shifts the running sums over a range of days; executed many times by apply_daily_batch
+_daily_columns = UserDailySum.__table__.c
+_SHIFT_RANGE = update(UserDailySum.__table__).where(
+    _daily_columns.user_id == bindparam("b_user_id"),
+    _daily_columns.type == bindparam("b_type"),
+    _daily_columns.category == bindparam("b_category"),
+    _daily_columns.day >= bindparam("b_from"),
+    _daily_columns.day < bindparam("b_to")
+).values(
+    cum_total=_daily_columns.cum_total + bindparam("b_total"),
+    cum_count=_daily_columns.cum_count + bindparam("b_count")
+)
+
+
+def apply_daily_batch(db: Session, changes: Iterable[Tuple[object, int]]) -> None:
+    """Add many (snapshot, +1/-1) changes to the running daily sums at once.
+
+    Gives the same result as apply_daily_deltas, which issues three
+    statements per affected day and rewrites every later row each time.
+    Here each (user, type, category) series costs two reads and two
+    executemany writes, and every row is written once: the rows from one
+    affected day up to the next all move by the same amount, so each such
+    range is shifted by one parameter set. Suits bulk imports spanning many days.
+    """
+    series_deltas = {}
+    for txn, sign in changes:
+        days = series_deltas.setdefault((txn.user_id, txn.type, txn.category), {})
+        total, count = days.get(txn.date.date(), (0.0, 0))
+        days[txn.date.date()] = (total + sign * txn.amount, count + sign)
+
+    for (user_id, type, category), days in series_deltas.items():
+        affected = sorted(days)
+        same_series = and_(
+            UserDailySum.user_id == user_id,
+            UserDailySum.type == type,
+            UserDailySum.category == category
+        )
+        previous = db.query(UserDailySum.cum_total, UserDailySum.cum_count).filter(
+            same_series, UserDailySum.day < affected[0]
+        ).order_by(UserDailySum.day.desc()).limit(1).with_for_update().first()
+        existing = dict(
+            (day, (cum_total, cum_count))
+            for day, cum_total, cum_count in db.query(
+                UserDailySum.day, UserDailySum.cum_total, UserDailySum.cum_count
+            ).filter(
+                same_series, UserDailySum.day >= affected[0], UserDailySum.day <= affected[-1]
+            ).with_for_update().all()
+        )
+
+        series = {"b_user_id": user_id, "b_type": type, "b_category": category}
+        shifts, inserts = [], []
+        shift_total, shift_count = 0.0, 0
+        for index, day in enumerate(affected):
+            total, count = days[day]
+            shift_total, shift_count = shift_total + total, shift_count + count
+            if shift_count or abs(shift_total) > EPSILON:
+                shifts.append({
+                    **series,
+                    "b_from": day,
+                    "b_to": affected[index + 1] if index + 1 < len(affected) else date.max,
+                    "b_total": shift_total,
+                    "b_count": shift_count
+                })
+
+        # New days start from the latest existing running sum before them
+        last = tuple(previous) if previous else (0.0, 0)
+        shift_total, shift_count = 0.0, 0
+        for day in sorted(existing.keys() | days.keys()):
+            total, count = days.get(day, (0.0, 0))
+            shift_total, shift_count = shift_total + total, shift_count + count
+            if day in existing:
+                last = existing[day]
+            else:
+                inserts.append({
+                    "user_id": user_id,
+                    "type": type,
+                    "category": category,
+                    "day": day,
+                    "cum_total": last[0] + shift_total,
+                    "cum_count": last[1] + shift_count
+                })
+
+        # Shift first, so the inserted rows (already final) are not shifted again
+        if shifts:
+            db.execute(_SHIFT_RANGE, shifts)
+        if inserts:
+            db.execute(insert(UserDailySum.__table__), inserts)
+
+
+def _insert_if_missing(db: Session, row: dict):
+    table = UserDailySum.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        return insert(table).values(row).prefix_with("IGNORE")
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    return dialect_insert(table).values(row).on_conflict_do_nothing()
+
+
+def _lookup_sums(db: Session, user_id: int, lookups: set) -> dict:
+    """Get the running (total, count) at the end of each (type, category, day).
+
+    A day of None means the latest value. The lookups are answered by a
+    UNION ALL of primary-key seeks, so the cost does not depend on how much
+    history the user has.
+    """
+    lookups = list(lookups)
+    sums = {}
+    for offset in range(0, len(lookups), LOOKUPS_PER_QUERY):
+        chunk = lookups[offset:offset + LOOKUPS_PER_QUERY]
+        params = {"user_id": user_id}
+        for index, (type, category, day) in enumerate(chunk):
+            params[f"type_{index}"] = type
+            params[f"category_{index}"] = category
+            params[f"day_{index}"] = day if day is not None else date.max
+        for index, total, count in db.execute(_lookup_query(len(chunk)), params).all():
+            sums[chunk[index]] = (total, count)
+    return sums
+
+
+def _lookup_query(size: int):
+    """Get the UNION ALL of latest-row seeks for a size, building it once per thread"""
+    queries = _lookup_queries.__dict__.setdefault("by_size", {})
+    if size not in queries:
+        queries[size] = _build_lookup_query(size)
+    return queries[size]
+
+
+def _build_lookup_query(size: int):
+    """Build the UNION ALL of latest-row seeks, parameterised by position"""
+    selects = []
+    for index in range(size):
+        seek = select(
+            literal(index).label("lookup"),
+            UserDailySum.cum_total,
+            UserDailySum.cum_count
+        ).where(
+            UserDailySum.user_id == bindparam("user_id"),
+            UserDailySum.type == bindparam(f"type_{index}", type_=UserDailySum.type.type),
+            UserDailySum.category == bindparam(f"category_{index}", type_=UserDailySum.category.type),
+            UserDailySum.day <= bindparam(f"day_{index}", type_=UserDailySum.day.type)
+        ).order_by(UserDailySum.day.desc()).limit(1)
+        selects.append(select(seek.subquery()))
+    return union_all(*selects)
+
+
+def _edge_windows(start_date: Optional[datetime], end_date: Optional[datetime]) -> List[Tuple[datetime, datetime, bool]]:
+    """Parts of the first and last day that the running sums include but the range does not.
+
+    Returned as (from, to, include_from) with an exclusive upper bound.
+    """
+    windows = []
+    if start_date is not None:
+        day_start = datetime.combine(start_date.date(), time())
+        if start_date > day_start:
+            windows.append((day_start, start_date, True))
+    if end_date is not None:
+        next_day = datetime.combine(end_date.date() + timedelta(days=1), time())
+        windows.append((end_date, next_day, False))
+    return windows
+
+
+def range_groups(
+    db: Session,
+    user_id: int,
+    ranges: List[Tuple[Optional[datetime], Optional[datetime], Optional[list]]]
+) -> List[Dict[tuple, Tuple[float, int]]]:
+    """Get (type, category) -> (total, count) for several inclusive date ranges.
+
+    Each range is (start_date, end_date, keys), where keys limits the
+    (type, category) pairs computed (None for all). A range total is the
+    difference of two running-sum lookups, minus the transactions in the
+    uncovered parts of its first and last day. A request costs two queries
+    (more only past LOOKUPS_PER_QUERY boundary lookups).
+    """
+    ranges = [(naive(start), naive(end), keys or ALL_KEYS) for start, end, keys in ranges]
+
+    lookups = set()
+    windows = []
+    for start_date, end_date, keys in ranges:
+        for type, category in keys:
+            lookups.add((type, category, end_date.date() if end_date is not None else None))
+            if start_date is not None:
+                lookups.add((type, category, start_date.date() - timedelta(days=1)))
+        windows.extend(_edge_windows(start_date, end_date))
+
+    sums = _lookup_sums(db, user_id, lookups)
+
+    edge_transactions = []
+    if windows:
+        # Repeat user_id in every branch so each one is a (user_id, date) index range
+        edge_transactions = db.query(
+            Transaction.type, Transaction.category, Transaction.date, Transaction.amount
+        ).filter(
+            or_(*[
+                and_(
+                    Transaction.user_id == user_id,
+                    Transaction.date >= low if inclusive else Transaction.date > low,
+                    Transaction.date < high
+                )
+                for low, high, inclusive in set(windows)
+            ])
+        ).all()
+
+    results = []
+    for start_date, end_date, keys in ranges:
+        groups = {}
+        if start_date is not None and end_date is not None and start_date > end_date:
+            results.append(groups)
+            continue
+
+        for type, category in keys:
+            end_day = end_date.date() if end_date is not None else None
+            total, count = sums.get((type, category, end_day), (0.0, 0))
+            if start_date is not None:
+                before = sums.get((type, category, start_date.date() - timedelta(days=1)), (0.0, 0))
+                total, count = total - before[0], count - before[1]
+            groups[(type, category)] = [total, count]
+
+        range_windows = _edge_windows(start_date, end_date)
+        for type, category, txn_date, amount in edge_transactions:
+            if (type, category) not in groups:
+                continue
+            for low, high, inclusive in range_windows:
+                if (txn_date >= low if inclusive else txn_date > low) and txn_date < high:
+                    groups[(type, category)][0] -= amount
+                    groups[(type, category)][1] -= 1
+                    break
+
+        results.append({
+            key: (total, count) for key, (total, count) in groups.items()
+            if count or abs(total) > EPSILON
+        })
+
+    return results
+
+
+def _raw_daily_sums(db: Session, user_id: Optional[int] = None):
+    """Compute the running daily sums from the transactions table"""
+    day = func.date(Transaction.date).label("day")
+    daily = db.query(
+        Transaction.user_id,
+        Transaction.type,
+        Transaction.category,
+        day,
+        func.sum(Transaction.amount).label("total"),
+        func.count(Transaction.id).label("count")
+    )
+    if user_id is not None:
+        daily = daily.filter(Transaction.user_id == user_id)
+    daily = daily.group_by(Transaction.user_id, Transaction.type, Transaction.category, day).subquery()
+
+    series = (daily.c.user_id, daily.c.type, daily.c.category)
+    return select(
+        daily.c.user_id,
+        daily.c.type,
+        daily.c.category,
+        daily.c.day,
+        func.sum(daily.c.total).over(partition_by=series, order_by=daily.c.day).label("cum_total"),
+        func.sum(daily.c.count).over(partition_by=series, order_by=daily.c.day).label("cum_count")
+    )
+
+
+def rebuild_daily_sums(db: Session, user_id: Optional[int] = None) -> None:
+    """Recompute the running daily sums from the transactions table"""
+    delete = db.query(UserDailySum)
+    if user_id is not None:
+        delete = delete.filter(UserDailySum.user_id == user_id)
+    delete.delete(synchronize_session=False)
+
+    db.execute(insert(UserDailySum.__table__).from_select(
+        ["user_id", "type", "category", "day", "cum_total", "cum_count"],
+        _raw_daily_sums(db, user_id)
+    ))
+
+
+def check_daily_sums(db: Session, user_id: Optional[int] = None) -> List[dict]:
+    """Diff the running daily sums against the transactions table"""
+    expected = {}
+    for row in db.execute(_raw_daily_sums(db, user_id)).all():
+        day = row.day if isinstance(row.day, date) else date.fromisoformat(row.day)
+        expected.setdefault((row.user_id, row.type, row.category), []).append(
+            (day, float(row.cum_total), int(row.cum_count))
+        )
+
+    query = db.query(UserDailySum)
+    if user_id is not None:
+        query = query.filter(UserDailySum.user_id == user_id)
+    actual = {}
+    for row in query.order_by(UserDailySum.day).all():
+        actual.setdefault((row.user_id, row.type, row.category), []).append(
+            (row.day, row.cum_total, row.cum_count)
+        )
+
+    mismatches = []
+    for series in sorted(expected.keys() | actual.keys(), key=str):
+        want_rows = expected.get(series, [])
+        got_rows = actual.get(series, [])
+
+        # Every stored row must equal the running sum at its day, and every
+        # day with transactions must have a stored row
+        index, running = 0, (0.0, 0)
+        stored_days = {day for day, _, _ in got_rows}
+        for day, total, count in got_rows:
+            while index < len(want_rows) and want_rows[index][0] <= day:
+                running = want_rows[index][1:]
+                index += 1
+            if count != running[1] or abs(total - running[0]) > EPSILON:
+                mismatches.append(_mismatch(series, day, running, (total, count)))
+        for day, total, count in want_rows:
+            if day not in stored_days:
+                mismatches.append(_mismatch(series, day, (total, count), None))
+
+    return mismatches
+
+
+def _mismatch(series: tuple, day: date, want: tuple, got: Optional[tuple]) -> dict:
+    user_id, type, category = series
+    return {
+        "user_id": user_id,
+        "day": day.isoformat(),
+        "type": type.value,
+        "category": category.value,
+        "expected_total": want[0],
+        "actual_total": got[0] if got else None,
+        "expected_count": want[1],
+        "actual_count": got[1] if got else None
+    }
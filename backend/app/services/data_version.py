@@ -0,0 +1,88 @@
+import hashlib
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..auth.dependencies import get_current_active_user
+from ..core.database import AsyncDB, get_async_db
+from ..models.data_version import UserDataVersion
+from ..models.user import User
+
+
+def bump_data_version(db: Session, user_id: int) -> None:
+    """Bump a user's data version as part of the caller's transaction.
+
+    Call this from every write to the user's transactions or budgets, before
+    the commit, so the new data and the new version become visible together.
+    """
+    db.execute(_bump(db), {"user_id": user_id, "version": 1})
+
+
+def _bump(db: Session):
+    """Build an INSERT that increments the existing version on key conflict"""
+    table = UserDataVersion.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        return mysql_insert(table).on_duplicate_key_update(version=table.c.version + 1)
+
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    return dialect_insert(table).on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={"version": table.c.version + 1}
+    )
+
+
+def get_data_version(db: Session, user_id: int) -> int:
+    """A user's current data version (0 until their data first changes)"""
+    version = db.execute(
+        select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)
+    ).scalar()
+    return version or 0
+
+
+def make_etag(user_id: int, version: int, request: Request) -> str:
+    """ETag of a GET response: the data version plus a digest of the user, path and query"""
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{user_id}:{request.url.path}?{query}".encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists the ETag (weak comparison, as for GET)"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+) -> dict:
+    """Conditional GET for endpoints that only read the user's transactions and budgets.
+
+    Looks up the user's data version with a single primary-key read and
+    answers 304 Not Modified when the client already holds the current
+    representation, before the endpoint runs any of its own queries.
+    Otherwise sets the ETag and Cache-Control headers on the response and
+    returns them, for endpoints that build their own Response.
+    """
+    version = await db.run(get_data_version, current_user.id)
+    etag = make_etag(current_user.id, version, request)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return headers
@@ -0,0 +1,146 @@
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..models.budget import Budget
+from ..models.transaction import Transaction, TransactionType
+from ..models.rollup import UserMonthlyRollup
+from .budget_spending import get_budgets_with_spending
+from .daily_sums import naive
+from .rollups import raw_month_groups
+
+# Compact summary of a user's finances used as AI context. All fields are
+# tuples so snapshots can be compared and used as cache keys.
+#   months:         ((YYYYMM, income, expense), ...) for the last 3 months, oldest first
+#   top_categories: ((category, total), ...) largest expense categories
+#   budgets:        ((category, spent, amount, percentage_used), ...) for current budgets
+FinancialSnapshot = namedtuple(
+    "FinancialSnapshot",
+    "total_income total_expense balance months top_categories budgets"
+)
+
+TREND_MONTHS = 3
+TOP_CATEGORIES = 3
+
+# Snapshots by user id, dropped whenever the user's transactions or budgets change
+snapshot_cache = TTLCache(settings.ai_cache_max_entries, settings.ai_snapshot_ttl_seconds)
+
+
+def invalidate_snapshot(user_id: int) -> None:
+    """Drop a user's cached snapshot, e.g. after their data changed"""
+    snapshot_cache.pop(user_id)
+
+
+@event.listens_for(Transaction, "after_insert")
+@event.listens_for(Transaction, "after_update")
+@event.listens_for(Transaction, "after_delete")
+@event.listens_for(Budget, "after_insert")
+@event.listens_for(Budget, "after_update")
+@event.listens_for(Budget, "after_delete")
+def _record_changed_snapshot(mapper, connection, target):
+    # Flushes happen before the commit; dropping the snapshot now would let a
+    # concurrent request cache the old data again in between
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_snapshots", set()).add(target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_snapshots(session):
+    for user_id in session.info.pop("changed_snapshots", ()):
+        invalidate_snapshot(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_snapshots(session):
+    session.info.pop("changed_snapshots", None)
+
+
+def _recent_months(now: datetime) -> list:
+    """Month keys of the last TREND_MONTHS months, oldest first"""
+    year, month = now.year, now.month
+    keys = []
+    for _ in range(TREND_MONTHS):
+        keys.append(year * 100 + month)
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return keys[::-1]
+
+
+def _month_groups(db: Session, user_id: int) -> list:
+    """Get (month, type, category, total) for every month the user has data in"""
+    if settings.monthly_rollups_enabled:
+        return db.query(
+            UserMonthlyRollup.month,
+            UserMonthlyRollup.type,
+            UserMonthlyRollup.category,
+            UserMonthlyRollup.total
+        ).filter(
+            UserMonthlyRollup.user_id == user_id,
+            UserMonthlyRollup.count > 0
+        ).all()
+
+    return [
+        (int(row.month), row.type, row.category, row.total)
+        for row in raw_month_groups(db, user_id).all()
+    ]
+
+
+def _round(value) -> float:
+    return round(float(value or 0), 2)
+
+
+def build_snapshot(db: Session, user_id: int) -> FinancialSnapshot:
+    """Compute a user's snapshot from one pass over their monthly totals plus their budgets.
+
+    The totals, trend and top categories come from a single grouped query.
+    Budget usage is read with get_budgets_with_spending (the budget list plus
+    one or two grouped sums), the same figures GET /budgets returns, rather
+    than a second copy of its rollup, daily-sum and range-join logic folded
+    into that query. A snapshot therefore costs a fixed two to four queries,
+    however many transactions and budgets the user has.
+    """
+    now = datetime.utcnow()
+    recent = _recent_months(now)
+    monthly = {key: [0.0, 0.0] for key in recent}
+    totals = {TransactionType.INCOME: 0.0, TransactionType.EXPENSE: 0.0}
+    categories = {}
+
+    for month, type, category, total in _month_groups(db, user_id):
+        total = float(total or 0)
+        totals[type] += total
+        if month in monthly:
+            monthly[month][0 if type == TransactionType.INCOME else 1] += total
+        if type == TransactionType.EXPENSE:
+            categories[category.value] = categories.get(category.value, 0.0) + total
+
+    top_categories = sorted(categories.items(), key=lambda item: item[1], reverse=True)[:TOP_CATEGORIES]
+
+    budgets = [
+        budget for budget in get_budgets_with_spending(db, user_id)
+        if naive(budget["start_date"]) <= now <= naive(budget["end_date"])
+    ]
+
+    total_income = _round(totals[TransactionType.INCOME])
+    total_expense = _round(totals[TransactionType.EXPENSE])
+    return FinancialSnapshot(
+        total_income=total_income,
+        total_expense=total_expense,
+        balance=_round(total_income - total_expense),
+        months=tuple((key, _round(income), _round(expense)) for key, (income, expense) in monthly.items()),
+        top_categories=tuple((category, _round(total)) for category, total in top_categories),
+        budgets=tuple(
+            (budget["category"], _round(budget["spent"]), _round(budget["amount"]), budget["percentage_used"])
+            for budget in budgets
+        )
+    )
+
+
+def get_financial_snapshot(db: Session, user_id: int) -> FinancialSnapshot:
+    """Get a user's snapshot, computing it only when the cached one is missing or stale"""
+    snapshot = snapshot_cache.get(user_id)
+    if snapshot is None:
+        snapshot = build_snapshot(db, user_id)
+        snapshot_cache.set(user_id, snapshot)
+    return snapshot
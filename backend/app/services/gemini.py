@@ -0,0 +1,421 @@
+import asyncio
+import sys
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+import httpx
+from ..core.config import settings
+from ..core.metrics import record_ai_call
+from ..core.resilience import CircuitBreaker, RetryBudget, backoff_delay
+
+# The google-genai SDK is imported and the client built on the first AI request
+# (see get_gemini_client), so workers that never serve one start faster and
+# need no API key
+client = None
+_client_loaded = False
+
+
+class AIServiceError(Exception):
+    """A failed Gemini call, with the HTTP status it should be reported as"""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: int = 500,
+        retryable: bool = False,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.headers = headers
+
+
+class AITimeoutError(AIServiceError):
+    """Raised when a Gemini call does not finish before its deadline"""
+
+    def __init__(self, message: str):
+        super().__init__(message, status_code=504)
+
+
+class AIBusyError(AIServiceError):
+    """Raised when no Gemini call slot frees up in time"""
+
+    def __init__(self, message: str):
+        super().__init__(message, status_code=503, headers={"Retry-After": "5"})
+
+
+class AIUnavailableError(AIServiceError):
+    """Raised without calling Gemini while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            "AI service is temporarily unavailable. Please try again shortly",
+            status_code=503,
+            headers={"Retry-After": str(max(1, round(retry_after)))}
+        )
+
+
+def _error_reasons(error) -> set:
+    """Collect the `reason` fields of a Google API error's details"""
+    details = error.details if isinstance(error.details, dict) else {}
+    details = details.get("error", details)
+    return {
+        detail.get("reason")
+        for detail in details.get("details", [])
+        if isinstance(detail, dict)
+    }
+
+
+def _outcome(error: BaseException) -> str:
+    """Outcome label of a failed call for the Gemini metrics"""
+    if isinstance(error, AITimeoutError):
+        return "timeout"
+    if isinstance(error, (AIBusyError, AIUnavailableError)):
+        return "rejected"
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"
+    return "error"
+
+
+def classify_error(error: Exception) -> AIServiceError:
+    """Map an SDK or network error to an AIServiceError.
+
+    Quota errors, server errors and network failures are retryable and
+    count against the circuit breaker; the rest are reported as they are.
+    """
+    if isinstance(error, AIServiceError):
+        return error
+
+    # Until the SDK has been imported no error can have come from it
+    genai_errors = sys.modules.get("google.genai.errors")
+    if genai_errors is not None and isinstance(error, genai_errors.APIError):
+        if error.code == 429 or error.status == "RESOURCE_EXHAUSTED":
+            return AIServiceError(
+                "API quota exceeded. Please try again later or upgrade your plan",
+                status_code=429,
+                retryable=True
+            )
+        if isinstance(error, genai_errors.ServerError):
+            return AIServiceError(f"AI service error: {error.message}", status_code=503, retryable=True)
+        if "API_KEY_INVALID" in _error_reasons(error):
+            return AIServiceError(
+                "Invalid Gemini API key. Get a new key from: https://makersuite.google.com/app/apikey",
+                status_code=401
+            )
+        if error.code == 403 or error.status == "PERMISSION_DENIED":
+            return AIServiceError(
+                "API key doesn't have permission. Enable Gemini API in Google Cloud Console",
+                status_code=403
+            )
+        if error.code == 404 or error.status == "NOT_FOUND":
+            return AIServiceError(
+                f"Gemini model '{settings.gemini_model}' is not available",
+                status_code=503
+            )
+        return AIServiceError(f"AI service error: {error.message}", status_code=502)
+
+    if isinstance(error, httpx.TransportError):
+        return AIServiceError("Could not reach the AI service", status_code=503, retryable=True)
+
+    return AIServiceError(f"AI service error: {error}")
+
+
+class GeminiService:
+    """Non-blocking Gemini calls with a deadline, retries and a circuit breaker.
+
+    Each request gets `timeout` seconds in total, including retries. Retryable
+    failures are retried up to `max_retries` times with jittered backoff, as
+    long as the retry budget and the deadline allow it. After
+    `breaker_failure_threshold` failures in a row, calls fail fast with
+    AIUnavailableError for `breaker_reset_seconds`.
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str,
+        timeout: float,
+        max_concurrent_calls: int,
+        queue_timeout: float,
+        prompt_cache_ttl: int = 0,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+        retry_budget_ratio: float = 0.2,
+        breaker_failure_threshold: int = 5,
+        breaker_reset_seconds: float = 30
+    ):
+        self.client = client
+        self.model = model
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.prompt_cache_ttl = prompt_cache_ttl
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_budget = RetryBudget(retry_budget_ratio)
+        self.breaker = CircuitBreaker(breaker_failure_threshold, breaker_reset_seconds)
+        self._slots = asyncio.Semaphore(max_concurrent_calls)
+        # Provider-side caches by system instruction: (cache name, refresh time)
+        self._prompt_caches = {}
+        self._prompt_cache_lock = asyncio.Lock()
+
+    def _check_breaker(self) -> None:
+        if not self.breaker.allow_request():
+            raise AIUnavailableError(self.breaker.retry_after())
+
+    def _record_error(self, error: AIServiceError) -> None:
+        # Only upstream trouble counts against the breaker; a rejected
+        # request still shows that the service is answering
+        if error.retryable:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    async def _call(self, request: Callable[[], Awaitable], timeout: Optional[float] = None):
+        """Run an upstream request within the deadline, retrying retryable failures.
+
+        Callers check the breaker first, before any other upstream work.
+        """
+        timeout = timeout or self.timeout
+        self.retry_budget.deposit()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        await self._acquire_slot()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await asyncio.wait_for(request(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    self.breaker.record_failure()
+                    raise AITimeoutError(f"AI service did not respond within {timeout:g}s")
+                except Exception as e:
+                    error = classify_error(e)
+                    self._record_error(error)
+                    delay = backoff_delay(attempt, self.retry_backoff)
+                    if (
+                        not error.retryable
+                        or attempt >= self.max_retries
+                        or loop.time() + delay >= deadline
+                        or not self.breaker.allow_request()
+                        or not self.retry_budget.withdraw()
+                    ):
+                        raise error from e
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+
+                self.breaker.record_success()
+                return response
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {"circuit_breaker": self.breaker.stats(), "retry_budget": self.retry_budget.stats()}
+
+    async def _acquire_slot(self) -> None:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise AIBusyError("Too many AI requests in progress")
+
+    async def _cached_instruction(self, system_instruction: str) -> Optional[str]:
+        """Get the name of a provider-side cache holding the instruction, creating it if needed"""
+        if not self.prompt_cache_ttl:
+            return None
+
+        async with self._prompt_cache_lock:
+            cached = self._prompt_caches.get(system_instruction)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+
+            from google.genai import types
+            try:
+                cache = await asyncio.wait_for(
+                    self.client.aio.caches.create(
+                        model=self.model,
+                        config=types.CreateCachedContentConfig(
+                            system_instruction=system_instruction,
+                            ttl=f"{self.prompt_cache_ttl}s"
+                        )
+                    ),
+                    self.timeout
+                )
+            except Exception as e:
+                # E.g. the instruction is below the model's minimum cacheable size
+                print(f"⚠️  WARNING: Could not cache the AI instruction, sending it inline: {e}")
+                self.prompt_cache_ttl = 0
+                return None
+
+            # Recreate it a little before Gemini expires it
+            self._prompt_caches[system_instruction] = (cache.name, time.monotonic() + self.prompt_cache_ttl * 0.9)
+            return cache.name
+
+    async def _config(self, system_instruction: str, temperature: float, max_output_tokens: int):
+        from google.genai import types
+
+        cache_name = await self._cached_instruction(system_instruction)
+        if cache_name is not None:
+            return types.GenerateContentConfig(
+                cached_content=cache_name,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+            )
+        return types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+        )
+
+    async def generate(
+        self,
+        system_instruction: str,
+        contents: str,
+        temperature: float = 0.7,
+        max_output_tokens: int = 500,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Generate a response using the SDK's async client.
+
+        `timeout` overrides the service's deadline, e.g. for background jobs.
+        """
+        began = time.perf_counter()
+        try:
+            # While the breaker is open, do not create the prompt cache either
+            self._check_breaker()
+            config = await self._config(system_instruction, temperature, max_output_tokens)
+            response = await self._call(lambda: self.client.aio.models.generate_content(
+                model=self.model,
+                config=config,
+                contents=contents
+            ), timeout)
+        except BaseException as e:
+            record_ai_call("generate", _outcome(e), time.perf_counter() - began)
+            raise
+        record_ai_call("generate", "ok", time.perf_counter() - began, getattr(response, "usage_metadata", None))
+
+        # Extract response text
+        return response.text if hasattr(response, 'text') else str(response)
+
+    async def stream(
+        self,
+        system_instruction: str,
+        contents: str,
+        temperature: float = 0.7,
+        max_output_tokens: int = 500
+    ) -> AsyncIterator[str]:
+        """Yield response text as the model produces it.
+
+        The timeout applies to the wait for each chunk. Streams go through the
+        circuit breaker but are not retried, since part of the answer may
+        already have been sent. Closing the generator early closes the
+        upstream stream and frees the call slot.
+        """
+        began = time.perf_counter()
+        try:
+            self._check_breaker()
+            config = await self._config(system_instruction, temperature, max_output_tokens)
+            await self._acquire_slot()
+        except AIServiceError as e:
+            record_ai_call("stream", _outcome(e), time.perf_counter() - began)
+            raise
+        response = None
+        # Gemini reports the token usage with the last chunk
+        usage = None
+        outcome = "cancelled"
+        try:
+            response = await asyncio.wait_for(
+                self.client.aio.models.generate_content_stream(
+                    model=self.model,
+                    config=config,
+                    contents=contents
+                ),
+                self.timeout
+            )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    self.breaker.record_failure()
+                    raise AITimeoutError(f"AI service stalled for more than {self.timeout:g}s")
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if chunk.text:
+                    yield chunk.text
+            self.breaker.record_success()
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            outcome = "timeout"
+            raise AITimeoutError(f"AI service did not respond within {self.timeout:g}s")
+        except AIServiceError as e:
+            outcome = _outcome(e)
+            raise
+        except Exception as e:
+            error = classify_error(e)
+            self._record_error(error)
+            outcome = "error"
+            raise error from e
+        finally:
+            record_ai_call("stream", outcome, time.perf_counter() - began, usage)
+            self._slots.release()
+            if hasattr(response, "aclose"):
+                await response.aclose()
+
+
+def gemini_configured() -> bool:
+    """Whether AI requests can be served, decided without importing the SDK"""
+    return client is not None or bool(settings.gemini_api_key)
+
+
+def get_gemini_client():
+    """Import the SDK and build the Gemini client on first use, or return None if that is not possible"""
+    global client, _client_loaded
+    if client is not None or _client_loaded:
+        return client
+    _client_loaded = True
+
+    if not settings.gemini_api_key:
+        print("⚠️  WARNING: GEMINI_API_KEY is not set; AI features are disabled")
+        return None
+    try:
+        from google import genai
+        client = genai.Client(api_key=settings.gemini_api_key)
+        print("✅ Gemini AI configured successfully!")
+    except ImportError:
+        print("⚠️  WARNING: google-genai package not installed!")
+        print("   Run: pip install google-genai")
+    except Exception as e:
+        print(f"⚠️  WARNING: Error configuring Gemini API: {e}")
+    return client
+
+
+_service: Optional[GeminiService] = None
+
+
+def current_gemini_service() -> Optional[GeminiService]:
+    """The shared Gemini service if an AI request already created it"""
+    return _service
+
+
+def get_gemini_service() -> Optional[GeminiService]:
+    """Dependency returning the shared Gemini service, or None if Gemini is unavailable"""
+    global _service
+    if _service is None and get_gemini_client() is not None:
+        _service = GeminiService(
+            client,
+            model=settings.gemini_model,
+            timeout=settings.ai_timeout_seconds,
+            max_concurrent_calls=settings.ai_max_concurrent_calls,
+            queue_timeout=settings.ai_queue_timeout_seconds,
+            prompt_cache_ttl=settings.ai_prompt_cache_ttl_seconds if settings.ai_prompt_cache_enabled else 0,
+            max_retries=settings.ai_max_retries,
+            retry_backoff=settings.ai_retry_backoff_seconds,
+            retry_budget_ratio=settings.ai_retry_budget_ratio,
+            breaker_failure_threshold=settings.ai_breaker_failure_threshold,
+            breaker_reset_seconds=settings.ai_breaker_reset_seconds
+        )
+    return _service
@@ -0,0 +1,214 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func, extract, insert
+from ..models.transaction import Transaction
+from ..models.rollup import UserMonthlyRollup
+from .daily_sums import apply_daily_deltas
+
+# The fields of a transaction that the rollups depend on
+TransactionSnapshot = namedtuple("TransactionSnapshot", "user_id date type category amount")
+
+# Tolerance used when comparing float sums
+EPSILON = 0.005
+
+
+def snapshot(transaction: Transaction) -> TransactionSnapshot:
+    """Capture the rollup-relevant fields of a transaction"""
+    return TransactionSnapshot(
+        transaction.user_id,
+        transaction.date,
+        transaction.type,
+        transaction.category,
+        transaction.amount
+    )
+
+
+def month_key(date: datetime) -> int:
+    """Return the YYYYMM bucket a date falls into"""
+    return date.year * 100 + date.month
+
+
+def _next_month_start(date: datetime) -> datetime:
+    start = date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def whole_months(
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """Return the (first, last) month keys if a date range covers whole months.
+
+    The range must start at the first instant of a month and end within the
+    last second of a month (the end is inclusive). Open ends are allowed.
+    Returns None when the range cuts through a month.
+    """
+    if start_date is not None:
+        if start_date != start_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0):
+            return None
+    if end_date is not None:
+        if end_date < _next_month_start(end_date) - timedelta(seconds=1):
+            return None
+
+    return (
+        month_key(start_date) if start_date is not None else None,
+        month_key(end_date) if end_date is not None else None
+    )
+
+
+def apply_transaction_change(
+    db: Session,
+    before: Optional[TransactionSnapshot],
+    after: Optional[TransactionSnapshot]
+) -> None:
+    """Update the rollups for a created (before=None), updated or deleted (after=None) transaction.
+
+    Updates both the monthly rollups and the running daily sums. Runs in the
+    caller's DB transaction, so they commit together with the change to the
+    transaction itself.
+    """
+    changes = []
+    if before is not None:
+        changes.append((before, -1))
+    if after is not None:
+        changes.append((after, 1))
+    apply_deltas(db, changes)
+    apply_daily_deltas(db, changes)
+
+
+def apply_deltas(db: Session, changes: Iterable[Tuple[TransactionSnapshot, int]]) -> None:
+    """Add (snapshot, +1/-1) changes to the rollups with a single upsert"""
+    deltas = {}
+    for txn, sign in changes:
+        key = (txn.user_id, month_key(txn.date), txn.type, txn.category)
+        total, count = deltas.get(key, (0.0, 0))
+        deltas[key] = (total + sign * txn.amount, count + sign)
+
+    rows = [
+        {"user_id": user_id, "month": month, "type": type, "category": category,
+         "total": total, "count": count}
+        for (user_id, month, type, category), (total, count) in deltas.items()
+        if count or abs(total) > EPSILON
+    ]
+    if rows:
+        # executemany of one cached statement, rather than a multi-row
+        # VALUES that would be compiled again for every call
+        db.execute(_upsert(db), rows)
+
+
+def _upsert(db: Session):
+    """Build an INSERT that adds to existing rollup rows on key conflict"""
+    table = UserMonthlyRollup.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table)
+        return stmt.on_duplicate_key_update(
+            total=table.c.total + stmt.inserted.total,
+            count=table.c.count + stmt.inserted.count
+        )
+
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[c.name for c in table.primary_key],
+        set_={
+            "total": table.c.total + stmt.excluded.total,
+            "count": table.c.count + stmt.excluded.count
+        }
+    )
+
+
+def monthly_groups(
+    db: Session,
+    user_id: int,
+    first_month: Optional[int] = None,
+    last_month: Optional[int] = None
+) -> list:
+    """Get (type, category, total, count) groups for a range of months"""
+    query = db.query(
+        UserMonthlyRollup.type,
+        UserMonthlyRollup.category,
+        func.sum(UserMonthlyRollup.total),
+        func.sum(UserMonthlyRollup.count)
+    ).filter(UserMonthlyRollup.user_id == user_id)
+
+    if first_month is not None:
+        query = query.filter(UserMonthlyRollup.month >= first_month)
+    if last_month is not None:
+        query = query.filter(UserMonthlyRollup.month <= last_month)
+
+    return query.group_by(
+        UserMonthlyRollup.type, UserMonthlyRollup.category
+    ).having(func.sum(UserMonthlyRollup.count) > 0).all()
+
+
+def raw_month_groups(db: Session, user_id: Optional[int] = None):
+    """Aggregate the transactions table into rollup rows"""
+    month = (extract("year", Transaction.date) * 100 + extract("month", Transaction.date)).label("month")
+    query = db.query(
+        Transaction.user_id,
+        month,
+        Transaction.type,
+        Transaction.category,
+        func.sum(Transaction.amount).label("total"),
+        func.count(Transaction.id).label("count")
+    )
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+    return query.group_by(Transaction.user_id, month, Transaction.type, Transaction.category)
+
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> None:
+    """Recompute the rollups from the transactions table (all users by default)"""
+    delete = db.query(UserMonthlyRollup)
+    if user_id is not None:
+        delete = delete.filter(UserMonthlyRollup.user_id == user_id)
+    delete.delete(synchronize_session=False)
+
+    db.execute(insert(UserMonthlyRollup.__table__).from_select(
+        ["user_id", "month", "type", "category", "total", "count"],
+        raw_month_groups(db, user_id).statement
+    ))
+
+
+def check_rollups(db: Session, user_id: Optional[int] = None) -> List[dict]:
+    """Diff the rollups against the transactions table, returning mismatched buckets"""
+    expected = {
+        (row.user_id, int(row.month), row.type, row.category): (float(row.total), row.count)
+        for row in raw_month_groups(db, user_id).all()
+    }
+
+    query = db.query(UserMonthlyRollup)
+    if user_id is not None:
+        query = query.filter(UserMonthlyRollup.user_id == user_id)
+    actual = {
+        (row.user_id, row.month, row.type, row.category): (row.total, row.count)
+        for row in query.all()
+        if row.count or abs(row.total) > EPSILON
+    }
+
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys(), key=str):
+        want = expected.get(key, (0.0, 0))
+        got = actual.get(key, (0.0, 0))
+        if want[1] != got[1] or abs(want[0] - got[0]) > EPSILON:
+            user_id, month, type, category = key
+            mismatches.append({
+                "user_id": user_id,
+                "month": month,
+                "type": type.value,
+                "category": category.value,
+                "expected_total": want[0],
+                "actual_total": got[0],
+                "expected_count": want[1],
+                "actual_count": got[1]
+            })
+
+    return mismatches
@@ -0,0 +1,121 @@
+from typing import List
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from ..models.transaction import Transaction
+from ..schemas.transaction import BatchOperation
+from .daily_sums import apply_daily_batch
+from .data_version import bump_data_version
+from .financial_context import invalidate_snapshot
+from .rollups import TransactionSnapshot, apply_deltas, snapshot
+
+# Columns loaded for the transactions a batch updates or deletes
+STATE_COLUMNS = (
+    Transaction.id,
+    Transaction.user_id,
+    Transaction.type,
+    Transaction.category,
+    Transaction.amount,
+    Transaction.description,
+    Transaction.date
+)
+
+# Columns an update may not set to null
+REQUIRED_FIELDS = ("type", "category", "amount", "date")
+
+
+def _state_snapshot(state: dict) -> TransactionSnapshot:
+    return TransactionSnapshot(state["user_id"], state["date"], state["type"], state["category"], state["amount"])
+
+
+def apply_transaction_batch(db: Session, user_id: int, operations: List[BatchOperation]) -> List[dict]:
+    """Apply create/update/delete operations for one user in a single DB transaction.
+
+    The transactions referenced by updates and deletes are loaded with one
+    IN query; ids the user does not own get a 404 result and are skipped.
+    Operations apply in order, so a later operation sees the effect of an
+    earlier one on the same id. The writes are one insert, one executemany
+    UPDATE and one DELETE, and the rollups are updated once for the whole
+    batch. Updates setting a required field to null get a 422 result.
+    Returns one result per operation.
+    """
+    ids = {operation.id for operation in operations if operation.op != "create"}
+    originals = {}
+    if ids:
+        originals = {
+            row.id: row._asdict()
+            for row in db.execute(
+                select(*STATE_COLUMNS).where(Transaction.user_id == user_id, Transaction.id.in_(ids))
+            )
+        }
+    # Current state of each loaded transaction, None once deleted
+    states = {id: dict(original) for id, original in originals.items()}
+
+    results, created = [], []
+    for index, operation in enumerate(operations):
+        result = {"index": index, "op": operation.op}
+        results.append(result)
+        if operation.op == "create":
+            transaction = Transaction(**operation.data.model_dump(), user_id=user_id)
+            created.append((result, transaction))
+            result["status"] = 201
+            continue
+
+        result["id"] = operation.id
+        if states.get(operation.id) is None:
+            result.update(status=404, error="Transaction not found")
+        elif operation.op == "update":
+            data = operation.data.model_dump(exclude_unset=True)
+            nulls = [field for field in REQUIRED_FIELDS if field in data and data[field] is None]
+            if nulls:
+                result.update(status=422, error=f"{', '.join(nulls)} may not be null")
+                continue
+            states[operation.id].update(data)
+            result["status"] = 200
+        else:
+            states[operation.id] = None
+            result["status"] = 204
+
+    changed = {id: state for id, state in states.items() if state != originals[id]}
+    updated = [state for state in changed.values() if state is not None]
+    deleted = [id for id, state in changed.items() if state is None]
+
+    if created:
+        db.add_all(transaction for _, transaction in created)
+        db.flush()
+        for result, transaction in created:
+            result["id"] = transaction.id
+    if updated:
+        # ORM bulk UPDATE by primary key: one executemany
+        db.execute(update(Transaction), updated)
+    if deleted:
+        db.execute(delete(Transaction).where(Transaction.id.in_(deleted)))
+
+    changes = []
+    for id, state in changed.items():
+        changes.append((_state_snapshot(originals[id]), -1))
+        if state is not None:
+            changes.append((_state_snapshot(state), 1))
+    changes.extend((snapshot(transaction), 1) for _, transaction in created)
+    if changes:
+        apply_deltas(db, changes)
+        apply_daily_batch(db, changes)
+        bump_data_version(db, user_id)
+    db.commit()
+
+    if changed:
+        # Bulk UPDATE and DELETE bypass the ORM events that usually drop the snapshot
+        invalidate_snapshot(user_id)
+
+    # Load the created and updated rows back in one query, for their
+    # generated columns and timestamps
+    returned = [result["id"] for result in results if result["status"] in (200, 201)]
+    if returned:
+        rows = {
+            transaction.id: transaction
+            for transaction in db.query(Transaction).filter(Transaction.id.in_(returned)).populate_existing()
+        }
+        for result in results:
+            if result["status"] in (200, 201):
+                result["transaction"] = rows.get(result["id"])
+
+    return results
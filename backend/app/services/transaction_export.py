@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+from sqlalchemy import select
+from ..core.database import SessionLocal
+from ..models.transaction import Transaction, TransactionType
+
+# Rows fetched per round trip from the server-side cursor, and written per chunk
+EXPORT_BATCH_SIZE = 1000
+
+# Same column names the import endpoint reads, so an export can be imported again
+EXPORT_COLUMNS = ("id", "date", "type", "category", "amount", "description")
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _csv_chunks(rows) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for partition in rows.partitions():
+        for id, date, type, category, amount, description in partition:
+            writer.writerow((id, date.isoformat(), type.value, category.value, amount, description or ""))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # The header alone when there are no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows) -> Iterator[str]:
+    for partition in rows.partitions():
+        yield "".join(
+            json.dumps({
+                "id": id,
+                "date": date.isoformat(),
+                "type": type.value,
+                "category": category.value,
+                "amount": amount,
+                "description": description
+            }) + "\n"
+            for id, date, type, category, amount, description in partition
+        )
+
+
+def export_transactions(
+    user_id: int,
+    format: str,
+    type: Optional[TransactionType] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Iterator[str]:
+    """Yield a user's transactions, oldest first, as chunks of CSV or NDJSON text.
+
+    Rows come from a server-side cursor EXPORT_BATCH_SIZE at a time and each
+    batch is written out before the next is fetched, so memory use does not
+    grow with the size of the history. The session stays open until the
+    generator is exhausted or closed.
+    """
+    query = select(
+        Transaction.id,
+        Transaction.date,
+        Transaction.type,
+        Transaction.category,
+        Transaction.amount,
+        Transaction.description
+    ).where(Transaction.user_id == user_id)
+    if type:
+        query = query.where(Transaction.type == type)
+    if start_date:
+        query = query.where(Transaction.date >= start_date)
+    if end_date:
+        query = query.where(Transaction.date <= end_date)
+    query = query.order_by(Transaction.date, Transaction.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(query)
+        chunks = _csv_chunks(rows) if format == "csv" else _ndjson_chunks(rows)
+        yield from chunks
+    finally:
+        db.close()
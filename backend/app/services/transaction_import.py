@@ -0,0 +1,249 @@
+import csv
+import io
+import re
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.transaction import Transaction, TransactionType, TransactionCategory
+from ..schemas.transaction import TransactionCreate
+from .daily_sums import apply_daily_batch
+from .data_version import bump_data_version
+from .financial_context import invalidate_snapshot
+from .rollups import TransactionSnapshot, apply_deltas
+
+# Date formats tried after ISO 8601, in order
+DATE_FORMATS = ("%Y%m%d%H%M%S", "%Y%m%d", "%m/%d/%Y", "%m/%d/%y", "%d.%m.%Y")
+
+# Characters read at a time from OFX files, which may not have line breaks
+OFX_CHUNK_SIZE = 64 * 1024
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+DESCRIPTION_LENGTH = Transaction.description.type.length
+
+# A parsed record: raw string fields keyed by date, amount and optionally
+# type, category and description
+Record = Dict[str, str]
+
+
+def _parse_date(value: str) -> datetime:
+    value = value.strip()
+    try:
+        # fromisoformat only accepts a "Z" suffix from Python 3.11
+        return datetime.fromisoformat(re.sub(r"Z$", "+00:00", value))
+    except ValueError:
+        pass
+    # OFX dates may carry fractional seconds and a [offset:zone] suffix,
+    # QIF dates may be written 1/ 2'24
+    compact = re.sub(r"[.\[].*$", "", value).replace("'", "/").replace(" ", "")
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(compact, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date '{value}'")
+
+
+def _parse_amount(value: str) -> float:
+    try:
+        return float(value.strip().replace(",", "").replace("$", ""))
+    except ValueError:
+        raise ValueError(f"Invalid amount '{value.strip()}'")
+
+
+def _to_transaction(record: Record) -> TransactionCreate:
+    """Map a parsed record onto TransactionCreate.
+
+    Without a type column the sign of the amount decides between income and
+    expense. Without a category the transaction is filed as other income or
+    other expense.
+    """
+    if not record.get("date"):
+        raise ValueError("Missing date")
+    if not record.get("amount"):
+        raise ValueError("Missing amount")
+
+    amount = _parse_amount(record["amount"])
+    type = (record.get("type") or "").strip().lower()
+    if not type:
+        type = TransactionType.INCOME.value if amount > 0 else TransactionType.EXPENSE.value
+        amount = abs(amount)
+    category = (record.get("category") or "").strip().lower().replace(" ", "_")
+    if not category:
+        category = (
+            TransactionCategory.OTHER_INCOME.value if type == TransactionType.INCOME.value
+            else TransactionCategory.OTHER_EXPENSE.value
+        )
+    description = (record.get("description") or "").strip()
+
+    return TransactionCreate(
+        type=type,
+        category=category,
+        amount=amount,
+        description=description[:DESCRIPTION_LENGTH] or None,
+        date=_parse_date(record["date"])
+    )
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def parse_csv(text: io.TextIOBase) -> Iterator[Record]:
+    """Rows of a CSV file with a header row.
+
+    Recognised columns are date, amount, type, category and description
+    (case-insensitive); other columns are ignored.
+    """
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [name.strip().lower() for name in header]
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield dict(zip(columns, row))
+
+
+def parse_ofx(text: io.TextIOBase) -> Iterator[Record]:
+    """<STMTTRN> entries of an OFX statement, in SGML (v1) or XML (v2) form"""
+    buffer = ""
+    record: Optional[Record] = None
+    while True:
+        chunk = text.read(OFX_CHUNK_SIZE)
+        buffer += chunk
+        # Keep the last tag, whose value may continue in the next chunk
+        end = max(buffer.rfind("<"), 0) if chunk else len(buffer)
+        for closing, tag, value in OFX_TAG.findall(buffer[:end]):
+            tag, value = tag.upper(), value.strip()
+            if tag == "STMTTRN":
+                if closing:
+                    if record is not None:
+                        yield record
+                    record = None
+                else:
+                    record = {}
+            elif record is not None and not closing and value:
+                if tag == "DTPOSTED":
+                    record["date"] = value
+                elif tag == "TRNAMT":
+                    record["amount"] = value
+                elif tag in ("NAME", "MEMO"):
+                    record["description"] = " - ".join(filter(None, [record.get("description"), value]))
+        if not chunk:
+            return
+        buffer = buffer[end:]
+
+
+def parse_qif(text: io.TextIOBase) -> Iterator[Record]:
+    """Records of a QIF file: D date, T amount, P payee, M memo, ^ end of record"""
+    record: Record = {}
+    for line in text:
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == "^":
+            if record:
+                yield record
+            record = {}
+        elif code == "D":
+            record["date"] = value
+        elif code in ("T", "U"):
+            record["amount"] = value
+        elif code in ("P", "M"):
+            record["description"] = " - ".join(filter(None, [record.get("description"), value]))
+    if record:
+        yield record
+
+
+PARSERS = {"csv": parse_csv, "ofx": parse_ofx, "qif": parse_qif}
+
+
+def import_format(format: Optional[str], filename: Optional[str]) -> Optional[str]:
+    """Pick the parser from the explicit format or the file extension (CSV by default)"""
+    if format:
+        format = format.lower()
+    elif filename and "." in filename:
+        format = filename.rsplit(".", 1)[1].lower()
+    else:
+        format = "csv"
+    return format if format in PARSERS else None
+
+
+def _insert_batch(db: Session, user_id: int, rows: List[dict]) -> None:
+    """Insert one batch with a single executemany and update the aggregates once"""
+    db.execute(insert(Transaction), rows)
+    changes = [
+        (TransactionSnapshot(row["user_id"], row["date"], row["type"], row["category"], row["amount"]), 1)
+        for row in rows
+    ]
+    apply_deltas(db, changes)
+    apply_daily_batch(db, changes)
+    bump_data_version(db, user_id)
+    db.commit()
+
+
+def import_transactions(user_id: int, stream: BinaryIO, format: str) -> dict:
+    """Parse an uploaded file as a stream and insert its transactions in batches.
+
+    Every batch of `import_batch_size` rows is one transaction, so a large
+    import never holds locks for long and a failure only loses that batch.
+    Rows that do not validate are reported and skipped.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    imported, failed = 0, 0
+    errors: List[dict] = []
+    batch: List[Tuple[int, dict]] = []
+
+    def report(row: int, message: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < settings.import_max_reported_errors:
+            errors.append({"row": row, "error": message})
+
+    def flush() -> None:
+        nonlocal imported
+        try:
+            _insert_batch(db, user_id, [values for _, values in batch])
+            imported += len(batch)
+        except SQLAlchemyError as e:
+            db.rollback()
+            for row, _ in batch:
+                report(row, f"Could not be saved: {e.__class__.__name__}")
+        batch.clear()
+
+    db = SessionLocal()
+    try:
+        for row, record in enumerate(PARSERS[format](text), start=1):
+            try:
+                transaction = _to_transaction(record)
+            except ValidationError as e:
+                report(row, _validation_message(e))
+                continue
+            except ValueError as e:
+                report(row, str(e))
+                continue
+            batch.append((row, {**transaction.model_dump(), "user_id": user_id}))
+            if len(batch) >= settings.import_batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        db.close()
+        # Leave the upload open for the framework to clean up
+        text.detach()
+        if imported:
+            # Bulk inserts bypass the ORM events that usually drop the snapshot
+            invalidate_snapshot(user_id)
+
+    return {"imported": imported, "failed": failed, "errors": errors}
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from ..core.pagination import encode_cursor
+from ..models.transaction import Transaction, TransactionType
+
+# Columns of TransactionResponse, listed as plain rows rather than ORM objects
+LIST_COLUMNS = (
+    Transaction.type,
+    Transaction.category,
+    Transaction.amount,
+    Transaction.description,
+    Transaction.date,
+    Transaction.id,
+    Transaction.user_id,
+    Transaction.created_at,
+    Transaction.updated_at
+)
+
+
+def list_transactions(
+    db: Session,
+    user_id: int,
+    skip: int,
+    limit: int,
+    keyset: bool,
+    after: Optional[tuple],
+    type: Optional[TransactionType],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+):
+    """List a user's transactions newest first, as dicts of LIST_COLUMNS.
+
+    Pages with skip/limit and returns a list, or with keyset=True seeks past
+    the (date, id) in ``after`` and returns a page with ``next_cursor``.
+    """
+    query = db.query(*LIST_COLUMNS).filter(Transaction.user_id == user_id)
+    
+    if type:
+        query = query.filter(Transaction.type == type)
+    if start_date:
+        query = query.filter(Transaction.date >= start_date)
+    if end_date:
+        query = query.filter(Transaction.date <= end_date)
+    
+    query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
+    
+    if not keyset:
+        return [row._asdict() for row in query.offset(skip).limit(limit)]
+    
+    if after:
+        last_date, last_id = after
+        query = query.filter(
+            or_(
+                Transaction.date < last_date,
+                and_(Transaction.date == last_date, Transaction.id < last_id)
+            )
+        )
+    
+    # Fetch one extra row to know whether another page follows
+    transactions = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        next_cursor = encode_cursor(last.date, last.id)
+    
+    return {"items": [row._asdict() for row in transactions], "next_cursor": next_cursor}
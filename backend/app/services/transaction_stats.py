@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from ..core.config import settings
+from ..models.transaction import Transaction, TransactionType
+from .rollups import whole_months, monthly_groups
+from .daily_sums import range_groups
+
+
+def compute_transaction_stats(
+    db: Session,
+    user_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> dict:
+    """Get income/expense totals and per-category totals in one grouped query.
+
+    Ranges that cover whole months are answered from the monthly rollups,
+    other ranges from the running daily sums, and the transactions table is
+    only scanned when both are disabled.
+    """
+    months = whole_months(start_date, end_date) if settings.monthly_rollups_enabled else None
+    if months is not None:
+        return _stats_from_groups(monthly_groups(db, user_id, *months))
+    
+    if settings.daily_sums_enabled:
+        groups = range_groups(db, user_id, [(start_date, end_date, None)])[0]
+        return _stats_from_groups(
+            (type, category, total, count) for (type, category), (total, count) in groups.items()
+        )
+    
+    query = db.query(
+        Transaction.type,
+        Transaction.category,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
+    ).filter(Transaction.user_id == user_id)
+    
+    if start_date:
+        query = query.filter(Transaction.date >= start_date)
+    if end_date:
+        query = query.filter(Transaction.date <= end_date)
+    
+    rows = query.group_by(Transaction.type, Transaction.category).all()
+    return _stats_from_groups(rows)
+
+
+def _stats_from_groups(rows) -> dict:
+    """Build the stats response from (type, category, total, count) groups"""
+    income = expense = 0.0
+    count = 0
+    category_totals = []
+    
+    for type, category, total, group_count in rows:
+        total = float(total or 0)
+        if type == TransactionType.INCOME:
+            income += total
+        else:
+            expense += total
+        count += group_count
+        category_totals.append({
+            "type": type,
+            "category": category,
+            "total": total,
+            "count": group_count
+        })
+    
+    category_totals.sort(key=lambda item: item["total"], reverse=True)
+    
+    return {
+        "total_income": income,
+        "total_expense": expense,
+        "balance": income - expense,
+        "transaction_count": count,
+        "category_totals": category_totals
+    }
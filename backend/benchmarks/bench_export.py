@@ -0,0 +1,159 @@
+"""Check that GET /transactions/export streams in bounded memory.
+
+Seeds a throwaway SQLite database with one user and 1M synthetic
+transactions, then exports them as CSV and NDJSON in a fresh process and
+reports the peak RSS growth during each export. The ASGI app is called
+directly with a `send` that discards the body, because the in-process test
+clients buffer whole responses. Exits with status 1 if the growth exceeds
+--max-rss-mb.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_export [--rows N] [--max-rss-mb N]
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SEED_CHUNK = 50_000
+
+
+def setup_env(db_path: str) -> None:
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+
+def seed(rows: int) -> None:
+    from sqlalchemy import insert
+    from app.core.migrations import upgrade_database
+    from app.core.database import SessionLocal
+    from app.models.transaction import Transaction, TransactionType, TransactionCategory
+    from app.models.user import User
+
+    upgrade_database()
+    rng = random.Random(42)
+    start = datetime(2000, 1, 1)
+    categories = list(TransactionCategory)
+    with SessionLocal() as db:
+        db.add(User(email="export@example.com", full_name="Bench", hashed_password="x"))
+        db.commit()
+        for offset in range(0, rows, SEED_CHUNK):
+            db.execute(insert(Transaction.__table__), [
+                {
+                    "user_id": 1,
+                    "type": rng.choice(list(TransactionType)),
+                    "category": rng.choice(categories),
+                    "amount": round(rng.uniform(1, 500), 2),
+                    "description": "Synthetic transaction",
+                    "date": start + timedelta(minutes=10 * (offset + index))
+                }
+                for index in range(min(SEED_CHUNK, rows - offset))
+            ])
+            db.commit()
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def export(app, token: str, query: str) -> int:
+    """Run one GET request through the ASGI app, returning the body size"""
+    received = 0
+    status = None
+    request_sent = False
+    disconnect = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if not message.get("more_body"):
+                disconnect.set()
+
+    await app({
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/transactions/export",
+        "raw_path": b"/transactions/export",
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"authorization", f"Bearer {token}".encode()), (b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }, receive, send)
+    if status != 200:
+        raise RuntimeError(f"export returned {status}")
+    return received
+
+
+def measure(max_rss_mb: float) -> bool:
+    from app.core.security import create_access_token
+    from app.main import app
+
+    token = create_access_token({"sub": "export@example.com", "uid": 1})
+    # Warm up imports, caches and the connection pool with a tiny export
+    asyncio.run(export(app, token, "end_date=2000-01-02T00:00:00"))
+
+    ok = True
+    for format in ("csv", "ndjson"):
+        before = peak_rss_mb()
+        began = time.perf_counter()
+        size = asyncio.run(export(app, token, f"format={format}"))
+        elapsed = time.perf_counter() - began
+        growth = peak_rss_mb() - before
+        ok = ok and growth <= max_rss_mb
+        print(f"  {format:6}: {size / 1e6:7.1f} MB in {elapsed:5.1f} s, peak RSS {peak_rss_mb():6.1f} MB "
+              f"(+{growth:.1f} MB, limit {max_rss_mb:g} MB)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-rss-mb", type=float, default=50)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.db:
+        setup_env(args.db)
+        sys.exit(0 if measure(args.max_rss_mb) else 1)
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    # Seed in a child process too, so its memory does not count towards the export
+    setup_env(db_path)
+    print(f"Seeding {args.rows} transactions...")
+    subprocess.run(
+        [sys.executable, "-c", f"from benchmarks.bench_export import seed; seed({args.rows})"],
+        env=os.environ, check=True
+    )
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_export", "--db", db_path, "--max-rss-mb", str(args.max_rss_mb)],
+        env=os.environ
+    )
+    print("bounded" if result.returncode == 0 else "RSS limit exceeded")
+    sys.exit(result.returncode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark POST /transactions/import against one POST /transactions per row.
+
+Generates a CSV file of bank history (100k rows by default, spread over
+five years), imports it through the bulk endpoint and reports rows per
+second and the number of SQL statements. For comparison, a sample of the
+same rows is created one request at a time and the rate is extrapolated.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_import [--rows N] [--sample N] [--batch-size N]
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+START = datetime(2019, 1, 1)
+DAYS = 5 * 365
+CATEGORIES = ["food", "transport", "housing", "utilities", "entertainment", "shopping", ""]
+
+
+def make_csv(rows: int) -> bytes:
+    rng = random.Random(42)
+    out = io.StringIO()
+    out.write("date,amount,category,description\n")
+    for _ in range(rows):
+        date = START + timedelta(days=rng.randrange(DAYS), minutes=rng.randrange(1440))
+        if rng.random() < 0.1:
+            out.write(f"{date.isoformat()},{rng.uniform(500, 3000):.2f},,Transfer in\n")
+        else:
+            out.write(f"{date.isoformat()},-{rng.uniform(1, 200):.2f},{rng.choice(CATEGORIES)},Card payment\n")
+    return out.getvalue().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=1000, help="rows created one request at a time")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+    if args.batch_size:
+        os.environ["IMPORT_BATCH_SIZE"] = str(args.batch_size)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.core.config import settings
+    from app.core.database import engine, SessionLocal
+    from app.core.migrations import upgrade_database
+    from app.main import app
+    from app.services.daily_sums import check_daily_sums
+    from app.services.rollups import check_rollups
+
+    upgrade_database()
+    statements = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*_):
+        statements[0] += 1
+
+    client = TestClient(app)
+
+    def login(email: str) -> dict:
+        client.post("/auth/register", json={"email": email, "full_name": "Bench", "password": "benchmark"})
+        token = client.post("/auth/login", json={"email": email, "password": "benchmark"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    data = make_csv(args.rows)
+    print(f"{args.rows} rows ({len(data) / 1e6:.1f} MB), batch size {settings.import_batch_size}")
+
+    headers = login("import@example.com")
+    statements[0] = 0
+    began = time.perf_counter()
+    response = client.post("/transactions/import", files={"file": ("history.csv", data)}, headers=headers)
+    elapsed = time.perf_counter() - began
+    result = response.json()
+    print(f"  bulk import:     {args.rows / elapsed:9.0f} rows/s  {elapsed:7.1f} s  "
+          f"{statements[0]} statements  (imported {result['imported']}, failed {result['failed']})")
+
+    lines = data.decode().splitlines()[1:args.sample + 1]
+    headers = login("rows@example.com")
+    statements[0] = 0
+    began = time.perf_counter()
+    for line in lines:
+        date, amount, category, description = line.split(",")
+        amount = float(amount)
+        client.post("/transactions", headers=headers, json={
+            "type": "income" if amount > 0 else "expense",
+            "category": category or ("other_income" if amount > 0 else "other_expense"),
+            "amount": abs(amount),
+            "description": description,
+            "date": date
+        })
+    elapsed = time.perf_counter() - began
+    rate = len(lines) / elapsed
+    print(f"  row by row:      {rate:9.0f} rows/s  {args.rows / rate:7.1f} s  "
+          f"~{statements[0] * args.rows // len(lines)} statements  (extrapolated from {len(lines)} rows)")
+
+    with SessionLocal() as db:
+        mismatches = len(check_rollups(db)) + len(check_daily_sums(db))
+    print(f"  aggregates consistent: {'yes' if not mismatches else f'no ({mismatches} mismatches)'}")
+
+
+if __name__ == "__main__":
+    main()
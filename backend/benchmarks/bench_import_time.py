@@ -0,0 +1,130 @@
+"""Benchmark how long importing the app takes, and where the time goes.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters, each
+against a new empty SQLite database, and reports the median wall time of the
+import, the import time spent in the heaviest packages, and whether the Gemini
+SDK and Alembic were loaded. With --compare, a git revision (e.g. the commit
+before the lazy startup) is checked out in a temporary worktree and measured
+the same way.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_import_time [--runs N] [--compare REV]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# Modules whose presence after the import is reported
+WATCHED = ("google.genai", "alembic")
+TOP_PACKAGES = 8
+
+PROBE = (
+    "import sys, time\n"
+    "began = time.perf_counter()\n"
+    "import app.main\n"
+    "print(round((time.perf_counter() - began) * 1000, 1))\n"
+    f"print(','.join(name for name in {WATCHED!r} if name in sys.modules))\n"
+)
+
+
+def _run_once(backend_dir: Path) -> dict:
+    """Import the app in a fresh interpreter and parse its -X importtime report"""
+    workdir = tempfile.mkdtemp()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "SECRET_KEY": "benchmark",
+        # Older revisions refuse to start without one
+        "GEMINI_API_KEY": "benchmark",
+    }
+    try:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE],
+            cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Lines look like "import time: <self us> | <cumulative us> | <module>"; each
+    # module's own time is added to its top-level package
+    packages: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        package = fields[2].strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(fields[0]) / 1000
+
+    # The app may print its own messages first
+    wall_ms, loaded = result.stdout.splitlines()[-2:]
+    return {"wall_ms": float(wall_ms), "packages": packages, "loaded": [name for name in loaded.split(",") if name]}
+
+
+def measure(backend_dir: Path, runs: int) -> dict:
+    """Median wall time over several runs, with the package breakdown of the median run"""
+    # Unmeasured first run, so bytecode compilation is not counted
+    _run_once(backend_dir)
+    samples = sorted((_run_once(backend_dir) for _ in range(runs)), key=lambda sample: sample["wall_ms"])
+    median = samples[len(samples) // 2]
+    return {
+        "wall_ms": statistics.median(sample["wall_ms"] for sample in samples),
+        "packages": median["packages"],
+        "loaded": median["loaded"],
+    }
+
+
+def _report(label: str, result: dict) -> None:
+    print(f"{label}: import app.main took {result['wall_ms']:.0f} ms (median)")
+    print(f"  loaded: {', '.join(result['loaded']) or 'neither the Gemini SDK nor Alembic'}")
+    heaviest = sorted(result["packages"].items(), key=lambda item: -item[1])[:TOP_PACKAGES]
+    for package, ms in heaviest:
+        print(f"  {package:<24}{ms:>9.1f} ms")
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def measure_revision(revision: str, runs: int) -> dict:
+    """Measure a git revision, checked out in a temporary worktree"""
+    top = Path(_git("rev-parse", "--show-toplevel"))
+    tree = Path(tempfile.mkdtemp()) / "tree"
+    _git("worktree", "add", "--detach", str(tree), revision)
+    try:
+        return measure(tree / BACKEND_DIR.relative_to(top), runs)
+    finally:
+        _git("worktree", "remove", "--force", str(tree))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--compare", metavar="REV", help="git revision to measure as well, e.g. HEAD~1")
+    args = parser.parse_args(argv)
+
+    before = None
+    if args.compare:
+        before = measure_revision(args.compare, args.runs)
+        _report(args.compare, before)
+
+    began = time.perf_counter()
+    after = measure(BACKEND_DIR, args.runs)
+    _report("working tree", after)
+    print(f"({args.runs} runs in {time.perf_counter() - began:.1f} s)")
+
+    if before is not None:
+        saved = before["wall_ms"] - after["wall_ms"]
+        print(f"Import time: {before['wall_ms']:.0f} ms -> {after['wall_ms']:.0f} ms "
+              f"({saved:.0f} ms, {saved / before['wall_ms']:.0%} faster)")
+
+
+if __name__ == "__main__":
+    main()
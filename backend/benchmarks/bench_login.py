@@ -0,0 +1,101 @@
+"""Benchmark login throughput under concurrency.
+
+Seeds a throwaway SQLite database with users, then fires concurrent
+POST /auth/login requests at the app in-process and reports logins/sec,
+together with the latency of /health requests made during the run (which
+stays low when hashing is kept off the event loop).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_login [--concurrency N] [--logins N] [--executor process|thread]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.core.migrations import upgrade_database  # noqa: E402
+from app.core.security import get_password_hash, shutdown_hash_executor  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+USERS = 20
+PASSWORD = "benchmark-password"
+
+
+def seed() -> None:
+    hashed_password = get_password_hash(PASSWORD)
+    with SessionLocal() as db:
+        for index in range(USERS):
+            db.add(User(email=f"user{index}@example.com", full_name="Bench", hashed_password=hashed_password))
+        db.commit()
+
+
+async def run(concurrency: int, logins: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue = asyncio.Queue()
+        for index in range(logins):
+            queue.put_nowait(index)
+        statuses = {}
+
+        async def login_worker():
+            while not queue.empty():
+                index = queue.get_nowait()
+                response = await client.post("/auth/login", json={
+                    "email": f"user{index % USERS}@example.com", "password": PASSWORD
+                })
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        health_latencies = []
+        done = asyncio.Event()
+
+        async def health_probe():
+            while not done.is_set():
+                began = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append((time.perf_counter() - began) * 1000)
+                await asyncio.sleep(0.01)
+
+        probe = asyncio.create_task(health_probe())
+        began = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - began
+        done.set()
+        await probe
+
+    print(f"executor={settings.password_hash_executor} rounds={settings.bcrypt_rounds} "
+          f"concurrency={concurrency}")
+    print(f"  {logins / elapsed:.1f} logins/sec ({logins} logins in {elapsed:.2f}s), statuses {statuses}")
+    if health_latencies:
+        print(f"  /health during run: p50 {statistics.median(health_latencies):.1f} ms, "
+              f"max {max(health_latencies):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--executor", choices=["process", "thread"], default=settings.password_hash_executor)
+    args = parser.parse_args()
+
+    settings.password_hash_executor = args.executor
+    upgrade_database()
+    seed()
+    try:
+        asyncio.run(run(args.concurrency, args.logins))
+    finally:
+        shutdown_hash_executor()
+
+
+if __name__ == "__main__":
+    main()
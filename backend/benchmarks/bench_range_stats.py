@@ -0,0 +1,97 @@
+"""Benchmark /transactions/stats over arbitrary date ranges.
+
+Seeds a throwaway SQLite database with one user and ten years of
+transactions, then times the stats computation for ranges from one month
+to ten years, answered from the running daily sums and from a scan of the
+transactions table.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_range_stats [--per-day N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from sqlalchemy import insert  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import engine, Base, SessionLocal  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.transaction import Transaction, TransactionType, TransactionCategory  # noqa: E402
+from app.models.budget import Budget  # noqa: E402
+from app.models.rollup import UserMonthlyRollup, UserDailySum  # noqa: E402
+from app.services.rollups import rebuild_rollups  # noqa: E402
+from app.services.daily_sums import rebuild_daily_sums  # noqa: E402
+from app.services.transaction_stats import compute_transaction_stats  # noqa: E402
+
+START = datetime(2015, 1, 1)
+YEARS = 10
+RANGES = [("1 month", 31), ("1 year", 365), ("5 years", 5 * 365), ("10 years", YEARS * 365 - 2)]
+
+
+def seed(per_day: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    categories = list(TransactionCategory)
+
+    with SessionLocal() as db:
+        user = User(email="bench@example.com", full_name="Bench", hashed_password="x")
+        db.add(user)
+        db.commit()
+
+        rows = []
+        for day in range(YEARS * 365):
+            for _ in range(per_day):
+                rows.append({
+                    "user_id": user.id,
+                    "type": rng.choice(list(TransactionType)),
+                    "category": rng.choice(categories),
+                    "amount": round(rng.uniform(1, 500), 2),
+                    "date": START + timedelta(days=day, minutes=rng.randint(0, 1439)),
+                })
+        db.execute(insert(Transaction), rows)
+        rebuild_rollups(db)
+        rebuild_daily_sums(db)
+        db.commit()
+        return user.id
+
+
+def time_stats(user_id: int, days: int, repeat: int) -> float:
+    # Start mid-morning so the range never lines up with whole months
+    start_date = START + timedelta(days=1, hours=10, minutes=30)
+    end_date = start_date + timedelta(days=days)
+    with SessionLocal() as db:
+        compute_transaction_stats(db, user_id, start_date, end_date)
+        began = time.perf_counter()
+        for _ in range(repeat):
+            compute_transaction_stats(db, user_id, start_date, end_date)
+        return (time.perf_counter() - began) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--per-day", type=int, default=10, help="transactions per day")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = seed(args.per_day)
+    print(f"{args.per_day * YEARS * 365} transactions over {YEARS} years\n")
+    print(f"{'range':<10} {'daily sums (ms)':>16} {'table scan (ms)':>16}")
+
+    for label, days in RANGES:
+        settings.daily_sums_enabled = True
+        with_sums = time_stats(user_id, days, args.repeat)
+        settings.daily_sums_enabled = False
+        without_sums = time_stats(user_id, days, args.repeat)
+        print(f"{label:<10} {with_sums:>16.2f} {without_sums:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Microbenchmark serializing a page of transactions to a JSON response body.
+
+Seeds a throwaway SQLite database with 1,000 transactions and times three
+ways of turning them into response bytes, each including the query:
+
+  before:   ORM objects, validated into TransactionResponse models (what
+            response_model did) and rendered by JSONResponse
+  orjson:   the same, rendered by ORJSONResponse
+  after:    column tuples dumped straight to JSON by the TypeAdapter that
+            GET /transactions now uses
+
+It also checks that all three produce the same JSON document.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_serialization [--rows N] [--repeat N]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+
+def seed(rows: int) -> None:
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal
+    from app.core.migrations import upgrade_database
+    from app.models.transaction import Transaction, TransactionType, TransactionCategory
+    from app.models.user import User
+
+    upgrade_database()
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    with SessionLocal() as db:
+        db.add(User(email="serialize@example.com", full_name="Bench", hashed_password="x"))
+        db.commit()
+        db.execute(insert(Transaction.__table__), [
+            {
+                "user_id": 1,
+                "type": rng.choice(list(TransactionType)),
+                "category": rng.choice(list(TransactionCategory)),
+                "amount": round(rng.uniform(1, 500), 2),
+                "description": rng.choice([None, "Card payment", "Transfer"]),
+                "date": start + timedelta(minutes=37 * index)
+            }
+            for index in range(rows)
+        ])
+        db.commit()
+
+
+def best_of(repeat: int, func) -> float:
+    times = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - began)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    from typing import List
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from pydantic import TypeAdapter
+    from app.core.database import SessionLocal
+    from app.models.transaction import Transaction
+    from app.services.transaction_list import LIST_COLUMNS
+    from app.schemas.transaction import TransactionResponse, transaction_rows_adapter
+
+    seed(args.rows)
+    models = TypeAdapter(List[TransactionResponse])
+    ordering = (Transaction.date.desc(), Transaction.id.desc())
+
+    def before(db, response_class=JSONResponse) -> bytes:
+        transactions = db.query(Transaction).order_by(*ordering).limit(args.rows).all()
+        validated = models.validate_python(transactions, from_attributes=True)
+        return response_class(models.dump_python(validated, mode="json")).body
+
+    def after(db) -> bytes:
+        rows = [row._asdict() for row in db.query(*LIST_COLUMNS).order_by(*ordering).limit(args.rows)]
+        return transaction_rows_adapter.dump_json(rows)
+
+    with SessionLocal() as db:
+        bodies = [before(db), before(db, ORJSONResponse), after(db)]
+        same = all(json.loads(body) == json.loads(bodies[0]) for body in bodies)
+        # Each run starts from an empty identity map, like a fresh request
+        timings = [
+            ("before", lambda: (db.expunge_all(), before(db))),
+            ("orjson", lambda: (db.expunge_all(), before(db, ORJSONResponse))),
+            ("after", lambda: (db.expunge_all(), after(db)))
+        ]
+        results = [(name, best_of(args.repeat, func)) for name, func in timings]
+
+    baseline = results[0][1]
+    print(f"Serializing {args.rows} transactions (best of {args.repeat}), {len(bodies[2]) / 1e3:.0f} kB")
+    for name, elapsed in results:
+        print(f"  {name:7} {elapsed * 1000:7.2f} ms  ({baseline / elapsed:4.1f}x)")
+    print(f"  identical JSON: {'yes' if same else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
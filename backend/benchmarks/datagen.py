@@ -0,0 +1,166 @@
+"""Generate synthetic users with years of realistic transactions and budgets.
+
+Each user gets a monthly salary and occasional freelance income, fixed
+monthly housing and utility bills, and daily spending on food and transport
+with weekend entertainment and sporadic shopping, healthcare and education.
+Amounts, habits and income levels vary per user. Every user also gets
+monthly budgets for the last year and a yearly budget. The rollups and daily
+sums are rebuilt afterwards, as after an import. The same seed always gives
+the same data.
+
+Every user's password is `PASSWORD`, and user i has the email
+`user{i}@bench.example.com`.
+
+Usage (from the backend directory, against the configured DATABASE_URL):
+    python -m benchmarks.datagen [--users N] [--years N] [--seed N]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+
+PASSWORD = "benchmark-password"
+# Transactions inserted per executemany
+INSERT_CHUNK = 20_000
+BUDGET_CATEGORIES = ("food", "transport", "entertainment", "shopping")
+
+
+def user_email(index: int) -> str:
+    return f"user{index}@bench.example.com"
+
+
+def _user_transactions(rng: random.Random, user_id: int, start: datetime, end: datetime) -> Iterator[dict]:
+    """One user's history, day by day"""
+    from app.models.transaction import TransactionType, TransactionCategory as C
+
+    income, expense = TransactionType.INCOME, TransactionType.EXPENSE
+    salary = rng.choice((45_000, 60_000, 80_000, 120_000, 200_000))
+    rent = round(salary * rng.uniform(0.2, 0.35), -2)
+    food_per_day = rng.uniform(1, 3)
+    commuter = rng.random() < 0.7
+
+    def entry(type, category, amount, description, date):
+        return {
+            "user_id": user_id, "type": type, "category": category,
+            "amount": round(amount, 2), "description": description, "date": date
+        }
+
+    day = start
+
+    def at(hour: int) -> datetime:
+        return day + timedelta(hours=hour, minutes=rng.randrange(60))
+
+    while day < end:
+        if day.day == 1:
+            yield entry(income, C.SALARY, salary * rng.uniform(0.98, 1.02), "Salary", at(9))
+            yield entry(expense, C.HOUSING, rent, "Rent", at(10))
+        if day.day == 5:
+            yield entry(expense, C.UTILITIES, rng.uniform(1500, 4000), "Electricity and water", at(11))
+            yield entry(expense, C.UTILITIES, rng.choice((499, 799, 999)), "Internet", at(11))
+        if rng.random() < 0.03:
+            yield entry(income, C.FREELANCE, rng.uniform(5_000, 40_000), "Freelance project", at(15))
+        if day.day == 15 and rng.random() < 0.3:
+            yield entry(income, C.INVESTMENT, rng.uniform(500, 5_000), "Dividends", at(12))
+
+        for _ in range(max(0, round(rng.gauss(food_per_day, 1)))):
+            description = rng.choice(("Groceries", "Lunch", "Coffee", "Dinner"))
+            yield entry(expense, C.FOOD, rng.lognormvariate(5.3, 0.6), description, at(rng.randrange(8, 22)))
+        if commuter and day.weekday() < 5 and rng.random() < 0.8:
+            yield entry(expense, C.TRANSPORT, rng.uniform(40, 300), "Commute", at(8))
+        if day.weekday() >= 5 and rng.random() < 0.5:
+            yield entry(expense, C.ENTERTAINMENT, rng.lognormvariate(6.5, 0.7), "Weekend out", at(19))
+        if rng.random() < 0.08:
+            yield entry(expense, C.SHOPPING, rng.lognormvariate(7, 0.9), "Online order", at(21))
+        if rng.random() < 0.02:
+            yield entry(expense, C.HEALTHCARE, rng.lognormvariate(7, 0.8), "Pharmacy", at(17))
+        if rng.random() < 0.01:
+            yield entry(expense, C.EDUCATION, rng.uniform(500, 10_000), "Course", at(20))
+        day += timedelta(days=1)
+
+
+def _user_budgets(rng: random.Random, user_id: int, end: datetime) -> Iterator[dict]:
+    """Monthly budgets for the last 12 months of the history plus a yearly one"""
+    from app.models.budget import BudgetPeriod
+
+    last_day = end - timedelta(days=1)
+    month = datetime(last_day.year, last_day.month, 1)
+    for _ in range(12):
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        for category in rng.sample(BUDGET_CATEGORIES, 2):
+            yield {
+                "user_id": user_id, "category": category, "amount": round(rng.uniform(2_000, 20_000), -2),
+                "period": BudgetPeriod.MONTHLY, "start_date": month, "end_date": next_month - timedelta(seconds=1)
+            }
+        month = (month - timedelta(days=1)).replace(day=1)
+    yield {
+        "user_id": user_id, "category": "shopping", "amount": round(rng.uniform(50_000, 200_000), -3),
+        "period": BudgetPeriod.YEARLY, "start_date": datetime(last_day.year, 1, 1),
+        "end_date": datetime(last_day.year, 12, 31, 23, 59, 59)
+    }
+
+
+def generate(users: int, years: float = 3, seed: int = 42, end: Optional[datetime] = None) -> List[int]:
+    """Create the users with their histories and budgets, returning the new user ids"""
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal
+    from app.core.security import get_password_hash
+    from app.models.budget import Budget
+    from app.models.transaction import Transaction
+    from app.models.user import User
+    from app.services.daily_sums import rebuild_daily_sums
+    from app.services.rollups import rebuild_rollups
+
+    rng = random.Random(seed)
+    end = end or datetime(2025, 1, 1)
+    start = end - timedelta(days=round(365 * years))
+    hashed_password = get_password_hash(PASSWORD)
+
+    with SessionLocal() as db:
+        accounts = [
+            User(email=user_email(index), full_name=f"Bench User {index}", hashed_password=hashed_password)
+            for index in range(users)
+        ]
+        db.add_all(accounts)
+        db.flush()
+        user_ids = [user.id for user in accounts]
+
+        chunk = []
+        for user_id in user_ids:
+            for row in _user_transactions(rng, user_id, start, end):
+                chunk.append(row)
+                if len(chunk) >= INSERT_CHUNK:
+                    db.execute(insert(Transaction.__table__), chunk)
+                    chunk = []
+            db.execute(insert(Budget.__table__), list(_user_budgets(rng, user_id, end)))
+        if chunk:
+            db.execute(insert(Transaction.__table__), chunk)
+
+        rebuild_rollups(db)
+        rebuild_daily_sums(db)
+        db.commit()
+    return user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from sqlalchemy import func
+    from app.core.database import SessionLocal
+    from app.core.migrations import upgrade_database
+    from app.models.transaction import Transaction
+
+    upgrade_database()
+    began = time.perf_counter()
+    user_ids = generate(args.users, args.years, args.seed)
+    with SessionLocal() as db:
+        count = db.query(func.count(Transaction.id)).filter(Transaction.user_id.in_(user_ids)).scalar()
+    print(f"Created {len(user_ids)} users with {count} transactions in {time.perf_counter() - began:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
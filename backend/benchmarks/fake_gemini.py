@@ -0,0 +1,74 @@
+"""A stand-in for the google-genai client, for load tests without API calls or quota.
+
+It answers generate_content and generate_content_stream after a configurable
+delay, with token usage metadata, so the AI routes, job workers, caches and
+metrics behave as they do against Gemini. install() puts it behind
+get_gemini_service() before the app starts.
+"""
+import asyncio
+import random
+from types import SimpleNamespace
+
+ANSWER = (
+    "Based on your recent spending, your food and entertainment costs are the "
+    "largest flexible categories. Setting a weekly limit for eating out and "
+    "moving the difference into savings each payday would keep you within "
+    "budget while building an emergency fund of three to six months of expenses."
+)
+
+
+class _FakeModels:
+    def __init__(self, latency: float, chunk_delay: float, chunks: int):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+
+    def _usage(self, contents) -> SimpleNamespace:
+        return SimpleNamespace(
+            prompt_token_count=len(str(contents).split()) + 200,
+            cached_content_token_count=None,
+            candidates_token_count=len(ANSWER.split())
+        )
+
+    async def generate_content(self, model, config, contents):
+        # +-25% jitter around the configured latency
+        await asyncio.sleep(self.latency * random.uniform(0.75, 1.25))
+        return SimpleNamespace(text=ANSWER, usage_metadata=self._usage(contents))
+
+    async def generate_content_stream(self, model, config, contents):
+        await asyncio.sleep(self.latency * random.uniform(0.75, 1.25))
+        words = ANSWER.split(" ")
+        size = max(1, len(words) // self.chunks)
+        pieces = [" ".join(words[index:index + size]) + " " for index in range(0, len(words), size)]
+        usage = self._usage(contents)
+
+        async def chunks():
+            for index, piece in enumerate(pieces):
+                if index:
+                    await asyncio.sleep(self.chunk_delay)
+                last = index == len(pieces) - 1
+                yield SimpleNamespace(text=piece, usage_metadata=usage if last else None)
+
+        return chunks()
+
+
+class _FakeCaches:
+    async def create(self, model, config):
+        raise RuntimeError("prompt caching is not simulated")
+
+
+class FakeGeminiClient:
+    """Mimics the parts of genai.Client the Gemini service uses"""
+
+    def __init__(self, latency: float = 0.8, chunk_delay: float = 0.05, chunks: int = 8):
+        self.aio = SimpleNamespace(models=_FakeModels(latency, chunk_delay, chunks), caches=_FakeCaches())
+
+
+def install(latency: float = 0.8, chunk_delay: float = 0.05) -> FakeGeminiClient:
+    """Make get_gemini_service() build the Gemini service around a fake client"""
+    from app.services import gemini
+
+    fake = FakeGeminiClient(latency, chunk_delay)
+    gemini.client = fake
+    gemini._service = None
+    return fake
@@ -0,0 +1,428 @@
+"""End-to-end load test of every router against a synthetic dataset.
+
+Seeds a database with benchmarks.datagen (a throwaway SQLite file by
+default, or --database-url for a local MySQL server). AI calls go to the
+fake Gemini client in benchmarks.fake_gemini. The harness then drives the
+app in-process with --concurrency virtual users for --duration seconds.
+Each virtual user logs in as one of the generated users and picks requests
+by weight from SCENARIO: auth, transaction reads and writes, batch, import
+and export, budgets, and the AI assistant, stream and jobs. The client
+shares the event loop with the app, as in bench_async_db, so latencies
+include its overhead.
+
+Prints throughput and p50/p95/p99 per endpoint. --output writes the same
+numbers as JSON, and --compare prints the change against an earlier JSON
+report, e.g. one taken before a change.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest [--concurrency N] [--duration S] [--users N] [--years N]
+        [--database-url URL] [--skip-seed] [--async-db] [--output report.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Range of the generated histories (see benchmarks.datagen)
+DATA_END = datetime(2025, 1, 1)
+
+QUESTIONS = (
+    "How can I reduce my food spending?",
+    "Am I saving enough each month?",
+    "Which budget am I most likely to exceed?",
+    "Should I build an emergency fund first or invest?",
+    "How did my expenses change over the last three months?",
+)
+
+# Statuses that count as successful; anything else is reported as an error
+OK_STATUSES = {200, 201, 202, 204}
+
+
+class VirtualUser:
+    """One simulated client: a logged-in generated user and the ids it has seen"""
+
+    def __init__(self, client, index: int, rng: random.Random):
+        self.client = client
+        self.index = index
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+        self.transaction_ids: List[int] = []
+        self.created_ids: List[int] = []
+        self.budget_ids: List[int] = []
+        self.job_ids: List[int] = []
+
+    def random_range(self, max_days: int = 120) -> Dict[str, str]:
+        end = DATA_END - timedelta(days=self.rng.randrange(365), hours=self.rng.randrange(24))
+        start = end - timedelta(days=self.rng.randrange(1, max_days), hours=self.rng.randrange(24))
+        return {"start_date": start.isoformat(), "end_date": end.isoformat()}
+
+    def transaction(self) -> dict:
+        date = DATA_END - timedelta(days=self.rng.randrange(365), minutes=self.rng.randrange(1440))
+        return {
+            "type": "expense",
+            "category": self.rng.choice(("food", "transport", "shopping", "entertainment")),
+            "amount": round(self.rng.uniform(5, 500), 2),
+            "description": "Load test",
+            "date": date.isoformat()
+        }
+
+    def question(self) -> str:
+        # Half repeat common questions (advice cache hits), half are new
+        if self.rng.random() < 0.5:
+            return self.rng.choice(QUESTIONS)
+        return f"What should I change to save {self.rng.randrange(1000, 50000)} more this year?"
+
+
+# Scenario steps: each sends one request and returns the response
+
+async def login(user: VirtualUser):
+    from benchmarks.datagen import PASSWORD, user_email
+    response = await user.client.post("/auth/login", json={"email": user_email(user.index), "password": PASSWORD})
+    if response.status_code == 200:
+        user.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return response
+
+
+async def me(user: VirtualUser):
+    return await user.client.get("/auth/me", headers=user.headers)
+
+
+async def list_transactions(user: VirtualUser):
+    response = await user.client.get("/transactions", params={"limit": 50}, headers=user.headers)
+    if response.status_code == 200:
+        user.transaction_ids = [item["id"] for item in response.json()]
+    return response
+
+
+async def list_transactions_cursor(user: VirtualUser):
+    response = await user.client.get("/transactions", params={"limit": 50, "cursor": ""}, headers=user.headers)
+    cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+    if cursor:
+        response = await user.client.get("/transactions", params={"limit": 50, "cursor": cursor}, headers=user.headers)
+    return response
+
+
+async def filter_transactions(user: VirtualUser):
+    params = {"type": user.rng.choice(("income", "expense")), "limit": 100, **user.random_range()}
+    return await user.client.get("/transactions", params=params, headers=user.headers)
+
+
+async def get_transaction(user: VirtualUser):
+    if not user.transaction_ids:
+        return await list_transactions(user)
+    transaction_id = user.rng.choice(user.transaction_ids)
+    return await user.client.get(f"/transactions/{transaction_id}", headers=user.headers)
+
+
+async def stats(user: VirtualUser):
+    return await user.client.get("/transactions/stats", params=user.random_range(400), headers=user.headers)
+
+
+async def export(user: VirtualUser):
+    return await user.client.get("/transactions/export", params=user.random_range(31), headers=user.headers)
+
+
+async def create_transaction(user: VirtualUser):
+    response = await user.client.post("/transactions", json=user.transaction(), headers=user.headers)
+    if response.status_code == 201:
+        user.created_ids.append(response.json()["id"])
+    return response
+
+
+async def update_transaction(user: VirtualUser):
+    if not user.created_ids:
+        return await create_transaction(user)
+    transaction_id = user.rng.choice(user.created_ids)
+    return await user.client.put(
+        f"/transactions/{transaction_id}", json={"amount": round(user.rng.uniform(5, 500), 2)}, headers=user.headers
+    )
+
+
+async def delete_transaction(user: VirtualUser):
+    if not user.created_ids:
+        return await create_transaction(user)
+    transaction_id = user.created_ids.pop(user.rng.randrange(len(user.created_ids)))
+    return await user.client.delete(f"/transactions/{transaction_id}", headers=user.headers)
+
+
+async def batch(user: VirtualUser):
+    operations = [{"op": "create", "data": user.transaction()} for _ in range(8)]
+    operations += [{"op": "update", "id": id, "data": {"category": "food"}} for id in user.created_ids[-2:]]
+    return await user.client.post("/transactions/batch", json={"operations": operations}, headers=user.headers)
+
+
+async def import_file(user: VirtualUser):
+    rows = ["date,amount,category,description"]
+    for _ in range(50):
+        transaction = user.transaction()
+        rows.append(f"{transaction['date']},-{transaction['amount']},{transaction['category']},Imported")
+    data = ("\n".join(rows) + "\n").encode()
+    return await user.client.post("/transactions/import", files={"file": ("bank.csv", data)}, headers=user.headers)
+
+
+async def list_budgets(user: VirtualUser):
+    response = await user.client.get("/budgets", headers=user.headers)
+    if response.status_code == 200:
+        user.budget_ids = [budget["id"] for budget in response.json()]
+    return response
+
+
+async def get_budget(user: VirtualUser):
+    if not user.budget_ids:
+        return await list_budgets(user)
+    return await user.client.get(f"/budgets/{user.rng.choice(user.budget_ids)}", headers=user.headers)
+
+
+async def create_budget(user: VirtualUser):
+    start = datetime(2024, user.rng.randrange(1, 13), 1)
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+    return await user.client.post("/budgets", headers=user.headers, json={
+        "category": user.rng.choice(("food", "transport", "shopping")),
+        "amount": round(user.rng.uniform(1000, 10000), -2),
+        "period": "monthly",
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat()
+    })
+
+
+async def ai_assistant(user: VirtualUser):
+    return await user.client.post("/ai/assistant", json={"query": user.question()}, headers=user.headers)
+
+
+async def ai_stream(user: VirtualUser):
+    # The response is read to the end, so this times the whole stream
+    return await user.client.post("/ai/assistant/stream", json={"query": user.question()}, headers=user.headers)
+
+
+async def submit_job(user: VirtualUser):
+    response = await user.client.post(
+        "/ai/jobs", json={"query": user.question(), "priority": user.rng.randrange(10)}, headers=user.headers
+    )
+    if response.status_code == 202:
+        user.job_ids.append(response.json()["id"])
+    return response
+
+
+async def poll_job(user: VirtualUser):
+    if not user.job_ids:
+        return await submit_job(user)
+    return await user.client.get(f"/ai/jobs/{user.rng.choice(user.job_ids)}", headers=user.headers)
+
+
+# (endpoint name, step, weight)
+SCENARIO = [
+    ("POST /auth/login", login, 1),
+    ("GET /auth/me", me, 3),
+    ("GET /transactions", list_transactions, 15),
+    ("GET /transactions?cursor", list_transactions_cursor, 6),
+    ("GET /transactions?type&range", filter_transactions, 6),
+    ("GET /transactions/{id}", get_transaction, 5),
+    ("GET /transactions/stats", stats, 10),
+    ("GET /transactions/export", export, 1),
+    ("POST /transactions", create_transaction, 6),
+    ("PUT /transactions/{id}", update_transaction, 3),
+    ("DELETE /transactions/{id}", delete_transaction, 2),
+    ("POST /transactions/batch", batch, 1),
+    ("POST /transactions/import", import_file, 1),
+    ("GET /budgets", list_budgets, 8),
+    ("GET /budgets/{id}", get_budget, 3),
+    ("POST /budgets", create_budget, 1),
+    ("POST /ai/assistant", ai_assistant, 2),
+    ("POST /ai/assistant/stream", ai_stream, 1),
+    ("POST /ai/jobs", submit_job, 1),
+    ("GET /ai/jobs/{id}", poll_job, 2),
+]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def summarize(latencies: List[float], statuses: Dict[int, int], elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if status not in OK_STATUSES)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())}
+    }
+
+
+async def drive(args, user_count: int) -> dict:
+    import httpx
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    names = [name for name, _, _ in SCENARIO]
+    steps: Dict[str, Callable[[VirtualUser], Awaitable]] = {name: step for name, step, _ in SCENARIO}
+    weights = [weight for _, _, weight in SCENARIO]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    statuses: Dict[str, Dict[int, int]] = {name: {} for name in names}
+    recording = False
+
+    async def timed(name: str, user: VirtualUser) -> None:
+        began = time.perf_counter()
+        try:
+            status = (await steps[name](user)).status_code
+        except Exception:
+            status = 599
+        if recording:
+            latencies[name].append((time.perf_counter() - began) * 1000)
+            statuses[name][status] = statuses[name].get(status, 0) + 1
+
+    async def virtual_user(index: int, deadline: float) -> None:
+        user = VirtualUser(client, index % user_count, random.Random(rng.random()))
+        await timed("POST /auth/login", user)
+        await timed("GET /transactions", user)
+        while time.perf_counter() < deadline:
+            await timed(user.rng.choices(names, weights)[0], user)
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            if args.warmup:
+                await asyncio.gather(*(
+                    virtual_user(index, time.perf_counter() + args.warmup) for index in range(args.concurrency)
+                ))
+            recording = True
+            began = time.perf_counter()
+            deadline = began + args.duration
+            await asyncio.gather(*(virtual_user(index, deadline) for index in range(args.concurrency)))
+            elapsed = time.perf_counter() - began
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    all_statuses: Dict[int, int] = {}
+    for endpoint_statuses in statuses.values():
+        for status, count in endpoint_statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    return {
+        "overall": summarize(all_latencies, all_statuses, elapsed),
+        "endpoints": {
+            name: summarize(latencies[name], statuses[name], elapsed) for name in names if latencies[name]
+        },
+        "elapsed_s": round(elapsed, 2)
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict) -> None:
+    meta = report["meta"]
+    print(f"{meta['concurrency']} virtual users for {meta['duration_s']} s on {meta['database']} "
+          f"({'async' if meta['database_async'] else 'sync'} DB layer), "
+          f"{meta['users']} users x {meta['years']} years of data")
+    print(f"{'endpoint':32} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, row in rows:
+        print(f"{name:32} {row['requests']:8} {row['requests_per_second']:8.1f} {row['p50_ms']:8.1f} "
+              f"{row['p95_ms']:8.1f} {row['p99_ms']:8.1f} {row['errors']:7}")
+
+
+def print_comparison(report: dict, baseline: dict) -> None:
+    """Relative change of throughput and latency percentiles against a baseline report"""
+    def change(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+7.1f}%" if old else "     n/a"
+
+    print(f"\nCompared with {baseline['meta'].get('git_commit') or 'baseline'} "
+          f"({baseline['meta'].get('started', '?')}); negative latency changes are improvements")
+    print(f"{'endpoint':32} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    rows = [(name, row, baseline["endpoints"].get(name)) for name, row in report["endpoints"].items()]
+    rows.append(("overall", report["overall"], baseline["overall"]))
+    for name, row, old in rows:
+        if old is None:
+            continue
+        print(f"{name:32} {change(row['requests_per_second'], old['requests_per_second'])} "
+              f"{change(row['p50_ms'], old['p50_ms'])} {change(row['p95_ms'], old['p95_ms'])} "
+              f"{change(row['p99_ms'], old['p99_ms'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of unmeasured load first")
+    parser.add_argument("--users", type=int, default=50, help="generated users")
+    parser.add_argument("--years", type=float, default=3, help="years of history per user")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default=None, help="default: a new SQLite file")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse users generated by an earlier run")
+    parser.add_argument("--async-db", action="store_true", help="run with DATABASE_ASYNC on")
+    parser.add_argument("--ai-latency", type=float, default=0.8, help="seconds the fake Gemini takes to answer")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--compare", help="JSON report to compare against")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DATABASE_ASYNC"] = "true" if args.async_db else "false"
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+    from benchmarks import fake_gemini
+    fake_gemini.install(latency=args.ai_latency)
+    from app.core.migrations import upgrade_database
+
+    upgrade_database()
+    if not args.skip_seed:
+        from benchmarks.datagen import generate
+        began = time.perf_counter()
+        generate(args.users, args.years, args.seed, end=DATA_END)
+        print(f"Seeded {args.users} users in {time.perf_counter() - began:.1f} s")
+
+    started = datetime.now().isoformat(timespec="seconds")
+    result = asyncio.run(drive(args, args.users))
+    report = {
+        "meta": {
+            "started": started,
+            "git_commit": _git_commit(),
+            "database": database_url.split("://")[0],
+            "database_async": args.async_db,
+            "concurrency": args.concurrency,
+            "duration_s": result.pop("elapsed_s"),
+            "users": args.users,
+            "years": args.years,
+            "seed": args.seed,
+            "ai_latency_s": args.ai_latency,
+            "python": platform.python_version()
+        },
+        **result
+    }
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+    sys.exit(1 if report["overall"]["requests"] == 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
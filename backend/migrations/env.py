@@ -0,0 +1,49 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.core.database import engine, Base
+
+# Import all models so their tables are registered on the metadata
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.models.budget import Budget
+from app.models.rollup import UserMonthlyRollup, UserDailySum
+from app.models.ai_job import AIJob
+from app.models.data_version import UserDataVersion
+
+config = context.config
+
+# Only configure logging when run from the alembic CLI, not from the app
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode, emitting SQL to stdout"""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations against the application database engine"""
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,85 @@
+"""initial schema
+
+Creates the users, transactions and budgets tables as they were originally
+built by ``Base.metadata.create_all``. Databases that already have these
+tables are left untouched, so existing deployments can be upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-01-06 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRANSACTION_TYPES = ("INCOME", "EXPENSE")
+TRANSACTION_CATEGORIES = (
+    "SALARY", "FREELANCE", "INVESTMENT", "OTHER_INCOME",
+    "FOOD", "TRANSPORT", "HOUSING", "UTILITIES", "ENTERTAINMENT",
+    "HEALTHCARE", "SHOPPING", "EDUCATION", "OTHER_EXPENSE",
+)
+BUDGET_PERIODS = ("MONTHLY", "YEARLY")
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(255), nullable=False),
+            sa.Column("full_name", sa.String(255), nullable=False),
+            sa.Column("hashed_password", sa.String(255), nullable=False),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "transactions" not in existing:
+        op.create_table(
+            "transactions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("type", sa.Enum(*TRANSACTION_TYPES, name="transactiontype"), nullable=False),
+            sa.Column("category", sa.Enum(*TRANSACTION_CATEGORIES, name="transactioncategory"), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("description", sa.String(500)),
+            sa.Column("date", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_transactions_id", "transactions", ["id"])
+
+    if "budgets" not in existing:
+        op.create_table(
+            "budgets",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("category", sa.String(100), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("period", sa.Enum(*BUDGET_PERIODS, name="budgetperiod"), nullable=False),
+            sa.Column("start_date", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("end_date", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_budgets_id", "budgets", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("budgets")
+    op.drop_table("transactions")
+    op.drop_table("users")
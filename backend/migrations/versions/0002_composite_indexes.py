@@ -0,0 +1,42 @@
+"""composite indexes for transactions and budgets
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-01-06 00:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_transactions_user_date", "transactions", ["user_id", "date"]),
+    ("ix_transactions_user_type_date", "transactions", ["user_id", "type", "date"]),
+    ("ix_transactions_user_type_category_date", "transactions", ["user_id", "type", "category", "date", "amount"]),
+    ("ix_budgets_user_category_start", "budgets", ["user_id", "category", "start_date"]),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,67 @@
+"""user monthly rollups
+
+Creates the per-user monthly rollup table and backfills it from the
+existing transactions.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-01-13 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRANSACTION_TYPES = ("INCOME", "EXPENSE")
+TRANSACTION_CATEGORIES = (
+    "SALARY", "FREELANCE", "INVESTMENT", "OTHER_INCOME",
+    "FOOD", "TRANSPORT", "HOUSING", "UTILITIES", "ENTERTAINMENT",
+    "HEALTHCARE", "SHOPPING", "EDUCATION", "OTHER_EXPENSE",
+)
+
+
+def upgrade() -> None:
+    rollups = op.create_table(
+        "user_monthly_rollups",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("month", sa.Integer(), primary_key=True),
+        sa.Column("type", sa.Enum(*TRANSACTION_TYPES, name="transactiontype"), primary_key=True),
+        sa.Column("category", sa.Enum(*TRANSACTION_CATEGORIES, name="transactioncategory"), primary_key=True),
+        sa.Column("total", sa.Double(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+
+    transactions = sa.table(
+        "transactions",
+        sa.column("id", sa.Integer()),
+        sa.column("user_id", sa.Integer()),
+        sa.column("type", sa.String()),
+        sa.column("category", sa.String()),
+        sa.column("amount", sa.Float()),
+        sa.column("date", sa.DateTime()),
+    )
+    month = sa.extract("year", transactions.c.date) * 100 + sa.extract("month", transactions.c.date)
+    op.execute(rollups.insert().from_select(
+        ["user_id", "month", "type", "category", "total", "count"],
+        sa.select(
+            transactions.c.user_id,
+            month,
+            transactions.c.type,
+            transactions.c.category,
+            sa.func.sum(transactions.c.amount),
+            sa.func.count(transactions.c.id),
+        ).group_by(transactions.c.user_id, month, transactions.c.type, transactions.c.category)
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table("user_monthly_rollups")
@@ -0,0 +1,77 @@
+"""user daily running sums
+
+Creates the per-user running daily sums table and backfills it from the
+existing transactions.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-01-20 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRANSACTION_TYPES = ("INCOME", "EXPENSE")
+TRANSACTION_CATEGORIES = (
+    "SALARY", "FREELANCE", "INVESTMENT", "OTHER_INCOME",
+    "FOOD", "TRANSPORT", "HOUSING", "UTILITIES", "ENTERTAINMENT",
+    "HEALTHCARE", "SHOPPING", "EDUCATION", "OTHER_EXPENSE",
+)
+
+
+def upgrade() -> None:
+    sums = op.create_table(
+        "user_daily_sums",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("type", sa.Enum(*TRANSACTION_TYPES, name="transactiontype"), primary_key=True),
+        sa.Column("category", sa.Enum(*TRANSACTION_CATEGORIES, name="transactioncategory"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("cum_total", sa.Double(), nullable=False),
+        sa.Column("cum_count", sa.Integer(), nullable=False),
+    )
+
+    transactions = sa.table(
+        "transactions",
+        sa.column("id", sa.Integer()),
+        sa.column("user_id", sa.Integer()),
+        sa.column("type", sa.String()),
+        sa.column("category", sa.String()),
+        sa.column("amount", sa.Float()),
+        sa.column("date", sa.DateTime()),
+    )
+    day = sa.func.date(transactions.c.date).label("day")
+    daily = sa.select(
+        transactions.c.user_id,
+        transactions.c.type,
+        transactions.c.category,
+        day,
+        sa.func.sum(transactions.c.amount).label("total"),
+        sa.func.count(transactions.c.id).label("count"),
+    ).group_by(transactions.c.user_id, transactions.c.type, transactions.c.category, day).subquery()
+
+    series = (daily.c.user_id, daily.c.type, daily.c.category)
+    op.execute(sums.insert().from_select(
+        ["user_id", "type", "category", "day", "cum_total", "cum_count"],
+        sa.select(
+            daily.c.user_id,
+            daily.c.type,
+            daily.c.category,
+            daily.c.day,
+            sa.func.sum(daily.c.total).over(partition_by=series, order_by=daily.c.day),
+            sa.func.sum(daily.c.count).over(partition_by=series, order_by=daily.c.day),
+        )
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table("user_daily_sums")
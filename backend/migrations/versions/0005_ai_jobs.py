@@ -0,0 +1,47 @@
+"""ai jobs
+
+Creates the table backing the asynchronous AI job queue.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-01-27 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+AI_JOB_STATUSES = ("QUEUED", "RUNNING", "SUCCEEDED", "FAILED")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ai_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("query", sa.Text(), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("status", sa.Enum(*AI_JOB_STATUSES, name="aijobstatus"), nullable=False),
+        sa.Column("result", sa.Text()),
+        sa.Column("error", sa.String(500)),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True)),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_ai_jobs_id", "ai_jobs", ["id"])
+    op.create_index("ix_ai_jobs_status_created", "ai_jobs", ["status", "created_at"])
+    op.create_index("ix_ai_jobs_user_created", "ai_jobs", ["user_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("ai_jobs")
@@ -0,0 +1,34 @@
+"""user data versions
+
+Creates the per-user data version counters behind the ETags of the
+transaction and budget GET endpoints. Users without a row are at version 0,
+so nothing needs backfilling.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-02-03 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_data_versions",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_data_versions")
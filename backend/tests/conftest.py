@@ -0,0 +1,86 @@
+import itertools
+import os
+import tempfile
+
+# Settings are read when the app is imported, so configure a throwaway
+# database and fast password hashing first
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_HASH_EXECUTOR", "thread")
+os.environ.setdefault("METRICS_ENABLED", "false")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from app.core.database import engine  # noqa: E402
+from app.core.migrations import upgrade_database  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.gemini import GeminiService, get_gemini_service  # noqa: E402
+from benchmarks.fake_gemini import FakeGeminiClient  # noqa: E402
+
+_emails = itertools.count()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    upgrade_database()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def register(client):
+    """Register a new user and return their Authorization header"""
+
+    def register_user() -> dict:
+        email = f"user{next(_emails)}@test.example.com"
+        client.post("/auth/register", json={"email": email, "full_name": "Test", "password": "password"})
+        token = client.post("/auth/login", json={"email": email, "password": "password"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    return register_user
+
+
+@pytest.fixture
+def auth_headers(register):
+    return register()
+
+
+@pytest.fixture
+def count_queries():
+    """A list whose length is the number of statements run while the test runs"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def fake_gemini_service():
+    """Serve the AI routes from a Gemini service around a local fake client.
+
+    Returns a function taking the fake client's latency, chunk delay and
+    chunk count and the service's options, which installs the service.
+    """
+
+    def install(latency: float = 0.01, chunk_delay: float = 0, chunks: int = 4, **options) -> GeminiService:
+        defaults = dict(model="fake", timeout=1, max_concurrent_calls=8, queue_timeout=1, retry_backoff=0.01)
+        service = GeminiService(FakeGeminiClient(latency, chunk_delay, chunks), **{**defaults, **options})
+        app.dependency_overrides[get_gemini_service] = lambda: service
+        return service
+
+    yield install
+    app.dependency_overrides.pop(get_gemini_service, None)
@@ -0,0 +1,82 @@
+import asyncio
+import httpx
+import pytest
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+QUESTION = {"query": "How can I save more?"}
+
+
+def _count_calls(service) -> list:
+    """Record each upstream generate_content call of a fake Gemini service"""
+    calls = []
+    models = service.client.aio.models
+    generate_content = models.generate_content
+
+    async def counting_generate_content(**request):
+        calls.append(request)
+        return await generate_content(**request)
+
+    models.generate_content = counting_generate_content
+    return calls
+
+
+@pytest.fixture
+async def http():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        yield http
+
+
+async def test_concurrent_identical_questions_make_one_call(http, auth_headers, fake_gemini_service):
+    calls = _count_calls(fake_gemini_service(latency=0.3))
+    questions = [QUESTION, {"query": "how can i save   more"}, {"query": "How can I save more?!"}] * 2
+
+    responses = await asyncio.gather(*[
+        http.post("/ai/assistant", json=question, headers=auth_headers) for question in questions
+    ])
+
+    assert [response.status_code for response in responses] == [200] * len(questions)
+    assert len({response.json()["response"] for response in responses}) == 1
+    assert len(calls) == 1
+
+
+async def test_other_users_questions_are_not_shared(http, register, fake_gemini_service):
+    calls = _count_calls(fake_gemini_service(latency=0.3))
+
+    await asyncio.gather(*[http.post("/ai/assistant", json=QUESTION, headers=register()) for _ in range(2)])
+
+    assert len(calls) == 2
+
+
+async def test_a_waiter_going_away_does_not_fail_the_others(http, auth_headers, fake_gemini_service):
+    calls = _count_calls(fake_gemini_service(latency=0.3))
+
+    first = asyncio.create_task(http.post("/ai/assistant", json=QUESTION, headers=auth_headers))
+    await asyncio.sleep(0.1)
+    others = [asyncio.create_task(http.post("/ai/assistant", json=QUESTION, headers=auth_headers)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    # The request that started the call disconnects
+    first.cancel()
+
+    responses = await asyncio.gather(*others)
+
+    assert first.cancelled()
+    assert [response.status_code for response in responses] == [200] * 3
+    assert len(calls) == 1
+
+
+async def test_transaction_writes_invalidate_cached_advice(http, auth_headers, fake_gemini_service):
+    calls = _count_calls(fake_gemini_service())
+
+    await http.post("/ai/assistant", json=QUESTION, headers=auth_headers)
+    await http.post("/ai/assistant", json=QUESTION, headers=auth_headers)
+    assert len(calls) == 1
+
+    await http.post("/transactions", headers=auth_headers, json={
+        "type": "expense", "category": "food", "amount": 10, "description": "Test", "date": "2024-03-10T12:00:00"
+    })
+    response = await http.post("/ai/assistant", json=QUESTION, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(calls) == 2
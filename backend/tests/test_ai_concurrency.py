@@ -0,0 +1,48 @@
+import asyncio
+import time
+import httpx
+import pytest
+from app.main import app
+from app.services import gemini
+from benchmarks.fake_gemini import FakeGeminiClient
+
+pytestmark = pytest.mark.anyio
+
+# Seconds the fake Gemini takes to answer (+-25%)
+AI_LATENCY = 1.0
+AI_REQUESTS = 8
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    """Serve the AI routes from a local fake client instead of Gemini"""
+    monkeypatch.setattr(gemini, "client", FakeGeminiClient(latency=AI_LATENCY))
+    monkeypatch.setattr(gemini, "_service", None)
+
+
+async def test_other_endpoints_respond_while_ai_calls_are_pending(fake_gemini, auth_headers):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        advice = [
+            asyncio.create_task(http.post(
+                "/ai/assistant", json={"query": f"How can I save more in month {index}?"}, headers=auth_headers
+            ))
+            for index in range(AI_REQUESTS)
+        ]
+        # Let the AI requests reach the fake client
+        await asyncio.sleep(0.2)
+
+        began = time.perf_counter()
+        health = await http.get("/health")
+        transactions = await http.get("/transactions", headers=auth_headers)
+        elapsed = time.perf_counter() - began
+        pending = sum(not task.done() for task in advice)
+
+        responses = await asyncio.gather(*advice)
+
+    assert health.status_code == 200
+    assert transactions.status_code == 200
+    assert pending == AI_REQUESTS
+    assert elapsed < AI_LATENCY / 2
+    assert [response.status_code for response in responses] == [200] * AI_REQUESTS
+    assert all(response.json()["response"] for response in responses)
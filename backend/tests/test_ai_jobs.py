@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+import pytest
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.ai_job import AIJob, AIJobStatus
+from app.models.user import User
+from app.services.ai_jobs import FairJobQueue, _unfinished_jobs
+
+
+def _abandoned_job(db, attempts: int) -> AIJob:
+    user = db.query(User).first()
+    job = AIJob(
+        user_id=user.id,
+        query="question",
+        status=AIJobStatus.RUNNING,
+        attempts=attempts,
+        started_at=datetime.utcnow() - timedelta(seconds=settings.ai_job_timeout_seconds * 3)
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_abandoned_jobs_are_requeued_until_the_attempt_limit(auth_headers):
+    db = SessionLocal()
+    try:
+        retried = _abandoned_job(db, attempts=settings.ai_job_max_attempts - 1)
+        exhausted = _abandoned_job(db, attempts=settings.ai_job_max_attempts)
+
+        queued = [job_id for job_id, _, _ in _unfinished_jobs()]
+
+        db.expire_all()
+        assert retried.status == AIJobStatus.QUEUED
+        assert retried.id in queued
+        assert exhausted.status == AIJobStatus.FAILED
+        assert exhausted.finished_at is not None
+        assert exhausted.id not in queued
+    finally:
+        db.close()
+
+
+@pytest.mark.anyio
+async def test_high_priority_backlog_does_not_starve_other_users():
+    queue = FairJobQueue()
+    await queue.put(6, user_id=1, priority=0)
+    for job_id in range(1, 6):
+        await queue.put(job_id, user_id=1, priority=9)
+    await queue.put(10, user_id=2, priority=0)
+    await queue.put(11, user_id=2, priority=0)
+
+    order = [(await queue.get())[0] for _ in range(len(queue))]
+
+    # Users alternate; priority only orders each user's own jobs
+    assert order == [1, 10, 2, 11, 3, 4, 5, 6]
@@ -0,0 +1,148 @@
+import asyncio
+import json
+from typing import List, Tuple
+import pytest
+from app.main import app
+from app.services.gemini import get_gemini_service
+from benchmarks.fake_gemini import ANSWER
+
+QUESTION = {"query": "How can I save more?"}
+
+
+class RecordingStream:
+    """Wraps a service stream and records whether the route closed it"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.closed = False
+
+    def __anext__(self):
+        return self.stream.__anext__()
+
+    def __aiter__(self):
+        return self
+
+    async def aclose(self):
+        self.closed = True
+        await self.stream.aclose()
+
+
+def _events(body: str) -> List[Tuple[str, dict]]:
+    """(event, data) pairs of a Server-Sent Events body; plain messages are "message" events"""
+    events = []
+    for message in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines())
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+def test_streams_chunks_then_done(client, auth_headers, fake_gemini_service):
+    fake_gemini_service(chunks=4)
+
+    response = client.post("/ai/assistant/stream", json=QUESTION, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert [event for event, _ in events] == ["message"] * (len(events) - 1) + ["done"]
+    assert len(events) > 2
+    assert "".join(data["text"] for _, data in events[:-1]).strip() == ANSWER
+
+
+def test_repeated_question_is_sent_from_the_cache(client, auth_headers, fake_gemini_service):
+    fake_gemini_service()
+    client.post("/ai/assistant/stream", json=QUESTION, headers=auth_headers)
+    # A service that cannot answer: only the cache can
+    fake_gemini_service(latency=5, timeout=0.1)
+
+    response = client.post("/ai/assistant/stream", json=QUESTION, headers=auth_headers)
+
+    assert _events(response.text) == [("message", {"text": ANSWER + " "}), ("done", {})]
+
+
+def test_failure_before_the_first_chunk_is_an_http_error(client, auth_headers, fake_gemini_service):
+    fake_gemini_service(latency=1, timeout=0.1)
+
+    response = client.post("/ai/assistant/stream", json=QUESTION, headers=auth_headers)
+
+    assert response.status_code == 504
+    assert "did not respond" in response.json()["detail"]
+
+
+def test_open_breaker_is_a_503(client, auth_headers, fake_gemini_service):
+    service = fake_gemini_service()
+    for _ in range(service.breaker.failure_threshold):
+        service.breaker.record_failure()
+
+    response = client.post("/ai/assistant/stream", json=QUESTION, headers=auth_headers)
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+
+def test_unconfigured_service_is_a_503(client, auth_headers):
+    app.dependency_overrides[get_gemini_service] = lambda: None
+    try:
+        response = client.post("/ai/assistant/stream", json=QUESTION, headers=auth_headers)
+    finally:
+        del app.dependency_overrides[get_gemini_service]
+
+    assert response.status_code == 503
+
+
+def test_failure_after_the_first_chunk_is_an_error_event(client, auth_headers, fake_gemini_service):
+    # The first chunk arrives, then the stream stalls past the timeout
+    fake_gemini_service(chunk_delay=1, timeout=0.2)
+
+    response = client.post("/ai/assistant/stream", json=QUESTION, headers=auth_headers)
+
+    assert response.status_code == 200
+    events = _events(response.text)
+    assert events[0][0] == "message"
+    assert events[-1] == ("error", {"status": 504, "detail": "AI service stalled for more than 0.2s"})
+    assert "done" not in [event for event, _ in events]
+
+
+@pytest.mark.anyio
+async def test_client_disconnect_closes_the_upstream_stream(auth_headers, fake_gemini_service):
+    service = fake_gemini_service(chunk_delay=0.1, chunks=20, max_concurrent_calls=1)
+    streams = []
+    stream = service.stream
+
+    def recording_stream(*args, **kwargs):
+        streams.append(RecordingStream(stream(*args, **kwargs)))
+        return streams[-1]
+
+    service.stream = recording_stream
+
+    # Drive the ASGI app directly: the client goes away after the first chunk
+    first_chunk = asyncio.Event()
+    sent = []
+    requests = [{"type": "http.request", "body": json.dumps(QUESTION).encode(), "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await first_chunk.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and message.get("body"):
+            first_chunk.set()
+
+    headers = [(name.lower().encode(), value.encode()) for name, value in auth_headers.items()]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/ai/assistant/stream", "raw_path": b"/ai/assistant/stream",
+        "query_string": b"", "root_path": "", "server": ("test", 80), "client": ("test", 1),
+        "headers": headers + [(b"content-type", b"application/json")],
+    }
+    await asyncio.wait_for(app(scope, receive, send), 5)
+
+    assert sent[0]["status"] == 200
+    bodies = [message for message in sent if message["type"] == "http.response.body" and message.get("body")]
+    assert len(bodies) < 20
+    # The route closed the stream, which frees its call slot
+    assert streams[0].closed
+    await asyncio.wait_for(service._slots.acquire(), 0.1)
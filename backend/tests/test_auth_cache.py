@@ -0,0 +1,66 @@
+from app.core.database import SessionLocal
+from app.core.security import create_access_token
+from app.models.user import User
+
+
+def _user(client, headers) -> dict:
+    response = client.get("/auth/me", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _update_user(user_id: int, **values) -> None:
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        for key, value in values.items():
+            setattr(user, key, value)
+        db.commit()
+
+
+def test_cached_token_and_user_authenticate_without_queries(client, auth_headers, count_queries):
+    _user(client, auth_headers)
+
+    del count_queries[:]
+    _user(client, auth_headers)
+
+    assert count_queries == []
+
+
+def test_deactivated_user_loses_access(client, auth_headers):
+    user = _user(client, auth_headers)
+
+    _update_user(user["id"], is_active=False)
+
+    response = client.get("/auth/me", headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+    assert client.get("/transactions", headers=auth_headers).status_code == 400
+
+
+def test_updated_user_is_reloaded(client, auth_headers):
+    user = _user(client, auth_headers)
+
+    _update_user(user["id"], full_name="Renamed")
+
+    assert _user(client, auth_headers)["full_name"] == "Renamed"
+
+
+def test_deleted_user_is_rejected(client, auth_headers):
+    user = _user(client, auth_headers)
+
+    with SessionLocal() as db:
+        db.delete(db.get(User, user["id"]))
+        db.commit()
+
+    assert client.get("/auth/me", headers=auth_headers).status_code == 401
+
+
+def test_tokens_without_the_user_id_still_work(client, auth_headers):
+    user = _user(client, auth_headers)
+    # Issued before tokens carried the user id and active flag
+    legacy = {"Authorization": f"Bearer {create_access_token(data={'sub': user['email']})}"}
+
+    assert _user(client, legacy)["id"] == user["id"]
+
+    _update_user(user["id"], is_active=False)
+    assert client.get("/auth/me", headers=legacy).status_code == 400
@@ -0,0 +1,48 @@
+import pytest
+from app.core.config import settings
+
+WHOLE_MONTH = ("2024-03-01T00:00:00", "2024-03-31T23:59:59")
+PART_OF_MONTH = ("2024-03-05T00:00:00", "2024-03-20T00:00:00")
+CATEGORIES = ("food", "transport", "shopping")
+
+
+def _user_with_budgets(client, headers, budgets: int, dates) -> dict:
+    """Create a user with some March expenses and the given number of budgets"""
+    for day, category in enumerate(CATEGORIES, start=10):
+        client.post("/transactions", headers=headers, json={
+            "type": "expense", "category": category, "amount": 10,
+            "description": "Test", "date": f"2024-03-{day}T12:00:00"
+        })
+    for index in range(budgets):
+        client.post("/budgets", headers=headers, json={
+            "category": CATEGORIES[index % len(CATEGORIES)], "amount": 100,
+            "period": "monthly", "start_date": dates[0], "end_date": dates[1]
+        })
+    return headers
+
+
+def _endpoint_queries(client, headers, count_queries: list) -> int:
+    """Statements run by GET /budgets, with the user already cached by an earlier request"""
+    client.get("/auth/me", headers=headers)
+    before = len(count_queries)
+    response = client.get("/budgets", headers=headers)
+    queries = len(count_queries) - before
+    assert response.status_code == 200
+    assert all(budget["spent"] == 10 for budget in response.json())
+    return queries
+
+
+@pytest.mark.parametrize("dates", [WHOLE_MONTH, PART_OF_MONTH], ids=["whole-month", "part-of-month"])
+@pytest.mark.parametrize("rollups, daily_sums", [(True, True), (False, True), (False, False)],
+                         ids=["rollups", "daily-sums", "transactions"])
+def test_query_count_does_not_grow_with_budgets(client, register, count_queries, monkeypatch, dates, rollups, daily_sums):
+    monkeypatch.setattr(settings, "monthly_rollups_enabled", rollups)
+    monkeypatch.setattr(settings, "daily_sums_enabled", daily_sums)
+
+    one = _user_with_budgets(client, register(), 1, dates)
+    many = _user_with_budgets(client, register(), 12, dates)
+
+    queries = _endpoint_queries(client, one, count_queries)
+    assert queries == _endpoint_queries(client, many, count_queries)
+    # The data version, the budgets and one grouped sum (two for daily sums)
+    assert queries <= 4
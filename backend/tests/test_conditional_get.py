@@ -0,0 +1,92 @@
+import pytest
+
+TRANSACTION = {
+    "type": "expense", "category": "food", "amount": 12.5,
+    "description": "Lunch", "date": "2024-03-10T12:00:00"
+}
+BUDGET = {
+    "category": "food", "amount": 100, "period": "monthly",
+    "start_date": "2024-03-01T00:00:00", "end_date": "2024-03-31T23:59:59"
+}
+
+
+def _etag(client, headers, path: str = "/transactions") -> str:
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+@pytest.mark.parametrize("path", ["/transactions", "/transactions/stats", "/budgets"])
+def test_repeat_get_is_answered_with_304_after_one_query(client, auth_headers, count_queries, path):
+    client.post("/transactions", json=TRANSACTION, headers=auth_headers)
+    etag = _etag(client, auth_headers, path)
+
+    del count_queries[:]
+    response = client.get(path, headers={**auth_headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert not response.content
+    # The user is cached from the first GET; only the data version is read
+    assert len(count_queries) == 1
+
+
+def test_weak_and_listed_etags_match(client, auth_headers):
+    etag = _etag(client, auth_headers)
+
+    for if_none_match in (f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get("/transactions", headers={**auth_headers, "If-None-Match": if_none_match})
+        assert response.status_code == 304
+
+
+def test_transaction_writes_change_the_etag(client, auth_headers):
+    etags = [_etag(client, auth_headers)]
+
+    transaction_id = client.post("/transactions", json=TRANSACTION, headers=auth_headers).json()["id"]
+    etags.append(_etag(client, auth_headers))
+    client.put(f"/transactions/{transaction_id}", json={"amount": 20}, headers=auth_headers)
+    etags.append(_etag(client, auth_headers))
+    client.delete(f"/transactions/{transaction_id}", headers=auth_headers)
+    etags.append(_etag(client, auth_headers))
+
+    assert len(set(etags)) == len(etags)
+    stale = client.get("/transactions", headers={**auth_headers, "If-None-Match": etags[0]})
+    assert stale.status_code == 200
+
+
+def test_batch_and_import_change_the_etag(client, auth_headers):
+    etags = [_etag(client, auth_headers)]
+
+    client.post("/transactions/batch", json={"operations": [{"op": "create", "data": TRANSACTION}]},
+                headers=auth_headers)
+    etags.append(_etag(client, auth_headers))
+    csv = "date,amount,type,category,description\n2024-03-11,8,expense,food,Coffee\n"
+    response = client.post("/transactions/import", files={"file": ("bank.csv", csv)}, headers=auth_headers)
+    assert response.json()["imported"] == 1
+    etags.append(_etag(client, auth_headers))
+
+    assert len(set(etags)) == len(etags)
+
+
+def test_budget_writes_change_the_etag(client, auth_headers):
+    etags = [_etag(client, auth_headers, "/budgets")]
+
+    budget_id = client.post("/budgets", json=BUDGET, headers=auth_headers).json()["id"]
+    etags.append(_etag(client, auth_headers, "/budgets"))
+    client.put(f"/budgets/{budget_id}", json={"amount": 150}, headers=auth_headers)
+    etags.append(_etag(client, auth_headers, "/budgets"))
+    client.delete(f"/budgets/{budget_id}", headers=auth_headers)
+    etags.append(_etag(client, auth_headers, "/budgets"))
+
+    assert len(set(etags)) == len(etags)
+
+
+def test_etags_differ_across_query_strings_and_users(client, register):
+    alice, bob = register(), register()
+
+    assert _etag(client, alice) != _etag(client, alice, "/transactions?type=expense")
+    assert _etag(client, alice, "/transactions?limit=5&type=expense") == \
+        _etag(client, alice, "/transactions?type=expense&limit=5")
+    assert _etag(client, alice) != _etag(client, bob)
+    bob_etag = _etag(client, bob)
+    assert client.get("/transactions", headers={**alice, "If-None-Match": bob_etag}).status_code == 200
@@ -0,0 +1,96 @@
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.daily_sums import check_daily_sums
+
+# Ranges that cut through days: partial first and last days, bounds equal to
+# a transaction's time (both ends are inclusive), open ends and single days
+RANGES = [
+    {},
+    {"start_date": "2024-03-05T00:00:00", "end_date": "2024-03-20T00:00:00"},
+    {"start_date": "2024-03-05T12:00:00", "end_date": "2024-03-20T18:30:00"},
+    {"start_date": "2024-03-10T08:15:00", "end_date": "2024-03-10T20:00:00"},
+    {"start_date": "2024-03-10T08:15:01", "end_date": "2024-03-25T23:59:59"},
+    {"start_date": "2024-03-12T00:00:00"},
+    {"end_date": "2024-03-10T08:15:00"},
+    {"start_date": "2024-03-20T00:00:00", "end_date": "2024-03-05T00:00:00"},
+]
+
+
+def _create(client, headers, amount: float, date: str, category: str = "food", type: str = "expense") -> int:
+    response = client.post("/transactions", headers=headers, json={
+        "type": type, "category": category, "amount": amount, "description": "Test", "date": date
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def _stats(client, headers, monkeypatch, daily_sums: bool, dates: dict) -> dict:
+    monkeypatch.setattr(settings, "monthly_rollups_enabled", False)
+    monkeypatch.setattr(settings, "daily_sums_enabled", daily_sums)
+    stats = client.get("/transactions/stats", params=dates, headers=headers).json()
+    for total in stats["category_totals"]:
+        total["total"] = round(total["total"], 2)
+    stats["category_totals"].sort(key=lambda item: (item["type"], item["category"]))
+    for key in ("total_income", "total_expense", "balance"):
+        stats[key] = round(stats[key], 2)
+    return stats
+
+
+def _assert_in_sync(client, headers, monkeypatch):
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    with SessionLocal() as db:
+        assert check_daily_sums(db, user_id) == []
+    for dates in RANGES:
+        # From the running sums, and from a scan of the transactions table
+        assert _stats(client, headers, monkeypatch, True, dates) == \
+            _stats(client, headers, monkeypatch, False, dates), dates
+
+
+def test_range_stats_match_a_table_scan(client, auth_headers, monkeypatch):
+    _create(client, auth_headers, 10, "2024-03-10T08:15:00")
+    _create(client, auth_headers, 20, "2024-03-20T18:30:00", category="transport")
+    _create(client, auth_headers, 1000, "2024-03-05T00:00:00", category="salary", type="income")
+    # Back-dated inserts land before days that already have running sums
+    _create(client, auth_headers, 2.5, "2024-03-01T09:00:00")
+    _create(client, auth_headers, 4, "2024-03-10T23:59:59")
+    _create(client, auth_headers, 7, "2024-03-05T12:00:00", category="transport")
+
+    _assert_in_sync(client, auth_headers, monkeypatch)
+
+
+def test_moving_transactions_across_days(client, auth_headers, monkeypatch):
+    moved = _create(client, auth_headers, 10, "2024-03-10T08:15:00")
+    _create(client, auth_headers, 5, "2024-03-15T12:00:00")
+    _create(client, auth_headers, 8, "2024-03-25T12:00:00")
+
+    for change in (
+        {"date": "2024-03-20T10:00:00"},
+        {"date": "2024-03-02T10:00:00"},
+        {"date": "2024-03-05T12:00:00", "category": "transport"},
+        {"date": "2024-03-05T23:00:00", "amount": 11},
+        {"type": "income", "category": "salary"},
+    ):
+        response = client.put(f"/transactions/{moved}", json=change, headers=auth_headers)
+        assert response.status_code == 200
+        _assert_in_sync(client, auth_headers, monkeypatch)
+
+    assert client.delete(f"/transactions/{moved}", headers=auth_headers).status_code == 204
+    _assert_in_sync(client, auth_headers, monkeypatch)
+
+
+def test_batch_writes_keep_the_running_sums(client, auth_headers, monkeypatch):
+    kept = _create(client, auth_headers, 10, "2024-03-10T08:15:00")
+    deleted = _create(client, auth_headers, 5, "2024-03-15T12:00:00")
+
+    operations = [
+        {"op": "create", "data": {"type": "expense", "category": "food", "amount": 3,
+                                  "date": "2024-03-01T07:00:00"}},
+        {"op": "update", "id": kept, "data": {"date": "2024-03-22T07:00:00"}},
+        {"op": "delete", "id": deleted},
+        {"op": "create", "data": {"type": "expense", "category": "food", "amount": 6,
+                                  "date": "2024-03-15T12:00:00"}},
+    ]
+    response = client.post("/transactions/batch", json={"operations": operations}, headers=auth_headers)
+    assert [result["status"] for result in response.json()["results"]] == [201, 200, 204, 201]
+
+    _assert_in_sync(client, auth_headers, monkeypatch)
@@ -0,0 +1,15 @@
+from app.commands import explain
+
+
+def test_route_queries_use_their_indexes(client, auth_headers, capsys):
+    client.post("/transactions", headers=auth_headers, json={
+        "type": "expense", "category": "food", "amount": 10, "description": "Test", "date": "2024-03-10T12:00:00"
+    })
+    for start_date, end_date in (("2024-03-01T00:00:00", "2024-03-31T23:59:59"),
+                                 ("2024-03-05T00:00:00", "2024-03-20T00:00:00")):
+        client.post("/budgets", headers=auth_headers, json={
+            "category": "food", "amount": 100, "period": "monthly", "start_date": start_date, "end_date": end_date
+        })
+    user_id = client.get("/auth/me", headers=auth_headers).json()["id"]
+
+    assert explain.main(["--user-id", str(user_id)]) == 0, capsys.readouterr().out
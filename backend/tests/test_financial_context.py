@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+import pytest
+from app.core.database import SessionLocal
+from app.services.financial_context import get_financial_snapshot, snapshot_cache
+
+
+def _user_id(client, headers) -> int:
+    return client.get("/auth/me", headers=headers).json()["id"]
+
+
+def _snapshot(user_id: int):
+    with SessionLocal() as db:
+        return get_financial_snapshot(db, user_id)
+
+
+def _transaction(amount: float = 10, date: datetime = None) -> dict:
+    date = date or datetime.utcnow().replace(microsecond=0)
+    return {"type": "expense", "category": "food", "amount": amount, "description": "Test", "date": date.isoformat()}
+
+
+def _current_budget(amount: float = 100) -> dict:
+    now = datetime.utcnow()
+    return {
+        "category": "food", "amount": amount, "period": "monthly",
+        "start_date": (now - timedelta(days=1)).isoformat(), "end_date": (now + timedelta(days=1)).isoformat()
+    }
+
+
+def test_transaction_writes_invalidate_the_snapshot(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    assert _snapshot(user_id).total_expense == 0
+
+    transaction_id = client.post("/transactions", json=_transaction(10), headers=auth_headers).json()["id"]
+    assert snapshot_cache.get(user_id) is None
+    assert _snapshot(user_id).total_expense == 10
+
+    client.put(f"/transactions/{transaction_id}", json={"amount": 25}, headers=auth_headers)
+    assert _snapshot(user_id).total_expense == 25
+
+    client.post("/transactions/batch", json={"operations": [{"op": "delete", "id": transaction_id}]},
+                headers=auth_headers)
+    assert _snapshot(user_id).total_expense == 0
+
+
+def test_budget_writes_invalidate_the_snapshot(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    client.post("/transactions", json=_transaction(10), headers=auth_headers)
+    assert _snapshot(user_id).budgets == ()
+
+    budget_id = client.post("/budgets", json=_current_budget(100), headers=auth_headers).json()["id"]
+    assert _snapshot(user_id).budgets == (("food", 10, 100, 10),)
+
+    client.put(f"/budgets/{budget_id}", json={"amount": 50}, headers=auth_headers)
+    assert _snapshot(user_id).budgets == (("food", 10, 50, 20),)
+
+    client.delete(f"/budgets/{budget_id}", headers=auth_headers)
+    assert _snapshot(user_id).budgets == ()
+
+
+def test_other_users_snapshots_stay_cached(client, register):
+    alice, bob = register(), register()
+    bob_id = _user_id(client, bob)
+    cached = _snapshot(bob_id)
+
+    client.post("/transactions", json=_transaction(), headers=alice)
+
+    assert snapshot_cache.get(bob_id) is cached
+
+
+@pytest.mark.parametrize("budgets", [1, 10])
+def test_snapshot_query_count_does_not_grow(client, register, count_queries, budgets):
+    headers = register()
+    user_id = _user_id(client, headers)
+    for _ in range(budgets):
+        client.post("/budgets", json=_current_budget(), headers=headers)
+    for months_ago in range(4):
+        client.post("/transactions", json=_transaction(date=datetime.utcnow() - timedelta(days=31 * months_ago)),
+                    headers=headers)
+    snapshot_cache.pop(user_id)
+
+    del count_queries[:]
+    snapshot = _snapshot(user_id)
+
+    assert len(snapshot.budgets) == budgets
+    assert 2 <= len(count_queries) <= 4
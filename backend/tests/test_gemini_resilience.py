@@ -0,0 +1,159 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import httpx
+import pytest
+from app.core.resilience import CircuitBreaker
+from app.services.gemini import AIServiceError, AITimeoutError, AIUnavailableError, GeminiService
+
+pytestmark = pytest.mark.anyio
+
+RESET_SECONDS = 0.1
+
+
+class ScriptedModels:
+    """Answers generate_content calls from a script: a number is a delay, an exception is raised"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def generate_content(self, model, config, contents):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else 0
+        if isinstance(outcome, BaseException):
+            raise outcome
+        await asyncio.sleep(outcome)
+        return SimpleNamespace(text="answer", usage_metadata=None)
+
+
+class CountingCaches:
+    def __init__(self):
+        self.created = 0
+
+    async def create(self, model, config):
+        self.created += 1
+        return SimpleNamespace(name=f"caches/{self.created}")
+
+
+def _service(models: ScriptedModels, **options) -> GeminiService:
+    client = SimpleNamespace(aio=SimpleNamespace(models=models, caches=CountingCaches()))
+    defaults = dict(
+        model="test-model",
+        timeout=1,
+        max_concurrent_calls=8,
+        queue_timeout=1,
+        retry_backoff=0.01,
+        breaker_failure_threshold=2,
+        breaker_reset_seconds=RESET_SECONDS
+    )
+    return GeminiService(client, **{**defaults, **options})
+
+
+def _unreachable():
+    return httpx.ConnectError("connection refused")
+
+
+async def test_retries_retryable_failures():
+    models = ScriptedModels(_unreachable())
+    service = _service(models)
+
+    assert await service.generate("instruction", "question") == "answer"
+    assert models.calls == 2
+    assert service.retry_budget.retries == 1
+    assert service.breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_does_not_retry_other_failures():
+    models = ScriptedModels(ValueError("bad request"))
+    service = _service(models)
+
+    with pytest.raises(AIServiceError) as error:
+        await service.generate("instruction", "question")
+    assert error.value.status_code == 500
+    assert models.calls == 1
+
+
+async def test_gives_up_at_the_deadline():
+    models = ScriptedModels(5)
+    service = _service(models, timeout=0.2)
+
+    began = time.perf_counter()
+    with pytest.raises(AITimeoutError):
+        await service.generate("instruction", "question")
+    assert time.perf_counter() - began < 1
+    assert models.calls == 1
+
+
+async def test_does_not_retry_past_the_deadline():
+    models = ScriptedModels(_unreachable(), _unreachable(), _unreachable())
+    service = _service(models, timeout=0.2, retry_backoff=1)
+
+    began = time.perf_counter()
+    with pytest.raises(AIServiceError):
+        await service.generate("instruction", "question")
+    assert time.perf_counter() - began < 0.5
+
+
+async def test_open_breaker_fails_fast_without_upstream_calls():
+    models = ScriptedModels(_unreachable(), _unreachable())
+    service = _service(models, max_retries=0, prompt_cache_ttl=60)
+    for _ in range(2):
+        with pytest.raises(AIServiceError):
+            await service.generate("instruction", "question")
+    assert service.breaker.state == CircuitBreaker.OPEN
+    caches_created = service.client.aio.caches.created
+
+    # A new instruction would need a new prompt cache; an open breaker must not create it
+    with pytest.raises(AIUnavailableError) as error:
+        await service.generate("another instruction", "question")
+    assert error.value.status_code == 503
+    assert "Retry-After" in error.value.headers
+    assert models.calls == 2
+    assert service.client.aio.caches.created == caches_created
+
+
+async def test_half_open_trial_success_closes_the_breaker():
+    models = ScriptedModels(_unreachable(), _unreachable())
+    service = _service(models, max_retries=0)
+    for _ in range(2):
+        with pytest.raises(AIServiceError):
+            await service.generate("instruction", "question")
+
+    await asyncio.sleep(RESET_SECONDS)
+    assert await service.generate("instruction", "question") == "answer"
+    assert service.breaker.state == CircuitBreaker.CLOSED
+    assert models.calls == 3
+
+
+async def test_half_open_trial_failure_reopens_the_breaker():
+    models = ScriptedModels(_unreachable(), _unreachable(), _unreachable())
+    service = _service(models, max_retries=0)
+    for _ in range(2):
+        with pytest.raises(AIServiceError):
+            await service.generate("instruction", "question")
+
+    await asyncio.sleep(RESET_SECONDS)
+    with pytest.raises(AIServiceError):
+        await service.generate("instruction", "question")
+    assert service.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(AIUnavailableError):
+        await service.generate("instruction", "question")
+    assert models.calls == 3
+
+
+async def test_half_open_lets_one_trial_through():
+    models = ScriptedModels(_unreachable(), _unreachable(), 0.2)
+    service = _service(models, max_retries=0)
+    for _ in range(2):
+        with pytest.raises(AIServiceError):
+            await service.generate("instruction", "question")
+
+    await asyncio.sleep(RESET_SECONDS)
+    trial = asyncio.create_task(service.generate("instruction", "question"))
+    await asyncio.sleep(0.05)
+    with pytest.raises(AIUnavailableError):
+        await service.generate("instruction", "question")
+    assert await trial == "answer"
+    assert service.breaker.state == CircuitBreaker.CLOSED
+    assert models.calls == 3
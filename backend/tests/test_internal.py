@@ -0,0 +1,59 @@
+import pytest
+from app.core.config import settings
+from app.services import gemini
+
+ENDPOINTS = ["/internal/pool", "/internal/cache", "/internal/ai", "/internal/queries"]
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_hidden_without_a_configured_token(client, path):
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_require_the_token(client, monkeypatch, path):
+    monkeypatch.setattr(settings, "internal_token", "secret")
+
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"X-Internal-Token": "wrong"}).status_code == 403
+    assert client.get(path, headers={"X-Internal-Token": "secret"}).status_code == 200
+
+
+def test_ai_stats_do_not_create_the_gemini_client(client, monkeypatch):
+    monkeypatch.setattr(settings, "internal_token", "secret")
+    monkeypatch.setattr(settings, "gemini_api_key", "key")
+    monkeypatch.setattr(gemini, "_service", None)
+    monkeypatch.setattr(gemini, "client", None)
+
+    response = client.get("/internal/ai", headers={"X-Internal-Token": "secret"})
+
+    assert response.json()["available"] is True
+    assert gemini.client is None
+
+
+def test_accept_the_token_as_a_bearer_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "internal_token", "secret")
+
+    assert client.get("/internal/pool", headers={"Authorization": "Bearer secret"}).status_code == 200
+    assert client.get("/internal/pool", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    assert client.get("/internal/pool", headers={"X-Internal-Token": "sécret".encode("latin-1")}).status_code == 403
+
+
+def test_metrics_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "internal_token", "secret")
+    assert client.get("/metrics").status_code == 403
+    response = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+def test_metrics_can_be_made_public(client, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    monkeypatch.setattr(settings, "metrics_public", True)
+    assert client.get("/metrics").status_code == 200
+
+    monkeypatch.setattr(settings, "metrics_enabled", False)
+    assert client.get("/metrics").status_code == 404
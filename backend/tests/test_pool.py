@@ -0,0 +1,99 @@
+import os
+import tempfile
+import pytest
+from sqlalchemy import create_engine, exc, text
+from app.core.config import Settings, settings
+from app.core.pool import InstrumentedQueuePool, engine_options, install_idle_pre_ping, pool_stats
+
+
+@pytest.fixture
+def make_engine(monkeypatch):
+    """Build engines on a throwaway SQLite file with the given DB_POOL_* settings"""
+    engines = []
+
+    def make(**options):
+        for name, value in options.items():
+            monkeypatch.setattr(settings, name, value)
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pool.db')}"
+        engines.append(create_engine(url, **engine_options(url)))
+        return engines[-1]
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+def test_pings_every_checkout_by_default(make_engine):
+    assert Settings.model_fields["db_pool_pre_ping"].default == "always"
+    assert make_engine(db_pool_pre_ping="always").pool._pre_ping
+    assert not make_engine(db_pool_pre_ping="idle").pool._pre_ping
+
+
+def test_counts_checkouts_and_waits(make_engine):
+    engine = make_engine(db_pool_size=2, db_max_overflow=0)
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    stats = pool_stats(engine)
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    assert stats["pool"] == "InstrumentedQueuePool"
+    assert (stats["size"], stats["max_overflow"]) == (2, 0)
+    assert (stats["checkouts"], stats["checked_out"], stats["waiting"]) == (3, 0, 0)
+    # Cumulative buckets, ending with every checkout
+    histogram = list(stats["wait_seconds_histogram"].values())
+    assert histogram == sorted(histogram)
+    assert stats["wait_seconds_histogram"]["+Inf"] == 3
+
+
+def test_counts_checkout_timeouts(make_engine):
+    engine = make_engine(db_pool_size=1, db_max_overflow=0, db_pool_timeout=0.05)
+
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        assert pool_stats(engine)["checked_out"] == 1
+
+    stats = pool_stats(engine)
+    assert (stats["checkouts"], stats["checkout_timeouts"], stats["waiting"]) == (1, 1, 0)
+
+
+def test_counters_survive_dispose(make_engine):
+    engine = make_engine()
+    engine.connect().close()
+
+    engine.dispose()
+    engine.connect().close()
+
+    assert pool_stats(engine)["checkouts"] == 2
+
+
+def test_idle_pre_ping_replaces_dead_connections(make_engine):
+    engine = make_engine(db_pool_pre_ping="idle")
+    install_idle_pre_ping(engine, idle_seconds=0)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    # Idle long enough: pinged and kept
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        pooled = connection.connection.dbapi_connection
+    # Kill it while it waits in the pool, as a server idle timeout would
+    pooled.close()
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+
+    stats = pool_stats(engine)
+    assert (stats["pre_pings"], stats["pre_ping_failures"]) == (2, 1)
+
+
+def test_idle_pre_ping_skips_recently_used_connections(make_engine):
+    engine = make_engine(db_pool_pre_ping="idle")
+    install_idle_pre_ping(engine, idle_seconds=60)
+
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    assert pool_stats(engine)["pre_pings"] == 0
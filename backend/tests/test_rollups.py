@@ -0,0 +1,68 @@
+import pytest
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.rollups import check_rollups
+
+MARCH = {"start_date": "2024-03-01T00:00:00", "end_date": "2024-03-31T23:59:59"}
+APRIL = {"start_date": "2024-04-01T00:00:00", "end_date": "2024-04-30T23:59:59"}
+
+
+def _create(client, headers, amount: float, category: str = "food", date: str = "2024-03-10T12:00:00",
+            type: str = "expense") -> int:
+    response = client.post("/transactions", headers=headers, json={
+        "type": type, "category": category, "amount": amount, "description": "Test", "date": date
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def _stats(client, headers, monkeypatch, rollups: bool, **dates) -> dict:
+    monkeypatch.setattr(settings, "monthly_rollups_enabled", rollups)
+    monkeypatch.setattr(settings, "daily_sums_enabled", False)
+    stats = client.get("/transactions/stats", params=dates, headers=headers).json()
+    stats["category_totals"].sort(key=lambda item: (item["type"], item["category"]))
+    return stats
+
+
+def _assert_in_sync(client, headers, monkeypatch):
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    with SessionLocal() as db:
+        assert check_rollups(db, user_id) == []
+    for dates in ({}, MARCH, APRIL):
+        # From the rollups, and from a scan of the transactions table
+        assert _stats(client, headers, monkeypatch, True, **dates) == \
+            _stats(client, headers, monkeypatch, False, **dates)
+
+
+def test_writes_keep_the_rollups_equal_to_a_recompute(client, auth_headers, monkeypatch):
+    food = _create(client, auth_headers, 10)
+    salary = _create(client, auth_headers, 1000, category="salary", type="income", date="2024-03-01T00:00:00")
+    _create(client, auth_headers, 5.25, date="2024-03-31T23:59:59")
+    _assert_in_sync(client, auth_headers, monkeypatch)
+
+    changes = [
+        (food, {"amount": 12.5}),
+        (food, {"category": "transport"}),
+        (food, {"type": "income", "category": "other_income"}),
+        (food, {"date": "2024-04-02T09:00:00"}),
+        (salary, {"date": "2024-04-01T00:00:00", "amount": 1100}),
+        (food, {"description": "Only the description"}),
+    ]
+    for transaction_id, change in changes:
+        response = client.put(f"/transactions/{transaction_id}", json=change, headers=auth_headers)
+        assert response.status_code == 200
+        _assert_in_sync(client, auth_headers, monkeypatch)
+
+    assert client.delete(f"/transactions/{food}", headers=auth_headers).status_code == 204
+    _assert_in_sync(client, auth_headers, monkeypatch)
+    assert _stats(client, auth_headers, monkeypatch, True, **APRIL)["total_income"] == 1100
+
+
+@pytest.mark.parametrize("date", ["2024-03-15T12:00:00", "2024-04-15T12:00:00"], ids=["same-month", "next-month"])
+def test_deleting_a_whole_bucket_leaves_no_totals(client, auth_headers, monkeypatch, date):
+    transaction_id = _create(client, auth_headers, 0.1)
+    client.put(f"/transactions/{transaction_id}", json={"amount": 0.2, "date": date}, headers=auth_headers)
+    client.delete(f"/transactions/{transaction_id}", headers=auth_headers)
+
+    _assert_in_sync(client, auth_headers, monkeypatch)
+    assert _stats(client, auth_headers, monkeypatch, True)["category_totals"] == []
@@ -0,0 +1,110 @@
+from app.core.database import SessionLocal
+from app.services.daily_sums import check_daily_sums
+from app.services.rollups import check_rollups
+
+
+def _transaction(amount: float = 10, category: str = "food", date: str = "2024-03-10T12:00:00", type: str = "expense"):
+    return {"type": type, "category": category, "amount": amount, "description": "Test", "date": date}
+
+
+def _batch(client, headers, *operations) -> list:
+    response = client.post("/transactions/batch", json={"operations": list(operations)}, headers=headers)
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def _create(client, headers, **fields) -> int:
+    return client.post("/transactions", json=_transaction(**fields), headers=headers).json()["id"]
+
+
+def _user_id(client, headers) -> int:
+    return client.get("/auth/me", headers=headers).json()["id"]
+
+
+def test_other_users_ids_fail_alone(client, register):
+    alice, bob = register(), register()
+    theirs = _create(client, bob)
+    mine = _create(client, alice)
+
+    results = _batch(
+        client, alice,
+        {"op": "update", "id": theirs, "data": {"amount": 99}},
+        {"op": "delete", "id": theirs},
+        {"op": "update", "id": mine, "data": {"amount": 25}},
+        {"op": "create", "data": _transaction(amount=5)},
+    )
+
+    assert [result["status"] for result in results] == [404, 404, 200, 201]
+    assert results[2]["transaction"]["amount"] == 25
+    assert client.get(f"/transactions/{theirs}", headers=bob).json()["amount"] == 10
+    assert len(client.get("/transactions", headers=alice).json()) == 2
+
+
+def test_null_required_fields_are_rejected(client, auth_headers):
+    transaction_id = _create(client, auth_headers)
+
+    results = _batch(
+        client, auth_headers,
+        {"op": "update", "id": transaction_id, "data": {"amount": None, "category": None}},
+        {"op": "update", "id": transaction_id, "data": {"description": None}},
+    )
+
+    assert results[0]["status"] == 422
+    assert results[0]["error"] == "category, amount may not be null"
+    assert results[1]["status"] == 200
+    stored = client.get(f"/transactions/{transaction_id}", headers=auth_headers).json()
+    assert (stored["amount"], stored["category"], stored["description"]) == (10, "food", None)
+
+
+def test_update_then_delete_of_the_same_id(client, auth_headers):
+    transaction_id = _create(client, auth_headers)
+
+    results = _batch(
+        client, auth_headers,
+        {"op": "update", "id": transaction_id, "data": {"amount": 50}},
+        {"op": "delete", "id": transaction_id},
+        {"op": "update", "id": transaction_id, "data": {"amount": 60}},
+    )
+
+    assert [result["status"] for result in results] == [200, 204, 404]
+    assert client.get(f"/transactions/{transaction_id}", headers=auth_headers).status_code == 404
+    assert client.get("/transactions/stats", headers=auth_headers).json()["total_expense"] == 0
+
+
+def test_create_then_update(client, auth_headers):
+    created = _batch(client, auth_headers, {"op": "create", "data": _transaction(amount=10)})[0]
+
+    results = _batch(
+        client, auth_headers,
+        {"op": "update", "id": created["id"], "data": {"amount": 30, "category": "transport"}},
+    )
+
+    assert results[0]["status"] == 200
+    assert results[0]["transaction"]["amount"] == 30
+    assert results[0]["transaction"]["category"] == "transport"
+    stats = client.get("/transactions/stats", headers=auth_headers).json()
+    assert stats["total_expense"] == 30
+    assert [(total["category"], total["total"]) for total in stats["category_totals"]] == [("transport", 30)]
+
+
+def test_mixed_batch_keeps_the_aggregates_in_sync(client, auth_headers):
+    kept = _create(client, auth_headers, amount=10, date="2024-01-15T12:00:00")
+    moved = _create(client, auth_headers, amount=20, date="2024-01-20T12:00:00")
+    deleted = _create(client, auth_headers, amount=30, date="2024-02-01T12:00:00")
+
+    _batch(
+        client, auth_headers,
+        {"op": "create", "data": _transaction(amount=7, date="2023-12-31T23:00:00")},
+        {"op": "update", "id": kept, "data": {"description": "Only the description"}},
+        {"op": "update", "id": moved, "data": {"date": "2024-03-05T08:00:00", "type": "income", "category": "salary"}},
+        {"op": "update", "id": moved, "data": {"amount": 25}},
+        {"op": "delete", "id": deleted},
+        {"op": "create", "data": _transaction(amount=3, date="2024-01-15T18:00:00")},
+    )
+
+    user_id = _user_id(client, auth_headers)
+    with SessionLocal() as db:
+        assert check_rollups(db, user_id) == []
+        assert check_daily_sums(db, user_id) == []
+    stats = client.get("/transactions/stats", headers=auth_headers).json()
+    assert (stats["total_income"], stats["total_expense"]) == (25, 20)
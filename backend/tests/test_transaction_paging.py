@@ -0,0 +1,76 @@
+import pytest
+
+
+def _create(client, headers, date: str, type: str = "expense", category: str = "food") -> int:
+    response = client.post("/transactions", headers=headers, json={
+        "type": type, "category": category, "amount": 10, "description": "Test", "date": date
+    })
+    return response.json()["id"]
+
+
+def _pages(client, headers, limit: int, **filters) -> list:
+    """Follow next_cursor from the first page, returning each page's ids"""
+    pages, cursor = [], ""
+    while cursor is not None:
+        response = client.get("/transactions", params={**filters, "limit": limit, "cursor": cursor}, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        pages.append([item["id"] for item in page["items"]])
+        cursor = page["next_cursor"]
+    return pages
+
+
+def test_cursor_pages_through_ties_on_the_same_date(client, auth_headers):
+    same_time = [_create(client, auth_headers, "2024-03-10T12:00:00") for _ in range(5)]
+    older = _create(client, auth_headers, "2024-03-01T12:00:00")
+    newer = _create(client, auth_headers, "2024-03-20T12:00:00")
+
+    pages = _pages(client, auth_headers, limit=2)
+
+    assert pages == [[newer, same_time[4]], same_time[3:1:-1], [same_time[1], same_time[0]], [older]]
+
+
+def test_cursor_pages_keep_the_filters(client, auth_headers):
+    expenses = [_create(client, auth_headers, f"2024-03-{day:02d}T12:00:00") for day in range(1, 8)]
+    for day in range(1, 8):
+        _create(client, auth_headers, f"2024-03-{day:02d}T12:00:00", type="income", category="salary")
+
+    pages = _pages(client, auth_headers, limit=2, type="expense",
+                   start_date="2024-03-02T00:00:00", end_date="2024-03-06T23:59:59")
+
+    assert sum(pages, []) == expenses[5:0:-1]
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+
+def test_full_last_page_has_no_next_cursor(client, auth_headers):
+    for day in range(1, 5):
+        _create(client, auth_headers, f"2024-03-{day:02d}T12:00:00")
+
+    assert [len(page) for page in _pages(client, auth_headers, limit=2)] == [2, 2]
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "!!!"])
+def test_malformed_cursor_is_a_400(client, auth_headers, cursor):
+    response = client.get("/transactions", params={"cursor": cursor}, headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_cursor_page_needs_a_positive_limit(client, auth_headers, limit):
+    response = client.get("/transactions", params={"cursor": "", "limit": limit}, headers=auth_headers)
+
+    assert response.status_code == 422
+
+
+def test_skip_limit_caps_oversized_limits(client, auth_headers, monkeypatch):
+    monkeypatch.setattr("app.routes.transactions.MAX_PAGE_SIZE", 3)
+    for day in range(1, 6):
+        _create(client, auth_headers, f"2024-03-{day:02d}T12:00:00")
+
+    response = client.get("/transactions", params={"limit": 5000}, headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert len(client.get("/transactions", params={"limit": 0}, headers=auth_headers).json()) == 0
+    assert len(client.get("/transactions", params={"skip": 4, "limit": 2}, headers=auth_headers).json()) == 1